@@ -28,6 +28,7 @@ import subprocess
 from ._intbv import intbv
 from ._errors import CosimulationError
 from ._simulator import _simulator
+from ._util import _recordCreation
 from os import set_inheritable
 
 _MAXLINE = 4096
@@ -55,6 +56,7 @@ class Cosimulation(object):
         if _simulator._cosim != 0:
             raise CosimulationError(_error.MultipleCosim)
         _simulator._cosim = id(self)
+        _recordCreation(self)
 
         self._rt, self._wt = rt, wt = os.pipe()
         self._rf, self._wf = rf, wf = os.pipe()
@@ -315,7 +315,12 @@ class _TristateSignal(_ShadowSignal):
                     res = None
                     break
             self._next = res
-            _simulator._siglist.append(self)
+            if not self._dirty:
+                self._dirty = True
+                siglist = self._siglist
+                if siglist is None:
+                    siglist = _simulator._siglist
+                siglist.append(self)
 
     def toVerilog(self):
         lines = []
@@ -352,4 +357,9 @@ class _TristateDriver(_Signal):
             # restore original value to cater for intbv handler
             self._next = self._sig._orival
             self._setNextVal(val)
-        _simulator._siglist.append(self)
+        if not self._dirty:
+            self._dirty = True
+            siglist = self._siglist
+            if siglist is None:
+                siglist = _simulator._siglist
+            siglist.append(self)
@@ -32,8 +32,7 @@ from ._simulator import _simulator
 from ._intbv import intbv
 from ._bin import bin
 from .numeric._bitarray import bitarray
-
-_schedule = _simulator._futureEvents.append
+from .numeric._sintba import sintba
 
 
 def _isListOfSigs(obj):
@@ -49,6 +48,11 @@ def _isListOfSigs(obj):
 
 class _WaiterList(list):
 
+    # Incremented each time the list is emptied to resume its waiters.
+    # Waiters that wait on several lists compare it with the value they
+    # saw when they registered, to find out whether they were triggered.
+    epoch = 0
+
     def purge(self):
         if self:
             self[:] = [w for w in self if not w.hasRun]
@@ -94,7 +98,21 @@ def Signal(val=None, delay=None):
             raise TypeError("Signal: delay should be >= 0")
         return _DelayedSignal(val, delay)
     else:
-        return _Signal(val)
+        return _signalClass(val)(val)
+
+
+def _signalClass(val):
+    """ Return the signal class that is specialized for the type of val """
+    if isinstance(val, bool):
+        return _BoolSignal
+    elif isinstance(val, int):
+        return _IntSignal
+    elif isinstance(val, (intbv, bitarray)):
+        return _VectorSignal
+    elif isinstance(val, EnumItemType):
+        return _EnumSignal
+    else:
+        return _Signal
 
 
 class _Signal(object):
@@ -112,7 +130,7 @@ class _Signal(object):
                  '_setNextVal', '_copyVal2Next', '_printVcd',
                  '_driven', '_read', '_name', '_used', '_inList',
                  '_waiter', 'toVHDL', 'toVerilog', '_slicesigs',
-                 '_numeric', '_assign'
+                 '_numeric', '_assign', '_dirty', '_siglist'
                  )
 
     def __init__(self, val=None):
@@ -183,6 +201,8 @@ class _Signal(object):
         self._slicesigs = []
         self._tracing = 0
         self._assign = None
+        self._dirty = False
+        self._siglist = None
         _simulator._signals.append(self)
 
     def _clear(self):
@@ -191,6 +211,7 @@ class _Signal(object):
         del self._negedgeWaiters[:]
         self._val = deepcopy(self._init)
         self._next = deepcopy(self._init)
+        self._dirty = False
         self._name = self._read = self._driven = None
         self._numeric = True
         for s in self._slicesigs:
@@ -199,14 +220,23 @@ class _Signal(object):
     def _update(self):
         val, next = self._val, self._next
         if val != next:
-            waiters = self._eventWaiters[:]
-            del self._eventWaiters[:]
+            wl = self._eventWaiters
+            waiters = wl[:]
+            if wl:
+                del wl[:]
+                wl.epoch += 1
             if not val and next:
-                waiters.extend(self._posedgeWaiters[:])
-                del self._posedgeWaiters[:]
+                wl = self._posedgeWaiters
+                if wl:
+                    waiters.extend(wl)
+                    del wl[:]
+                    wl.epoch += 1
             elif not next and val:
-                waiters.extend(self._negedgeWaiters[:])
-                del self._negedgeWaiters[:]
+                wl = self._negedgeWaiters
+                if wl:
+                    waiters.extend(wl)
+                    del wl[:]
+                    wl.epoch += 1
             if next is None:
                 self._val = None
             elif isinstance(val, (intbv, bitarray)):
@@ -228,9 +258,18 @@ class _Signal(object):
         return copy(self._val)
 
     # support for the 'next' attribute
+    # A signal is put in the siglist of the context that owns it, or of
+    # the active one when no simulation owns it, at most once per delta
+    # cycle: the _dirty flag is set when it is scheduled and reset by the
+    # simulation loop right before _update is called.
     @property
     def next(self):
-        _simulator._siglist.append(self)
+        if not self._dirty:
+            self._dirty = True
+            siglist = self._siglist
+            if siglist is None:
+                siglist = _simulator._siglist
+            siglist.append(self)
         return self._next
 
     @next.setter
@@ -238,7 +277,13 @@ class _Signal(object):
         if isinstance(val, _Signal):
             val = val._val
         self._setNextVal(val)
-        _simulator._siglist.append(self)
+        # writing back the current value doesn't require an update
+        if not self._dirty and self._next != self._val:
+            self._dirty = True
+            siglist = self._siglist
+            if siglist is None:
+                siglist = _simulator._siglist
+            siglist.append(self)
 
     # support for the 'posedge' attribute
     @property
@@ -311,11 +356,12 @@ class _Signal(object):
 
     # set next methods
     def _setNextBool(self, val):
-        if isinstance(val, intbv):
-            val = val._val
-        if val not in (0, 1):
-            raise ValueError("Expected boolean value, got %s (%s)" %
-                             (repr(val), type(val)))
+        if val.__class__ is not bool:
+            if isinstance(val, intbv):
+                val = val._val
+            if val not in (0, 1):
+                raise ValueError("Expected boolean value, got %s (%s)" %
+                                 (repr(val), type(val)))
         self._next = val
 
     def _setNextInt(self, val):
@@ -334,8 +380,22 @@ class _Signal(object):
         self._next._handleBounds()
 
     def _setNextBitArray(self, val):
+        # the next value is kept in the format of the signal, in place
+        next = self._next
+        if val.__class__ is self._type:
+            # resize as the constructor does for a value of the same type
+            if val._high == next._high and val._low == next._low:
+                next._val = val._val
+            else:
+                next._resize(val)
+            next._wrap()
+            return
+        if val.__class__ is int and isinstance(next, sintba) and \
+                self._min <= val < self._max:
+            next._val = val
+            return
         try:
-            self._next = self._type(val, self._init)
+            next._val = self._type(val, self._init)._val
         except Exception as excpt:
             raise TypeError("Not valid type for %s: %s\n%s" %
                             (type(self._init), type(val), excpt))
@@ -541,35 +601,36 @@ class _Signal(object):
         return self._val.__index__()
 
     # comparisons
+    # these don't modify the value, so they don't need a copy of it
     def __eq__(self, other):
         if isinstance(other, _Signal):
             return self._val == other._val
-        return self.val == other
+        return self._val == other
 
     def __ne__(self, other):
         if isinstance(other, _Signal):
             return self._val != other._val
-        return self.val != other
+        return self._val != other
 
     def __lt__(self, other):
         if isinstance(other, _Signal):
             return self._val < other._val
-        return self.val < other
+        return self._val < other
 
     def __le__(self, other):
         if isinstance(other, _Signal):
             return self._val <= other._val
-        return self.val <= other
+        return self._val <= other
 
     def __gt__(self, other):
         if isinstance(other, _Signal):
             return self._val > other._val
-        return self.val > other
+        return self._val > other
 
     def __ge__(self, other):
         if isinstance(other, _Signal):
             return self._val >= other._val
-        return self.val >= other
+        return self._val >= other
 
     # method lookup delegation
     def __getattr__(self, attr):
@@ -628,6 +689,151 @@ class _Signal(object):
         self.toVerilog = toVerilog
 
 
+# Signals with a value of a known type, as returned by the Signal factory.
+# Their _update methods rely on the type to skip the type dispatch and the
+# generic edge detection of _Signal._update. The _setNextVal method is
+# specialized in _Signal.__init__ already. Immutable values are returned
+# by the val property as they are, mutable ones as a copy.
+
+class _BoolSignal(_Signal):
+    __slots__ = ()
+
+    @property
+    def val(self):
+        return self._val
+
+    def _update(self):
+        next = self._next
+        if self._val == next:
+            return []
+        wl = self._eventWaiters
+        waiters = wl[:]
+        if wl:
+            del wl[:]
+            wl.epoch += 1
+        # each change of a bool is an edge
+        wl = self._posedgeWaiters if next else self._negedgeWaiters
+        if wl:
+            waiters.extend(wl)
+            del wl[:]
+            wl.epoch += 1
+        self._val = bool(next)
+        if self._tracing:
+            self._printVcd()
+        return waiters
+
+
+class _IntSignal(_Signal):
+    __slots__ = ()
+
+    @property
+    def val(self):
+        return self._val
+
+    def _update(self):
+        val, next = self._val, self._next
+        if val == next:
+            return []
+        wl = self._eventWaiters
+        waiters = wl[:]
+        if wl:
+            del wl[:]
+            wl.epoch += 1
+        if not val:
+            wl = self._posedgeWaiters
+            if next and wl:
+                waiters.extend(wl)
+                del wl[:]
+                wl.epoch += 1
+        elif not next:
+            wl = self._negedgeWaiters
+            if wl:
+                waiters.extend(wl)
+                del wl[:]
+                wl.epoch += 1
+        self._val = next
+        if self._tracing:
+            self._printVcd()
+        return waiters
+
+
+class _VectorSignal(_Signal):
+    """ Signal with an intbv, modbv or bitarray value.
+
+    The value objects are updated in place, and are compared by their
+    integer values.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def val(self):
+        return self._val.__copy__()
+
+    # next and current value have the same format
+    @_Signal.next.setter
+    def next(self, val):
+        if isinstance(val, _Signal):
+            val = val._val
+        self._setNextVal(val)
+        if not self._dirty and self._next._val != self._val._val:
+            self._dirty = True
+            siglist = self._siglist
+            if siglist is None:
+                siglist = _simulator._siglist
+            siglist.append(self)
+
+    def _update(self):
+        val, next = self._val._val, self._next._val
+        if val == next:
+            return []
+        wl = self._eventWaiters
+        waiters = wl[:]
+        if wl:
+            del wl[:]
+            wl.epoch += 1
+        if not val:
+            wl = self._posedgeWaiters
+            if next and wl:
+                waiters.extend(wl)
+                del wl[:]
+                wl.epoch += 1
+        elif not next:
+            wl = self._negedgeWaiters
+            if wl:
+                waiters.extend(wl)
+                del wl[:]
+                wl.epoch += 1
+        self._val._val = next
+        if self._tracing:
+            self._printVcd()
+        return waiters
+
+
+class _EnumSignal(_Signal):
+    __slots__ = ()
+
+    @property
+    def val(self):
+        return self._val
+
+    def _update(self):
+        next = self._next
+        if self._val == next:
+            return []
+        wl = self._eventWaiters
+        waiters = wl[:]
+        if wl:
+            del wl[:]
+            wl.epoch += 1
+        # enum items are always true, so there are no edges
+        self._val = next
+        if self._tracing:
+            self._printVcd()
+        return waiters
+
+
 class _DelayedSignal(_Signal):
     __slots__ = ('_nextZ', '_delay', '_timeStamp',
                  )
@@ -645,24 +851,50 @@ class _DelayedSignal(_Signal):
         self._timeStamp = 0
 
     def _update(self):
-        if self._next != self._nextZ:
+        # mutable next values are updated in place, so keep a copy
+        next = copy(self._next)
+        if next != self._nextZ:
             self._timeStamp = _simulator._time
-        self._nextZ = self._next
+        self._nextZ = next
         t = _simulator._time + self._delay
-        _schedule((t, _SignalWrap(self, self._next, self._timeStamp)))
+        _simulator._futureEvents.append(
+            (t, _SignalWrap(self, next, self._timeStamp)))
         return []
 
+    # an unchanged next value still has to be scheduled, as it can
+    # cancel a pending transition
+    @_Signal.next.setter
+    def next(self, val):
+        if isinstance(val, _Signal):
+            val = val._val
+        self._setNextVal(val)
+        if not self._dirty:
+            self._dirty = True
+            siglist = self._siglist
+            if siglist is None:
+                siglist = _simulator._siglist
+            siglist.append(self)
+
     def _apply(self, next, timeStamp):
         val = self._val
         if timeStamp == self._timeStamp and val != next:
-            waiters = self._eventWaiters[:]
-            del self._eventWaiters[:]
+            wl = self._eventWaiters
+            waiters = wl[:]
+            if wl:
+                del wl[:]
+                wl.epoch += 1
             if not val and next:
-                waiters.extend(self._posedgeWaiters[:])
-                del self._posedgeWaiters[:]
+                wl = self._posedgeWaiters
+                if wl:
+                    waiters.extend(wl)
+                    del wl[:]
+                    wl.epoch += 1
             elif not next and val:
-                waiters.extend(self._negedgeWaiters[:])
-                del self._negedgeWaiters[:]
+                wl = self._negedgeWaiters
+                if wl:
+                    waiters.extend(wl)
+                    del wl[:]
+                    wl.epoch += 1
             self._val = copy(next)
             if self._tracing:
                 self._printVcd()
@@ -0,0 +1,586 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module that provides the SignalArray and SparseSignalArray classes.
+
+A SignalArray models a memory, as a list of signals does, but it keeps the
+values of its elements in a compact array instead of in a signal object
+per element. Indexing a SignalArray returns a view of an element, which
+can be used as a signal: its value can be read, and its next value can be
+set and waited for. A SparseSignalArray only stores the values of the
+elements that were written, for memories with large address spaces.
+
+"""
+import operator
+from array import array
+
+from ._bin import bin
+from ._enum import EnumItemType
+from ._intbv import intbv
+from ._Signal import (Signal, _Signal, _WaiterList, _PosedgeWaiterList,
+                      _NegedgeWaiterList)
+from ._simulator import _simulator
+
+
+class _error:
+    pass
+_error.Size = "SignalArray: size should be > 0"
+_error.InitLength = "SignalArray: expected %d initial values, got %d"
+_error.Type = "SignalArray: unsupported value type %s"
+_error.Default = "SparseSignalArray: default should be a single value"
+
+
+def _typecode(val):
+    """ Return the typecode of an array that can hold the values of val,
+    or None when the values should be kept in a list.
+
+    """
+    if isinstance(val, bool):
+        return 'B'
+    if isinstance(val, intbv):
+        lo, hi = val._min, val._max
+        if lo is None or hi is None:
+            return None
+        if lo >= 0 and hi <= 1 << 64:
+            return 'Q'
+        if lo >= -(1 << 63) and hi <= 1 << 63:
+            return 'q'
+    return None
+
+
+class SignalArray(object):
+
+    """ Array of signals, with a compact storage of their values.
+
+    The elements hold values of type bool, int, intbv or enum.
+
+    """
+
+    __slots__ = ('_vals', '_depth', '_init', '_fill', '_code', '_type',
+                 '_template',
+                 '_nrbits', '_min', '_max', '_check', '_value', '_pending',
+                 '_dirty', '_eventWaiters', '_indexWaiters', '_tracing',
+                 '_codes', '_name', '_read', '_driven', '_used', '_siglist'
+                 )
+
+    def __init__(self, n, init):
+        """ Construct a signal array.
+
+        n -- number of elements
+        init -- initial value of the elements, or a sequence with the
+                initial value of each element
+
+        """
+        if n <= 0:
+            raise ValueError(_error.Size)
+        if isinstance(init, (list, tuple)):
+            if len(init) != n:
+                raise ValueError(_error.InitLength % (n, len(init)))
+            template = init[0]
+        else:
+            template = init
+        self._min = self._max = None
+        if isinstance(template, bool):
+            self._type = bool
+            self._check = self._checkBool
+            self._value = bool
+            self._nrbits = 1
+        elif isinstance(template, int):
+            self._type = int
+            self._check = self._checkInt
+            self._value = int
+            self._nrbits = 0
+        elif isinstance(template, intbv):
+            self._type = intbv
+            self._check = self._checkIntbv
+            self._value = self._intbv
+            self._nrbits = template._nrbits
+            self._min = template._min
+            self._max = template._max
+        elif isinstance(template, EnumItemType):
+            self._type = type(template)
+            self._check = self._checkEnum
+            self._value = self._enum
+            self._nrbits = template._nrbits
+        else:
+            raise TypeError(_error.Type % type(template))
+        # a value of the element format, to check and make element values
+        self._template = template.__copy__() if self._type is intbv \
+            else template
+        self._code = _typecode(template)
+        if isinstance(init, (list, tuple)):
+            self._fill = None
+            self._init = self._storage([self._check(v) for v in init])
+        else:
+            self._fill = self._check(init)
+            self._init = None
+        self._depth = n
+        self._vals = self._initVals(n)
+        self._pending = {}
+        self._dirty = False
+        self._eventWaiters = _WaiterList()
+        self._indexWaiters = {}
+        self._tracing = 0
+        self._codes = None
+        self._name = self._read = self._driven = None
+        self._used = False
+        self._siglist = None
+        _simulator._signals.append(self)
+
+    def _storage(self, vals):
+        if self._code is None:
+            return list(vals)
+        return array(self._code, vals)
+
+    def _initVals(self, n):
+        if self._init is not None:
+            return self._init[:]
+        if self._code is None:
+            return [self._fill] * n
+        return array(self._code, [self._fill]) * n
+
+    def _clear(self):
+        del self._eventWaiters[:]
+        self._indexWaiters.clear()
+        self._vals = self._initVals(self._depth)
+        self._pending = {}
+        self._dirty = False
+        self._name = self._read = self._driven = None
+
+    # values are stored as bools, ints or enum items
+
+    def _checkBool(self, val):
+        if isinstance(val, intbv):
+            val = val._val
+        if val not in (0, 1):
+            raise ValueError("Expected boolean value, got %s (%s)" %
+                             (repr(val), type(val)))
+        return val
+
+    def _checkInt(self, val):
+        if isinstance(val, intbv):
+            val = val._val
+        elif not isinstance(val, int):
+            raise TypeError("Expected int or intbv, got %s" % type(val))
+        return val
+
+    def _checkIntbv(self, val):
+        if isinstance(val, intbv):
+            val = val._val
+        elif not isinstance(val, int):
+            raise TypeError("Expected int or intbv, got %s" % type(val))
+        # bound checks, or wrap around for modbv
+        t = self._template
+        t._val = val
+        t._handleBounds()
+        return t._val
+
+    def _checkEnum(self, val):
+        if not isinstance(val, self._type):
+            raise TypeError("Expected %s, got %s" % (self._type, type(val)))
+        return val
+
+    def _intbv(self, val):
+        v = self._template.__copy__()
+        v._val = val
+        return v
+
+    def _enum(self, val):
+        return val
+
+    def __len__(self):
+        return self._depth
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [_SignalArrayItem(self, i)
+                    for i in range(*key.indices(self._depth))]
+        i = operator.index(key)
+        n = self._depth
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("SignalArray index out of range")
+        return _SignalArrayItem(self, i)
+
+    def __iter__(self):
+        for i in range(self._depth):
+            yield _SignalArrayItem(self, i)
+
+    # index and slice assignment not supported
+    def __setitem__(self, key, val):
+        raise TypeError("SignalArray object doesn't support item/slice "
+                        "assignment")
+
+    def __hash__(self):
+        raise TypeError("SignalArray objects are unhashable")
+
+    def __repr__(self):
+        return "SignalArray(%d, %r)" % (len(self), self._template)
+
+    # support for the 'val' attribute
+    @property
+    def val(self):
+        """ List of the current values of the elements """
+        value = self._value
+        return [value(v) for v in self._vals]
+
+    # next values, scheduled per element
+
+    def _setNext(self, i, val):
+        if isinstance(val, _Signal):
+            val = val._val
+        self._pending[i] = self._check(val)
+        if not self._dirty:
+            self._dirty = True
+            siglist = self._siglist
+            if siglist is None:
+                siglist = _simulator._siglist
+            siglist.append(self)
+
+    def _getNext(self, i):
+        pending = self._pending
+        if i in pending:
+            val = pending[i]
+        else:
+            val = self._vals[i]
+        if self._type is intbv:
+            # an object that can be modified in place
+            if val.__class__ is int:
+                val = self._intbv(val)
+        else:
+            val = self._value(val)
+        pending[i] = val
+        if not self._dirty:
+            self._dirty = True
+            siglist = self._siglist
+            if siglist is None:
+                siglist = _simulator._siglist
+            siglist.append(self)
+        return val
+
+    def _nextInit(self):
+        """ Schedule the initial values as the next values """
+        vals = self._vals
+        if self._init is None:
+            fill = self._fill
+            pending = dict((i, fill) for i, v in enumerate(vals)
+                           if v != fill)
+        else:
+            pending = dict((i, v) for i, v in enumerate(self._init)
+                           if vals[i] != v)
+        self._pending = pending
+        if pending and not self._dirty:
+            self._dirty = True
+            siglist = self._siglist
+            if siglist is None:
+                siglist = _simulator._siglist
+            siglist.append(self)
+
+    def _waitersAt(self, i):
+        """ Return the event, posedge and negedge waiter lists of an
+        element.
+
+        """
+        wls = self._indexWaiters.get(i)
+        if wls is None:
+            item = _SignalArrayItem(self, i)
+            wls = self._indexWaiters[i] = (_WaiterList(),
+                                           _PosedgeWaiterList(item),
+                                           _NegedgeWaiterList(item))
+        return wls
+
+    def _update(self):
+        pending = self._pending
+        self._pending = {}
+        vals = self._vals
+        vector = self._type is intbv
+        indexWaiters = self._indexWaiters
+        waiters = []
+        changed = False
+        for i, next in pending.items():
+            if vector and next.__class__ is not int:
+                next = next._val
+            val = vals[i]
+            if val == next:
+                continue
+            vals[i] = next
+            changed = True
+            if indexWaiters and i in indexWaiters:
+                ev, pos, neg = indexWaiters[i]
+                for wl in (ev,
+                           pos if not val and next else
+                           neg if not next and val else None):
+                    if wl:
+                        waiters.extend(wl)
+                        del wl[:]
+                        wl.epoch += 1
+            if self._tracing:
+                self._printVcdAt(i)
+        if changed:
+            wl = self._eventWaiters
+            if wl:
+                waiters.extend(wl)
+                del wl[:]
+                wl.epoch += 1
+        return waiters
+
+    # vcd print methods
+    def _printVcdAt(self, i):
+        self._printVcdVal(self._vals[i], self._codes[i])
+
+    def _printVcdVal(self, val, code):
+        if self._type is bool:
+            print("%d%s" % (val, code), file=_simulator._tf)
+        elif self._type is intbv and self._nrbits:
+            print("b%s %s" % (bin(val, self._nrbits), code),
+                  file=_simulator._tf)
+        elif self._type is intbv:
+            print("s%s %s" % (hex(val), code), file=_simulator._tf)
+        else:
+            print("s%s %s" % (str(val), code), file=_simulator._tf)
+
+    def _printVcd(self):
+        for i in range(self._depth):
+            self._printVcdAt(i)
+
+    def _signals(self):
+        """ Return signals with the values of the elements.
+
+        Conversion works on the signals of a memory, so they are made when
+        a SignalArray is converted.
+
+        """
+        value = self._value
+        return [Signal(value(v)) for v in self._vals]
+
+    # checkpoint support
+    def _encode(self, val):
+        if self._type is intbv:
+            return val if val.__class__ is int else val._val
+        if self._type in (bool, int):
+            return val
+        return val._index
+
+    def _decode(self, data):
+        if self._type in (bool, int, intbv):
+            return data
+        t = self._template._type
+        return getattr(t, t._names[data])
+
+    def _getState(self):
+        vals = self._vals
+        if self._type not in (bool, int, intbv):
+            vals = [v._index for v in vals]
+        pending = dict((i, self._encode(v)) for i, v in self._pending.items())
+        return [vals, pending, self._dirty]
+
+    def _setState(self, state):
+        """ Restore a state of _getState, if it fits the array.
+
+        Returns False when it doesn't.
+
+        """
+        vals, pending, dirty = state
+        if isinstance(vals, dict) or len(vals) != self._depth:
+            return False
+        if self._type not in (bool, int, intbv):
+            vals = [self._decode(v) for v in vals]
+        self._vals = self._storage(vals)
+        self._restorePending(pending, dirty)
+        return True
+
+    def _restorePending(self, pending, dirty):
+        self._pending = dict((i, self._decode(v)) for i, v in pending.items())
+        if dirty and not self._dirty:
+            self._dirty = True
+            siglist = self._siglist
+            if siglist is None:
+                siglist = _simulator._siglist
+            siglist.append(self)
+
+
+
+class _SparseValues(dict):
+
+    """ Values of a sparse signal array, keyed by index """
+
+    __slots__ = ('default',)
+
+    def __init__(self, default):
+        dict.__init__(self)
+        self.default = default
+
+    def __missing__(self, i):
+        return self.default
+
+
+class SparseSignalArray(SignalArray):
+
+    """ Signal array that only stores the values of the written elements.
+
+    The other elements hold the default value, so that the storage scales
+    with the number of written elements rather than with the size of the
+    array.
+
+    """
+
+    __slots__ = ()
+
+    def __init__(self, n, default):
+        """ Construct a sparse signal array.
+
+        n -- number of elements
+        default -- value of the elements that were not written
+
+        """
+        if isinstance(default, (list, tuple)):
+            raise TypeError(_error.Default)
+        SignalArray.__init__(self, n, default)
+
+    def _initVals(self, n):
+        return _SparseValues(self._fill)
+
+    # support for the 'val' attribute
+    @property
+    def val(self):
+        """ Dict of the values of the written elements, by index """
+        value = self._value
+        return dict((i, value(v)) for i, v in self._vals.items())
+
+    def _nextInit(self):
+        fill = self._fill
+        pending = dict((i, fill) for i, v in self._vals.items() if v != fill)
+        self._pending = pending
+        if pending and not self._dirty:
+            self._dirty = True
+            siglist = self._siglist
+            if siglist is None:
+                siglist = _simulator._siglist
+            siglist.append(self)
+
+    # vcd print methods: the changes are traced as an address and a value
+    def _printVcdAt(self, i):
+        print("b%s %s" % (bin(i, self._addrBits()), self._codes[0]),
+              file=_simulator._tf)
+        self._printVcdVal(self._vals[i], self._codes[1])
+
+    def _printVcd(self):
+        print("bx %s" % self._codes[0], file=_simulator._tf)
+        self._printVcdVal(self._fill, self._codes[1])
+
+    def _addrBits(self):
+        return (self._depth - 1).bit_length() or 1
+
+    def _signals(self):
+        vals, value = self._vals, self._value
+        return [Signal(value(vals[i])) for i in range(self._depth)]
+
+    # checkpoint support
+    def _getState(self):
+        encode = self._encode
+        vals = dict((i, encode(v)) for i, v in self._vals.items())
+        pending = dict((i, encode(v)) for i, v in self._pending.items())
+        return [vals, pending, self._dirty]
+
+    def _setState(self, state):
+        vals, pending, dirty = state
+        if not isinstance(vals, dict) or \
+                not all(0 <= i < self._depth for i in vals):
+            return False
+        self._vals = self._initVals(self._depth)
+        decode = self._decode
+        self._vals.update((i, decode(v)) for i, v in vals.items())
+        self._restorePending(pending, dirty)
+        return True
+
+
+class _SignalArrayItem(_Signal):
+
+    """ Element of a SignalArray.
+
+    The value, next value and waiters of the element are kept by the
+    array, so that an item is only made to access them.
+
+    """
+
+    __slots__ = ('_array', '_index')
+
+    # fixed attributes of signals
+    _name = None
+    _tracing = 0
+
+    def __init__(self, array, index):
+        self._array = array
+        self._index = index
+
+    @property
+    def _val(self):
+        array = self._array
+        return array._value(array._vals[self._index])
+
+    val = _val
+
+    @property
+    def _next(self):
+        return self._array._getNext(self._index)
+
+    @property
+    def next(self):
+        return self._array._getNext(self._index)
+
+    @next.setter
+    def next(self, val):
+        self._array._setNext(self._index, val)
+
+    @property
+    def _eventWaiters(self):
+        return self._array._waitersAt(self._index)[0]
+
+    @property
+    def _posedgeWaiters(self):
+        return self._array._waitersAt(self._index)[1]
+
+    @property
+    def _negedgeWaiters(self):
+        return self._array._waitersAt(self._index)[2]
+
+    @property
+    def _type(self):
+        return self._array._type
+
+    @property
+    def _init(self):
+        array = self._array
+        if array._init is None:
+            return array._value(array._fill)
+        return array._value(array._init[self._index])
+
+    @property
+    def _nrbits(self):
+        return self._array._nrbits
+
+    @property
+    def _min(self):
+        return self._array._min
+
+    @property
+    def _max(self):
+        return self._array._max
+
+    def __repr__(self):
+        return "Signal(" + repr(self._val) + ")"
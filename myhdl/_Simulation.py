@@ -23,20 +23,34 @@
 
 
 import os
-from operator import itemgetter
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from warnings import warn
 from types import GeneratorType
 
+from ._async import _advance, _until
 from ._Cosimulation import Cosimulation
+from ._checkpoint import _checkpoint, _restore
+from ._clock import Clock
+from ._cycle import _CycleKernel
+from ._fastpath import _compileBlocks
+from ._lanes import _LaneKernel, _LaneValues
 from ._errors import StopSimulation, _SuspendSimulation
 from ._errors import SimulationError
-from ._simulator import _simulator
+from ._profile import _Profile
+from ._stats import _SimulationStats
+from ._simulator import _simulator, _schedulers, _SimulatorContext
 from ._Waiter import _Waiter, _inferWaiter, _SignalTupleWaiter
 from ._util import _flatten, _printExcInfo
 from ._instance import _Instantiator
+from ._levelize import _levelize
+from ._Signal import _Signal, _isListOfSigs
+from ._SignalArray import SignalArray
 
-
-schedule = _simulator._futureEvents.append
+try:
+    from . import _simrunc
+except ImportError:
+    _simrunc = None
 
 
 class _error:
@@ -44,6 +58,18 @@ class _error:
 _error.ArgType = "Inappriopriate argument type"
 _error.MultipleCosim = "Only a single cosimulator argument allowed"
 _error.DuplicatedArg = "Duplicated argument"
+_error.Scheduler = "Unknown scheduler"
+_error.Mode = "Unknown simulation mode"
+_error.Lanes = "Lane simulation requires cycle mode"
+_error.Time = "Time should not be earlier than the current time"
+_error.Steps = "Number of steps should be a non-negative integer"
+
+# number of time steps between purges of stale waiters
+_PURGE_INTERVAL = 32
+
+# number of time steps, or delta cycles in a time step, between checks of
+# the progress callback
+_PROGRESS_INTERVAL = 1024
 
 
 class Simulation(object):
@@ -52,23 +78,98 @@ class Simulation(object):
 
     Methods:
     run -- run a simulation for some duration
+    runc -- same as run, using the compiled kernel when available
+    step -- run a simulation for a number of time steps
+    run_until -- run a simulation up to a time
+    advance -- coroutine that runs a simulation in slices
+    until -- coroutine that runs a simulation until a condition holds
+    checkpoint -- save the simulation state to a file
+    restore -- load the simulation state from a file
 
     """
 
-    def __init__(self, *args):
+    def __init__(self, *args, scheduler='heap', profile=False,
+                 progress=None, progress_interval=1.0, levelize=True,
+                 mode='event', fastpath=False, lanes=None):
         """ Construct a simulation object.
 
         *args -- list of arguments. Each argument is a generator or
                  a nested sequence of generators.
+        scheduler -- future event queue: 'heap' (default) or 'wheel',
+                     a timing wheel for designs whose events mostly
+                     land a few time units ahead
+        profile -- record the number of activations and the execution
+                   time of each instance in the profile attribute
+                   (default: off)
+        progress -- function called with the stats attribute periodically
+                    during runs (default: None)
+        progress_interval -- minimal wall-clock time between progress
+                             calls, in seconds (default: 1.0)
+        levelize -- evaluate networks of always_comb blocks in
+                    topological order (default: on)
+        mode -- 'event' (default) for event-driven simulation, or 'cycle'
+                for cycle-based simulation of fully synchronous designs
+        fastpath -- run the always, always_comb and always_seq blocks that
+                    the converter can analyze as functions specialized
+                    for their signal types (default: off)
+        lanes -- number of lanes to simulate at once in cycle mode; the
+                 lane values are accessed with the lanes attribute, and
+                 require NumPy (default: None)
 
         """
+        if scheduler not in _schedulers:
+            raise SimulationError(_error.Scheduler, repr(scheduler))
+        if mode not in ('event', 'cycle'):
+            raise SimulationError(_error.Mode, repr(mode))
+        if lanes is not None and mode != 'cycle':
+            raise SimulationError(_error.Lanes, repr(mode))
         _simulator._time = 0
         arglist = _flatten(*args)
-        self._waiters, self._cosim = _makeWaiters(arglist)
+        self._arglist = arglist
+        self._fastpath = {}
+        if fastpath:
+            self._fastpath = _compileBlocks(arglist)
+        self._waiters, self._cosim, self._clocks = _makeWaiters(arglist)
+        self._network = self._cycle = self.lanes = None
+        if lanes is not None:
+            # the lane kernel translates the block functions itself
+            self._cycle = _LaneKernel(arglist, self._waiters, lanes)
+            self._waiters = []
+            self.lanes = _LaneValues(self._cycle)
+        elif mode == 'cycle':
+            # the cycle kernel calls the block functions itself
+            self._cycle = _CycleKernel(arglist, self._waiters,
+                                       self._fastpath)
+            self._waiters = []
+        elif levelize:
+            self._network = _levelize(arglist, self._waiters,
+                                      self._fastpath)
+        self.profile = None
+        if profile:
+            self.profile = _Profile(arglist, self._waiters,
+                                    self._cycle or self._network)
         if not self._cosim and _simulator._cosim:
             warn("Cosimulation not registered as Simulation argument")
         self._finished = False
-        del _simulator._futureEvents[:]
+        self._started = False
+        self._stepper = None
+        # the simulation takes over the tracing and cosimulation set up
+        # during elaboration, in a kernel context of its own
+        self._context = context = _SimulatorContext(simulation=True)
+        context._futureEvents = futureEvents = _schedulers[scheduler]()
+        context._cosim = _simulator._cosim
+        context._tracing = _simulator._tracing
+        context._tf = _simulator._tf
+        _simulator._cosim = _simulator._tracing = 0
+        _simulator._tf = None
+        self.stats = _SimulationStats(context, progress, progress_interval)
+        for clock in self._clocks:
+            futureEvents.append((clock.phase, clock))
+        # the simulation owns the signals its blocks refer to, and drops
+        # the updates scheduled during elaboration
+        _ownSignals(arglist, context)
+        for s in _simulator._siglist:
+            s._dirty = False
         del _simulator._siglist[:]
         del _simulator._signals[:]
 
@@ -85,10 +186,24 @@ class Simulation(object):
         # clean up for potential new run with same signals
         for s in _simulator._signals:
             s._clear()
+        for s in _simulator._siglist:
+            s._dirty = False
+        del _simulator._siglist[:]
         self._finished = True
 
-    def runc(self, duration=0, quiet=0):
-        simrunc.run(sim=self, duration=duration, quiet=quiet)
+    def runc(self, duration=None, quiet=0):
+
+        """ Run the simulation for some duration with the compiled kernel.
+
+        Same as run, but the simulation loop is executed by the optional
+        _simrunc extension module. Falls back to run when the extension
+        is not available, and in cycle mode.
+
+        """
+
+        if _simrunc is None or self._cycle is not None:
+            return self.run(duration, quiet)
+        return self._runKernel(_simrunc.run, duration, quiet)
 
     def run(self, duration=None, quiet=0):
 
@@ -99,110 +214,445 @@ class Simulation(object):
 
         """
 
+        kernel = _run if self._cycle is None else self._cycle
+        return self._runKernel(kernel, duration, quiet)
+
+    def step(self, n=1, signals=None):
+
+        """ Run the simulation for a number of time steps.
+
+        The kernel state stays resident between calls, and the run is
+        suspended without an exception. Raises StopSimulation when the
+        simulation ends.
+
+        n -- number of time steps (default: 1)
+        signals -- sequence of signals whose values to return (default:
+                   None)
+
+        Returns the list of the values of signals, or None.
+
+        """
+
+        if not isinstance(n, int) or n < 0:
+            raise SimulationError(_error.Steps, repr(n))
+        self._resume(None, n)
+        if signals is not None:
+            return _values(signals)
+
+    def run_until(self, time, signals=None):
+
+        """ Run the simulation up to a time.
+
+        Same as step, but the run ends at the given simulation time, after
+        the events at that time.
+
+        time -- simulation time at which the run ends
+        signals -- sequence of signals whose values to return (default:
+                   None)
+
+        Returns the list of the values of signals, or None.
+
+        """
+
+        if time < self._context._time:
+            raise SimulationError(_error.Time, repr(time))
+        self._resume(time, None)
+        if signals is not None:
+            return _values(signals)
+
+    def _resume(self, maxTime, maxSteps):
+        if self._finished:
+            raise StopSimulation("Simulation has already finished")
+        self._started = True
+        context = self._context
+        prev = _simulator._activate(context)
+        try:
+            # updates of signals that no simulation owns, scheduled
+            # outside of a simulation run
+            if not prev._simulation and prev._siglist:
+                _simulator._siglist.extend(prev._siglist)
+                del prev._siglist[:]
+            if self._cycle is not None:
+                self._resumeCycle(maxTime, maxSteps)
+                return
+            stepper = self._stepper
+            if stepper is None:
+                exc = []
+                stepper = _stepper(self._waiters, self._cosim, exc,
+                                   self.stats)
+                next(stepper)
+                self._stepper, self._stepExc = stepper, exc
+            self.stats._begin()
+            try:
+                stepper.send((maxTime, maxSteps))
+            except _SuspendSimulation:
+                # raised from a yield, which ends the generator
+                self._stepper = None
+            except Exception as e:
+                self._stepper = None
+                if not (self._stepExc and e is self._stepExc[0]):
+                    self._finalize()
+                raise
+        finally:
+            _simulator._activate(prev)
+            if not prev._simulation:
+                _simulator._time = context._time
+
+    def _resumeCycle(self, maxTime, maxSteps):
+        """ Run the cycle kernel within bounds, as _stepper does """
+        self._cycle.bounds = (maxTime, maxSteps)
+        try:
+            if not self._runActive(self._cycle, None, 1):
+                raise StopSimulation("No more events")
+        finally:
+            self._cycle.bounds = None
+
+    async def advance(self, duration=None, timeslice=None, deltas=None):
+
+        """ Run the simulation for some duration, in slices.
+
+        Coroutine that yields to the asyncio event loop between slices.
+        StopSimulation messages are not printed.
+
+        duration -- specified simulation duration (default: forever)
+        timeslice -- maximal number of time units of a slice
+                     (default: 1000)
+        deltas -- number of delta cycles to aim for in a slice; the
+                  slices are sized from the delta cycles of the previous
+                  one (default: None)
+
+        Returns 1 when the duration has been simulated, and 0 when the
+        simulation ended.
+
+        """
+
+        return await _advance(self, duration, timeslice, deltas)
+
+    async def until(self, trigger, condition=None, timeout=None,
+                    timeslice=None, deltas=None):
+
+        """ Run the simulation until a condition holds, in slices.
+
+        Coroutine that yields to the asyncio event loop between slices.
+        The run stops at the end of the time step in which the condition
+        holds at the trigger. Requires event-driven simulation.
+
+        trigger -- signal, edge or tuple of them, as in a yield statement
+        condition -- function without arguments; when it is None, the
+                     trigger itself is waited for (default: None)
+        timeout -- maximal simulation duration (default: forever)
+        timeslice, deltas -- slice sizes, as in advance
+
+        Returns True when the condition holds, also when it already holds
+        before the run, and False otherwise.
+
+        """
+
+        return await _until(self, trigger, condition, timeout, timeslice,
+                            deltas)
+
+    def _runKernel(self, kernel, duration, quiet):
         # If the simulation is already finished, raise StopSimulation immediately
         # From this point it will propagate to the caller, that can catch it.
         if self._finished:
             raise StopSimulation("Simulation has already finished")
-        waiters = self._waiters
+        self._started = True
+        context = self._context
+        prev = _simulator._activate(context)
+        try:
+            # updates of signals that no simulation owns, scheduled
+            # outside of a simulation run
+            if not prev._simulation and prev._siglist:
+                _simulator._siglist.extend(prev._siglist)
+                del prev._siglist[:]
+            return self._runActive(kernel, duration, quiet)
+        finally:
+            _simulator._activate(prev)
+            # now() reports the time of the last simulation run
+            if not prev._simulation:
+                _simulator._time = context._time
+
+    def checkpoint(self, path):
+
+        """ Save the simulation state to a file.
+
+        The state consists of the simulation time, the signal values, the
+        variables of always_seq blocks and the future events. Only designs
+        of always, always_comb and always_seq blocks and clocks can be
+        checkpointed, as the state of other generators cannot be captured.
+
+        path -- name of the checkpoint file
+
+        """
+
+        _checkpoint(self, path)
+
+    def restore(self, path):
+
+        """ Load the simulation state from a file.
+
+        The simulation should be constructed for the same design as the
+        checkpointed one and should not have run yet. A subsequent run
+        continues from the checkpointed time.
+
+        path -- name of the checkpoint file
+
+        """
+
+        _restore(self, path)
+
+    def _runActive(self, kernel, duration, quiet):
         maxTime = None
         if duration:
             stop = _Waiter(None)
             stop.hasRun = 1
             maxTime = _simulator._time + duration
-            schedule((maxTime, stop))
-        cosim = self._cosim
-        t = _simulator._time
-        actives = {}
+            _simulator._futureEvents.append((maxTime, stop))
         tracing = _simulator._tracing
         tracefile = _simulator._tf
         exc = []
-        _pop = waiters.pop
-        _append = waiters.append
-        _extend = waiters.extend
+        self.stats._begin()
+
+        try:
+            kernel(self._waiters, self._cosim, maxTime, duration, exc,
+                   self.stats)
+
+        except _SuspendSimulation:
+            if not quiet:
+                _printExcInfo()
+            if tracing:
+                tracefile.flush()
+            return 1
+
+        except StopSimulation:
+            if not quiet:
+                _printExcInfo()
+            self._finalize()
+            self._finished = True
+            return 0
+
+        except Exception as e:
+            if tracing:
+                tracefile.flush()
+            # if the exception came from a yield, make sure we can resume
+            if exc and e is exc[0]:
+                pass  # don't finalize
+            else:
+                self._finalize()
+            # now reraise the exception
+            raise
 
-        while 1:
-            try:
 
-                for s in _simulator._siglist:
-                    _extend(s._update())
-                del _simulator._siglist[:]
+def _run(waiters, cosim, maxTime, duration, exc, stats):
+    """ Simulation kernel loop.
 
-                while waiters:
-                    waiter = _pop()
-                    try:
-                        waiter.next(waiters, actives, exc)
-                    except StopIteration:
-                        continue
+    Only returns by raising: StopSimulation when there are no more events,
+    _SuspendSimulation when maxTime is reached, or any exception from the
+    simulated generators. Runs the loop of _stepper up to maxTime, which
+    reports the activity counts to stats. _simrunc.run is the compiled
+    equivalent.
 
-                if cosim:
-                    cosim._get()
-                    if _simulator._siglist or cosim._hasChange:
-                        cosim._put(t)
-                        continue
-                elif _simulator._siglist:
+    """
+    stepper = _stepper(waiters, cosim, exc, stats)
+    next(stepper)
+    stepper.send((maxTime, None))
+    raise _SuspendSimulation("Simulated %s timesteps" % duration)
+
+
+def _stepper(waiters, cosim, exc, stats):
+    """ Resident simulation kernel loop.
+
+    The loop of _run, and of step and run_until. It is sent the bounds of
+    a run, a (maxTime, maxSteps) tuple in which None means no bound, and
+    yields when the next time step would exceed them, so that its state
+    stays resident between runs and a run is suspended without an
+    exception. The activity counts of each run are reported to stats when
+    it yields. Its progress callback is checked every _PROGRESS_INTERVAL
+    time steps, and every _PROGRESS_INTERVAL delta cycles within a time
+    step. Otherwise it only returns by raising: StopSimulation when there
+    are no more events, or any exception from the simulated generators.
+
+    """
+    siglist = _simulator._siglist
+    futureEvents = _simulator._futureEvents
+    actives = {}
+    steps = 0
+    tracing = _simulator._tracing
+    tracefile = _simulator._tf
+    progress = stats._callback is not None
+    _pop = waiters.pop
+    _append = waiters.append
+    _extend = waiters.extend
+    timesteps = deltas = stepdeltas = maxdeltas = updates = resumptions = 0
+    maxTime, maxSteps = yield
+    t = _simulator._time
+    running = True
+
+    try:
+        while 1:
+
+            stepdeltas += 1
+            if progress and not stepdeltas % _PROGRESS_INTERVAL:
+                stats._tick(timesteps, deltas + stepdeltas,
+                            max(maxdeltas, stepdeltas), updates, resumptions)
+
+            updates += len(siglist)
+            for s in siglist:
+                s._dirty = False
+                _extend(s._update())
+            del siglist[:]
+
+            while waiters:
+                waiter = _pop()
+                if waiter.next(waiters, actives, exc):
+                    resumptions += 1
+
+            if cosim:
+                cosim._get()
+                if siglist or cosim._hasChange:
+                    cosim._put(t)
                     continue
+            elif siglist:
+                continue
 
-                if actives:
+            if actives:
+                steps += 1
+                if steps == _PURGE_INTERVAL:
                     for wl in actives.values():
                         wl.purge()
-                    actives = {}
-
-                # at this point it is safe to potentially suspend a simulation
-                if exc:
-                    raise exc[0]
-
-                # future events
-                if _simulator._futureEvents:
-                    if t == maxTime:
-                        raise _SuspendSimulation(
-                            "Simulated %s timesteps" % duration)
-                    _simulator._futureEvents.sort(key=itemgetter(0))
-                    t = _simulator._time = _simulator._futureEvents[0][0]
-                    if tracing:
-                        print("#%s" % t, file=tracefile)
-                    if cosim:
-                        cosim._put(t)
-                    while _simulator._futureEvents:
-                        newt, event = _simulator._futureEvents[0]
-                        if newt == t:
-                            if isinstance(event, _Waiter):
-                                _append(event)
-                            else:
-                                _extend(event.apply())
-                            del _simulator._futureEvents[0]
-                        else:
-                            break
-                else:
-                    raise StopSimulation("No more events")
-
-            except _SuspendSimulation:
-                if not quiet:
-                    _printExcInfo()
+                    actives.clear()
+                    steps = 0
+
+            # at this point it is safe to potentially suspend a simulation
+            if exc:
+                raise exc[0]
+
+            # future events
+            if futureEvents:
+                nextTime = futureEvents.nextTime()
+                if timesteps == maxSteps or \
+                        (maxTime is not None and nextTime > maxTime):
+                    for wl in actives.values():
+                        wl.purge()
+                    if maxTime is not None:
+                        t = _simulator._time = maxTime
+                    stats._update(timesteps, deltas + stepdeltas,
+                                  max(maxdeltas, stepdeltas), updates,
+                                  resumptions)
+                    timesteps = deltas = stepdeltas = maxdeltas = 0
+                    updates = resumptions = 0
+                    running = False
+                    maxTime, maxSteps = yield
+                    running = True
+                    # other runs may have advanced the time
+                    t = _simulator._time
+                    continue
+                t = _simulator._time = nextTime
+                timesteps += 1
+                deltas += stepdeltas
+                if stepdeltas > maxdeltas:
+                    maxdeltas = stepdeltas
+                stepdeltas = 0
+                if progress and not timesteps % _PROGRESS_INTERVAL:
+                    stats._tick(timesteps, deltas, maxdeltas, updates,
+                                resumptions)
                 if tracing:
-                    tracefile.flush()
-                return 1
+                    print("#%s" % t, file=tracefile)
+                if cosim:
+                    cosim._put(t)
+                for event in futureEvents.popEvents(t):
+                    if isinstance(event, _Waiter):
+                        _append(event)
+                    else:
+                        _extend(event.apply())
+            else:
+                raise StopSimulation("No more events")
+    finally:
+        # a suspended generator reported its counts already
+        if running:
+            stats._update(timesteps, deltas + stepdeltas,
+                          max(maxdeltas, stepdeltas), updates, resumptions)
 
-            except StopSimulation:
-                if not quiet:
-                    _printExcInfo()
-                self._finalize()
-                self._finished = True
-                return 0
 
-            except Exception as e:
-                if tracing:
-                    tracefile.flush()
-                # if the exception came from a yield, make sure we can resume
-                if exc and e is exc[0]:
-                    pass  # don't finalize
-                else:
-                    self._finalize()
-                # now reraise the exception
-                raise
+# values that signals don't update in place
+_IMMUTABLE = frozenset((bool, int, str, type(None)))
+
+
+def _values(signals):
+    """ Return a list of copies of the values of signals """
+    values = [s._val for s in signals]
+    for i, val in enumerate(values):
+        if val.__class__ not in _IMMUTABLE:
+            values[i] = copy(val)
+    return values
+
+
+def run_many(func, params, processes=False, max_workers=None):
+    """ Run independent simulations concurrently.
+
+    Each simulation has a kernel context of its own, so simulations can
+    run in parallel threads.
+
+    func -- function that elaborates and runs a simulation for a
+            parameter, and returns its result
+    params -- iterable of parameters
+    processes -- use a pool of processes instead of threads (default: off);
+                 func, the parameters and the results should be picklable
+    max_workers -- maximum number of workers (default: pool default)
+
+    Returns the list of results, in the order of params.
+
+    """
+    if processes:
+        executor = ProcessPoolExecutor(max_workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers)
+    with executor:
+        return list(executor.map(func, params))
+
+
+def _ownSignals(arglist, context):
+    """ Make context the owner of the signals that arglist refers to.
+
+    The signals are found in the symdicts of the instances, the locals of
+    the generators, the clocks and the shadow signals. The signals keep
+    the siglist of their owner, in which their updates are scheduled, and
+    an update that another simulation left scheduled is dropped.
+
+    """
+    siglist = context._siglist
+
+    def own(s):
+        prev = s._siglist
+        if prev is not siglist:
+            if prev is not None and s._dirty:
+                prev.remove(s)
+                s._dirty = False
+            s._siglist = siglist
+
+    for arg in arglist:
+        if isinstance(arg, _Instantiator):
+            objs = arg.symdict.values()
+        elif isinstance(arg, GeneratorType) and arg.gi_frame is not None:
+            objs = arg.gi_frame.f_locals.values()
+        elif isinstance(arg, Clock):
+            objs = (arg.sig,)
+        else:
+            objs = ()
+        for obj in objs:
+            if isinstance(obj, (_Signal, SignalArray)):
+                own(obj)
+            elif _isListOfSigs(obj):
+                for s in obj:
+                    own(s)
+    for sig in _simulator._signals:
+        if hasattr(sig, '_waiter'):
+            own(sig)
 
 
 def _makeWaiters(arglist):
     waiters = []
+    clocks = []
     ids = set()
     cosim = None
     for arg in arglist:
@@ -217,6 +667,8 @@ def _makeWaiters(arglist):
             waiters.append(_SignalTupleWaiter(cosim._waiter()))
         elif isinstance(arg, _Waiter):
             waiters.append(arg)
+        elif isinstance(arg, Clock):
+            clocks.append(arg)
         elif arg is True:
             pass
         else:
@@ -228,4 +680,4 @@ def _makeWaiters(arglist):
     for sig in _simulator._signals:
         if hasattr(sig, '_waiter'):
             waiters.append(sig._waiter)
-    return waiters, cosim
+    return waiters, cosim, clocks
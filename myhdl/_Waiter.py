@@ -24,18 +24,22 @@
 from types import GeneratorType
 
 import ast
-import inspect
 
 
-from ._util import _dedent
+from ._elabcache import elaborationCache
+from ._util import _getSource
 from ._delay import delay
 from ._join import join
 from ._Signal import _Signal, _WaiterList, posedge, negedge
+from ._SignalArray import SignalArray
 from ._simulator import _simulator
 from ._compat import ast_parse
 
 
-schedule = _simulator._futureEvents.append
+# status codes returned by the next method of waiters
+_STALE = 0     # stale trigger: the generator was not resumed
+_RESUMED = 1   # the generator was resumed and waits again
+_DONE = 2      # the generator is exhausted
 
 
 class _Waiter(object):
@@ -52,24 +56,24 @@ class _Waiter(object):
     def next(self, waiters, actives, exc):
 
         if self.hasRun:
-            raise StopIteration
+            return _STALE
 
         if self.semaphore:
             self.semaphore -= 1
-            raise StopIteration
+            return _STALE
 
         if self.nrTriggers == 1:
             clone = self
         else:
             self.hasRun = 1
-            clone = _Waiter(self.generator, self.caller)
+            clone = self.__class__(self.generator, self.caller)
 
         try:
             clause = next(self.generator)
         except StopIteration:
             if self.caller:
                 waiters.append(self.caller)
-            raise  # again
+            return _DONE
 
         if isinstance(clause, _WaiterList):
             clauses = (clause,)
@@ -91,14 +95,14 @@ class _Waiter(object):
                 clause.append(clone)
                 if nr > 1:
                     actives[id(clause)] = clause
-            elif isinstance(clause, _Signal):
+            elif isinstance(clause, (_Signal, SignalArray)):
                 wl = clause._eventWaiters
                 wl.append(clone)
                 if nr > 1:
                     actives[id(wl)] = wl
             elif isinstance(clause, delay):
                 t = _simulator._time
-                schedule((t + clause._time, clone))
+                _simulator._futureEvents.append((t + clause._time, clone))
             elif isinstance(clause, GeneratorType):
                 waiters.append(_Waiter(clause, clone))
             elif isinstance(clause, _Instantiator):
@@ -114,6 +118,7 @@ class _Waiter(object):
             else:
                 raise TypeError("yield clause %s has type %s" %
                                 (repr(clause), type(clause)))
+        return _RESUMED
 
 
 class _DelayWaiter(_Waiter):
@@ -124,8 +129,13 @@ class _DelayWaiter(_Waiter):
         self.generator = generator
 
     def next(self, waiters, actives, exc):
-        clause = next(self.generator)
-        schedule((_simulator._time + clause._time, self))
+        try:
+            clause = next(self.generator)
+        except StopIteration:
+            return _DONE
+        _simulator._futureEvents.append((_simulator._time + clause._time,
+                                         self))
+        return _RESUMED
 
 
 class _EdgeWaiter(_Waiter):
@@ -137,27 +147,107 @@ class _EdgeWaiter(_Waiter):
         self.hasRun = 0
 
     def next(self, waiters, actives, exc):
-        clause = next(self.generator)
+        try:
+            clause = next(self.generator)
+        except StopIteration:
+            return _DONE
         clause.append(self)
+        return _RESUMED
 
 
-class _EdgeTupleWaiter(_Waiter):
+class _TupleWaiter(_Waiter):
 
-    __slots__ = ('generator', 'hasRun')
+    """ Base class of waiters on a tuple of waiter lists.
+
+    The waiter stays registered in its lists across triggers. It records
+    the epoch of each list when it registers: when it is resumed from a
+    list, at least one of them has been emptied since. Otherwise the
+    trigger is stale, e.g. a second list that fired in the same delta
+    cycle. After a resume only the emptied lists are registered again,
+    as long as the generator yields the same clauses. When the clauses
+    change, a new waiter takes over and the stale entries of this one are
+    purged from its lists.
+
+    """
+
+    __slots__ = ('generator', 'hasRun', 'clauses', 'lists', 'epochs')
 
     def __init__(self, generator):
         self.generator = generator
         self.hasRun = 0
+        self.clauses = None
+        self.lists = ()
+        self.epochs = []
+
+    def _waiterLists(self, clauses):
+        raise NotImplementedError
+
+    def _register(self, clauses):
+        # a tuple is kept as is, other sequences are copied
+        self.clauses = clauses = tuple(clauses)
+        self.lists = lists = self._waiterLists(clauses)
+        for wl in lists:
+            wl.append(self)
+        self.epochs = [wl.epoch for wl in lists]
+
+    def _retire(self, actives):
+        self.hasRun = 1
+        for wl in self.lists:
+            actives[id(wl)] = wl
 
     def next(self, waiters, actives, exc):
         if self.hasRun:
-            raise StopIteration
-        clauses = next(self.generator)
-        self.hasRun = 1
-        clone = _EdgeTupleWaiter(self.generator)
-        for clause in clauses:
-            clause.append(clone)
-            actives[id(clause)] = clause
+            return _STALE
+        lists = self.lists
+        if lists:
+            epochs = self.epochs
+            i = 0
+            for wl in lists:
+                if wl.epoch != epochs[i]:
+                    break
+                i += 1
+            else:
+                return _STALE
+        try:
+            clauses = next(self.generator)
+        except StopIteration:
+            self._retire(actives)
+            return _DONE
+        prev = self.clauses
+        if clauses is not prev:
+            if prev is None:
+                self._register(clauses)
+                return _RESUMED
+            same = len(clauses) == len(prev)
+            if same:
+                i = 0
+                for clause in clauses:
+                    if clause is not prev[i]:
+                        same = False
+                        break
+                    i += 1
+            if not same:
+                self._retire(actives)
+                clone = self.__class__(self.generator)
+                clone._register(clauses)
+                return _RESUMED
+        epochs = self.epochs
+        i = 0
+        for wl in lists:
+            epoch = wl.epoch
+            if epoch != epochs[i]:
+                wl.append(self)
+                epochs[i] = epoch
+            i += 1
+        return _RESUMED
+
+
+class _EdgeTupleWaiter(_TupleWaiter):
+
+    __slots__ = ()
+
+    def _waiterLists(self, clauses):
+        return tuple(clauses)
 
 
 class _SignalWaiter(_Waiter):
@@ -169,28 +259,20 @@ class _SignalWaiter(_Waiter):
         self.hasRun = 0
 
     def next(self, waiters, actives, exc):
-        clause = next(self.generator)
+        try:
+            clause = next(self.generator)
+        except StopIteration:
+            return _DONE
         clause._eventWaiters.append(self)
+        return _RESUMED
 
 
-class _SignalTupleWaiter(_Waiter):
+class _SignalTupleWaiter(_TupleWaiter):
 
-    __slots__ = ('generator', 'hasRun')
-
-    def __init__(self, generator):
-        self.generator = generator
-        self.hasRun = 0
+    __slots__ = ()
 
-    def next(self, waiters, actives, exc):
-        if self.hasRun:
-            raise StopIteration
-        clauses = next(self.generator)
-        self.hasRun = 1
-        clone = _SignalTupleWaiter(self.generator)
-        for clause in clauses:
-            wl = clause._eventWaiters
-            wl.append(clone)
-            actives[id(wl)] = wl
+    def _waiterLists(self, clauses):
+        return tuple([clause._eventWaiters for clause in clauses])
 
 
 class _kind(object):
@@ -202,85 +284,100 @@ class _kind(object):
     UNDEFINED = 6
 
 
+# yield clauses per code object
+_yieldCache = {}
+
+
 def _inferWaiter(gen):
     f = gen.gi_frame
-    s = inspect.getsource(f)
-    s = _dedent(s)
-    root = ast_parse(s)
-    root.symdict = f.f_globals.copy()
-    root.symdict.update(f.f_locals)
-    # print ast.dump(root)
-    v = _YieldVisitor(root)
-    v.visit(root)
-    if v.kind == _kind.EDGE_TUPLE:
+    # look up the names of the clauses only, locals first
+    scopes = (f.f_locals, f.f_globals)
+    kind = None
+    for clause in _yieldClauses(f.f_code):
+        clauseKind = _clauseKind(clause, scopes)
+        if not kind:
+            kind = clauseKind
+        elif kind != clauseKind:
+            kind = _kind.UNDEFINED
+    if kind == _kind.EDGE_TUPLE:
         return _EdgeTupleWaiter(gen)
-    if v.kind == _kind.SIGNAL_TUPLE:
+    if kind == _kind.SIGNAL_TUPLE:
         return _SignalTupleWaiter(gen)
-    if v.kind == _kind.DELAY:
+    if kind == _kind.DELAY:
         return _DelayWaiter(gen)
-    if v.kind == _kind.EDGE:
+    if kind == _kind.EDGE:
         return _EdgeWaiter(gen)
-    if v.kind == _kind.SIGNAL:
+    if kind == _kind.SIGNAL:
         return _SignalWaiter(gen)
     # default
     return _Waiter(gen)
 
 
-class _YieldVisitor(ast.NodeVisitor):
-
-    def __init__(self, root):
-        self.kind = None
-        self.root = root
-
-    def visit_Yield(self, node):
-        self.visit(node.value)
-        if not hasattr(node.value, 'kind'):
-            self.kind = _kind.UNDEFINED
-        elif not self.kind:
-            self.kind = node.value.kind
-        elif self.kind != node.value.kind:
-            self.kind = _kind.UNDEFINED
-
-    def visit_Tuple(self, node):
+def _yieldClauses(code):
+    """ Return the yield clauses of the source of code.
+
+    A clause is reduced to what its kind depends on: a name whose object
+    determines the kind, a kind, or a tuple of clauses. The result doesn't
+    depend on a symdict, so that it is cached per code object, and in the
+    elaboration cache when enabled.
+
+    """
+    try:
+        return _yieldCache[code]
+    except KeyError:
+        pass
+    clauses = elaborationCache.get(code, 'yields')
+    if clauses is None:
+        root = ast_parse(_getSource(code)[0])
+        clauses = tuple([_clause(node.value) for node in ast.walk(root)
+                         if isinstance(node, ast.Yield)])
+        elaborationCache.put(code, 'yields', clauses)
+    _yieldCache[code] = clauses
+    return clauses
+
+
+def _clause(node):
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Call):
+        if isinstance(node.func, ast.Name):
+            return node.func.id
+    elif isinstance(node, ast.Attribute):
+        if node.attr in ('posedge', 'negedge'):
+            return _kind.EDGE
+    elif isinstance(node, ast.Tuple):
+        return tuple([_clause(elt) for elt in node.elts])
+    return _kind.UNDEFINED
+
+
+def _clauseKind(clause, scopes):
+    if isinstance(clause, str):
+        obj = None
+        for scope in scopes:
+            if clause in scope:
+                obj = scope[clause]
+                break
+        if isinstance(obj, (_Signal, SignalArray)):
+            return _kind.SIGNAL
+        elif obj is delay:
+            return _kind.DELAY
+        elif obj is posedge or obj is negedge:
+            return _kind.EDGE
+        return _kind.UNDEFINED
+    if isinstance(clause, tuple):
         kind = None
-        for elt in node.elts:
-            self.visit(elt)
-            if not hasattr(elt, 'kind'):
-                kind = _kind.UNDEFINED
-            elif not kind:
-                kind = elt.kind
-            elif kind != elt.kind:
+        for elt in clause:
+            eltKind = _clauseKind(elt, scopes)
+            if not kind:
+                kind = eltKind
+            elif kind != eltKind:
                 kind = _kind.UNDEFINED
         if kind == _kind.SIGNAL:
-            node.kind = _kind.SIGNAL_TUPLE
+            return _kind.SIGNAL_TUPLE
         elif kind == _kind.EDGE:
-            node.kind = _kind.EDGE_TUPLE
-        else:
-            node.kind = _kind.UNDEFINED
-
-    def visit_Call(self, node):
-        fn = node.func
-        if not isinstance(fn, ast.Name):
-            node.kind = _kind.UNDEFINED
-            return
-        self.visit(fn)
-        node.kind = fn.kind
-
-    def visit_Name(self, node):
-        n = node.id
-        node.kind = _kind.UNDEFINED
-        if n in self.root.symdict:
-            obj = self.root.symdict[n]
-            if isinstance(obj, _Signal):
-                node.kind = _kind.SIGNAL
-            elif obj is delay:
-                node.kind = _kind.DELAY
-            elif obj is posedge or obj is negedge:
-                node.kind = _kind.EDGE
-
-    def visit_Attribute(self, node):
-        node.kind = _kind.UNDEFINED
-        if node.attr in ('posedge', 'negedge'):
-            node.kind = _kind.EDGE
+            return _kind.EDGE_TUPLE
+        return _kind.UNDEFINED
+    return clause
+
 
 from ._instance import _Instantiator
@@ -21,10 +21,14 @@
 
 This module provides the following myhdl objects:
 Simulation -- simulation class
+run_many -- function that runs independent simulations concurrently
+Clock -- clock toggled by the simulation kernel
 StopStimulation -- exception that stops a simulation
 now -- function that returns the current time
 Signal -- factory function to model hardware signals
 SignalType -- Signal base class
+SignalArray -- array of signals with a compact storage of their values
+SparseSignalArray -- array of signals that only stores the written values
 ConcatSignal --  factory function that models a concatenation shadow signal
 TristateSignal -- factory function that models a tristate shadow signal
 delay -- callable to model delay in a yield statement
@@ -55,12 +59,14 @@ from ._intbv import intbv
 from ._modbv import modbv
 from ._join import join
 from ._Signal import posedge, negedge, Signal, SignalType
+from ._SignalArray import SignalArray, SparseSignalArray
 from ._ShadowSignal import ConcatSignal
 from ._ShadowSignal import TristateSignal
 from ._simulator import now
 from ._delay import delay
 from ._Cosimulation import Cosimulation
-from ._Simulation import Simulation
+from ._Simulation import Simulation, run_many
+from ._clock import Clock
 from ._misc import instances, downrange
 from ._always_comb import always_comb
 from ._always_seq import always_seq, ResetSignal
@@ -68,6 +74,7 @@ from ._always import always
 from ._instance import instance
 from ._enum import enum, EnumType, EnumItemType
 from ._traceSignals import traceSignals
+from ._elabcache import elaborationCache
 from . import conversion
 from .conversion import toVerilog
 from .conversion import toVHDL
@@ -99,6 +106,8 @@ __all__ = ["bin",
            "negedge",
            "Signal",
            "SignalType",
+           "SignalArray",
+           "SparseSignalArray",
            "ConcatSignal",
            "TristateSignal",
            "now",
@@ -107,6 +116,8 @@ __all__ = ["bin",
            "StopSimulation",
            "Cosimulation",
            "Simulation",
+           "run_many",
+           "Clock",
            "instances",
            "instance",
            "always_comb",
@@ -117,6 +128,7 @@ __all__ = ["bin",
            "EnumType",
            "EnumItemType",
            "traceSignals",
+           "elaborationCache",
            "toVerilog",
            "toVHDL",
            "conversion",
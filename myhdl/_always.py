@@ -24,6 +24,7 @@ from ._errors import AlwaysError
 from ._util import _isGenFunc
 from ._delay import delay
 from ._Signal import _Signal, _WaiterList
+from ._SignalArray import SignalArray
 from ._Waiter import _Waiter, _SignalWaiter, _SignalTupleWaiter, \
                           _DelayWaiter, _EdgeWaiter, _EdgeTupleWaiter
 from ._instance import _Instantiator
@@ -33,7 +34,8 @@ class _error:
     pass
 
 
-_error.DecArgType = "decorator argument should be a Signal, edge, or delay"
+_error.DecArgType = "decorator argument should be a Signal, SignalArray, " \
+    "edge, or delay"
 _error.ArgType = "decorated object should be a classic" \
     " (non-generator) function"
 _error.NrOfArgs = "decorated function should not have arguments"
@@ -42,7 +44,7 @@ _error.DecNrOfArgs = "decorator should have arguments"
 
 def always(*args):
     for arg in args:
-        if isinstance(arg, _Signal):
+        if isinstance(arg, (_Signal, SignalArray)):
             arg._read = True
             arg._used = True
         elif isinstance(arg, _WaiterList):
@@ -76,13 +78,16 @@ class _Always(_Instantiator):
     def _waiter(self):
         # infer appropriate waiter class
         # first infer base type of arguments
-        for t in (_Signal, _WaiterList, delay):
+        # signal arrays are waited for like signals
+        for t in ((_Signal, SignalArray), _WaiterList, delay):
             if isinstance(self.senslist[0], t):
                 bt = t
         for s in self.senslist[1:]:
             if not isinstance(s, bt):
                 bt = None
                 break
+        if bt == (_Signal, SignalArray):
+            bt = _Signal
         # now set waiter class
         W = _Waiter
         if bt is delay:
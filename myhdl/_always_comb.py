@@ -22,6 +22,7 @@ from types import FunctionType
 
 from ._errors import AlwaysCombError
 from ._Signal import _Signal, _isListOfSigs
+from ._SignalArray import SignalArray
 from ._util import _isGenFunc
 from ._always import _Always
 
@@ -65,7 +66,7 @@ class _AlwaysComb(_Always):
 
         for n in self.inputs:
             s = self.symdict[n]
-            if isinstance(s, _Signal):
+            if isinstance(s, (_Signal, SignalArray)):
                 senslist.append(s)
             elif _isListOfSigs(s):
                 senslist.extend(s)
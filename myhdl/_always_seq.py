@@ -23,7 +23,8 @@ from types import FunctionType
 from ._errors import AlwaysError
 from ._intbv import intbv
 from ._util import _isGenFunc
-from ._Signal import _Signal, _WaiterList, _isListOfSigs
+from ._Signal import _Signal, _BoolSignal, _WaiterList, _isListOfSigs
+from ._SignalArray import SignalArray
 from ._always import _Always
 
 # evacuate this later
@@ -44,7 +45,7 @@ _error.EmbeddedFunction = "embedded functions in always_seq function" \
     " not supported"
 
 
-class ResetSignal(_Signal):
+class ResetSignal(_BoolSignal):
     def __init__(self, val, active, asynchronous):
         """ Construct a ResetSignal.
 
@@ -105,10 +106,13 @@ class _AlwaysSeq(_Always):
 
         sigregs = self.sigregs = []
         varregs = self.varregs = []
+        arrayregs = self.arrayregs = []
         for n in self.outputs:
             reg = self.symdict[n]
             if isinstance(reg, _Signal):
                 sigregs.append(reg)
+            elif isinstance(reg, SignalArray):
+                arrayregs.append(reg)
             elif isinstance(reg, intbv):
                 varregs.append((n, reg, int(reg)))
             else:
@@ -119,6 +123,8 @@ class _AlwaysSeq(_Always):
     def reset_sigs(self):
         for s in self.sigregs:
             s.next = s._init
+        for a in self.arrayregs:
+            a._nextInit()
 
     def reset_vars(self):
         for v in self.varregs:
@@ -0,0 +1,141 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" asyncio driver of simulations.
+
+The coroutines run a simulation in slices, and yield to the event loop
+between slices, so that a thread can interleave simulations with I/O.
+Each slice is a run of the kernel for a number of time units: a fixed
+number, or a number sized from the delta cycles of the previous slice to
+bound the work of a slice.
+
+"""
+
+import asyncio
+
+from ._errors import SimulationError, _SuspendSimulation
+from ._Waiter import _Waiter
+
+
+class _error:
+    pass
+_error.Slice = "Time slice should be a positive integer"
+_error.Deltas = "Number of delta cycles should be a positive integer"
+_error.Cycle = "Waiting for a trigger requires event-driven simulation"
+
+# default number of time units of a slice
+_TIMESLICE = 1000
+
+
+def _positive(n, msg):
+    if n is not None and (not isinstance(n, int) or n < 1):
+        raise SimulationError(msg, repr(n))
+
+
+class _Slicer(object):
+
+    """ Sizes the slices of a simulation run """
+
+    def __init__(self, sim, timeslice, deltas):
+        _positive(timeslice, _error.Slice)
+        _positive(deltas, _error.Deltas)
+        self.stats = sim.stats
+        self.deltas = deltas
+        self.limit = timeslice
+        if timeslice is None:
+            timeslice = _TIMESLICE if deltas is None else 1
+        self.size = timeslice
+
+    def run(self, sim, end):
+        """ Run a slice of at most end - now time units. Returns 0 when
+        the simulation ended, and 1 otherwise.
+
+        """
+        context = sim._context
+        n = self.size
+        if end is not None:
+            n = min(n, end - context._time)
+        start, deltas = context._time, self.stats.delta_cycles
+        result = sim.run(n, quiet=1)
+        if self.deltas is not None:
+            # aim for the delta cycle budget with the latest rate
+            used = self.stats.delta_cycles - deltas
+            elapsed = max(context._time - start, 1)
+            if used:
+                size = max(1, elapsed * self.deltas // used)
+            else:
+                size = self.size * 2
+            if self.limit is not None:
+                size = min(size, self.limit)
+            self.size = size
+        return result
+
+
+async def _advance(sim, duration, timeslice, deltas, watch=None):
+    """ Run sim for duration time units, or until there are no more events
+    when duration is None, or until watch is hit.
+
+    """
+    slicer = _Slicer(sim, timeslice, deltas)
+    end = None
+    if duration is not None:
+        end = sim._context._time + duration
+    while end is None or sim._context._time < end:
+        if not slicer.run(sim, end):
+            return 0
+        if watch is not None and watch.hit:
+            break
+        await asyncio.sleep(0)
+    return 1
+
+
+class _Watch(object):
+
+    """ Suspends a simulation run when a condition holds at a trigger """
+
+    def __init__(self, trigger, condition):
+        self.trigger = trigger
+        self.condition = condition
+        self.hit = False
+        self.cancelled = False
+        self.stop = _SuspendSimulation("Condition met")
+
+    def gen(self):
+        condition = self.condition
+        while not self.cancelled:
+            yield self.trigger
+            if self.cancelled:
+                return
+            if condition is None or condition():
+                self.hit = True
+                # raised by the kernel at the end of the time step
+                yield self.stop
+                return
+
+
+async def _until(sim, trigger, condition, timeout, timeslice, deltas):
+    if sim._cycle is not None:
+        raise SimulationError(_error.Cycle)
+    if condition is not None and condition():
+        return True
+    watch = _Watch(trigger, condition)
+    sim._waiters.append(_Waiter(watch.gen()))
+    try:
+        await _advance(sim, timeout, timeslice, deltas, watch)
+    finally:
+        watch.cancelled = True
+    return watch.hit
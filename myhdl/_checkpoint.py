@@ -0,0 +1,249 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Simulation checkpoint and restore.
+
+The generators of always, always_comb and always_seq blocks are always
+suspended at the same yield statement between time steps, so the state
+of a simulation of such blocks consists of signal values, always_seq
+variables and the future event queue. This module saves that state to a
+file and loads it into a fresh Simulation of the same design.
+
+"""
+
+import pickle
+from copy import copy
+
+from ._always import _Always
+from ._clock import Clock
+from ._enum import EnumItemType
+from ._errors import SimulationError
+from ._intbv import intbv
+from ._profile import _ProfiledGenerator
+from ._Signal import _Signal, _DelayedSignal, _SignalWrap, _isListOfSigs
+from ._SignalArray import SignalArray
+from ._simulator import _simulator
+from ._Waiter import _Waiter, _DelayWaiter
+from .numeric._bitarray import bitarray
+
+
+class _error:
+    pass
+_error.Generator = "Checkpoint cannot capture the state of a generator"
+_error.Event = "Checkpoint cannot capture a future event"
+_error.Running = "Checkpoint or restore while the simulation is running"
+_error.Started = "Restore requires a simulation that has not run yet"
+_error.Format = "Not a simulation checkpoint"
+_error.Design = "Checkpoint does not match the simulated design"
+_error.Lanes = "Checkpoint cannot capture the values of a lane simulation"
+
+_MAGIC = b'MyHDLcp'
+_VERSION = 1
+
+
+def _generator(waiter):
+    gen = waiter.generator
+    if isinstance(gen, _ProfiledGenerator):
+        return gen.gen
+    return gen
+
+
+def _checkDesign(arglist):
+    """ Check that the state of the design can be captured.
+
+    Returns a description of the design, used to verify that a checkpoint
+    is restored in the same design.
+
+    """
+    design = []
+    for arg in arglist:
+        if isinstance(arg, Clock):
+            design.append(('Clock', arg.period, arg._high, arg.phase))
+        elif isinstance(arg, _Always) and arg._waiter() is not _Waiter:
+            design.append((type(arg).__name__, arg.func.__qualname__))
+        elif arg is not True:
+            name = getattr(arg, '__qualname__', None) or \
+                getattr(getattr(arg, 'funcobj', None), '__qualname__',
+                        type(arg).__name__)
+            raise SimulationError(_error.Generator, name)
+    return design
+
+
+def _collectSignals(arglist):
+    """ Return the signals of the design in a deterministic order """
+    sigs = []
+    ids = set()
+
+    def add(sig):
+        if id(sig) not in ids:
+            ids.add(id(sig))
+            sigs.append(sig)
+
+    for arg in arglist:
+        if isinstance(arg, Clock):
+            add(arg.sig)
+        elif isinstance(arg, _Always):
+            symdict = arg.symdict
+            for n in sorted(symdict):
+                obj = symdict[n]
+                if isinstance(obj, (_Signal, SignalArray)):
+                    add(obj)
+                elif _isListOfSigs(obj):
+                    for sig in obj:
+                        add(sig)
+    return sigs
+
+
+def _encode(val):
+    if isinstance(val, (intbv, bitarray)):
+        return val._val
+    if isinstance(val, EnumItemType):
+        return val._index
+    return val
+
+
+def _decode(ref, data):
+    """ Decode data to a value of the same type as ref """
+    if isinstance(ref, (intbv, bitarray)):
+        val = copy(ref)
+        val._val = data
+        return val
+    if isinstance(ref, EnumItemType):
+        return getattr(ref._type, ref._type._names[data])
+    return data
+
+
+def _checkpoint(sim, path):
+    if _simulator._context is sim._context:
+        raise SimulationError(_error.Running)
+    if sim.lanes is not None:
+        raise SimulationError(_error.Lanes)
+    arglist = sim._arglist
+    design = _checkDesign(arglist)
+    sigs = _collectSignals(arglist)
+    sigindex = dict((id(sig), i) for i, sig in enumerate(sigs))
+    signals = []
+    for sig in sigs:
+        if isinstance(sig, SignalArray):
+            signals.append(sig._getState())
+            continue
+        state = [_encode(sig._val), _encode(sig._next), sig._dirty]
+        if isinstance(sig, _DelayedSignal):
+            state.extend((_encode(sig._nextZ), sig._timeStamp))
+        signals.append(state)
+    varregs = []
+    for arg in arglist:
+        for _, reg, _ in getattr(arg, 'varregs', ()):
+            varregs.append(reg._val)
+    clocks = dict((id(arg), i) for i, arg in enumerate(arglist)
+                  if isinstance(arg, Clock))
+    gens = dict((id(arg.gen), i) for i, arg in enumerate(arglist)
+                if isinstance(arg, _Always))
+    events = []
+    for t, event in sim._context._futureEvents.events():
+        if isinstance(event, Clock):
+            events.append(('clock', t, clocks[id(event)]))
+        elif isinstance(event, _DelayWaiter) and \
+                id(_generator(event)) in gens:
+            events.append(('delay', t, gens[id(_generator(event))]))
+        elif isinstance(event, _SignalWrap) and id(event.sig) in sigindex:
+            events.append(('wrap', t, sigindex[id(event.sig)],
+                           _encode(event.next), event.timeStamp))
+        elif isinstance(event, _Waiter) and event.generator is None:
+            # stop marker of a previous run
+            continue
+        else:
+            raise SimulationError(_error.Event, repr(event))
+    state = {'version': _VERSION,
+             'design': design,
+             'time': sim._context._time,
+             'signals': signals,
+             'varregs': varregs,
+             'events': events,
+             }
+    with open(path, 'wb') as f:
+        f.write(_MAGIC)
+        pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+
+
+def _restore(sim, path):
+    if _simulator._context is sim._context:
+        raise SimulationError(_error.Running)
+    if sim._started:
+        raise SimulationError(_error.Started)
+    if sim.lanes is not None:
+        raise SimulationError(_error.Lanes)
+    arglist = sim._arglist
+    design = _checkDesign(arglist)
+    with open(path, 'rb') as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise SimulationError(_error.Format, path)
+        state = pickle.load(f)
+    if state['version'] != _VERSION:
+        raise SimulationError(_error.Format, path)
+    sigs = _collectSignals(arglist)
+    regs = [reg for arg in arglist
+            for _, reg, _ in getattr(arg, 'varregs', ())]
+    if state['design'] != design or len(state['signals']) != len(sigs) or \
+            len(state['varregs']) != len(regs):
+        raise SimulationError(_error.Design, path)
+
+    for sig, data in zip(sigs, state['signals']):
+        if isinstance(sig, SignalArray):
+            if not sig._setState(data):
+                raise SimulationError(_error.Design, path)
+            continue
+        sig._val = _decode(sig._val, data[0])
+        sig._next = _decode(sig._next, data[1])
+        if isinstance(sig, _DelayedSignal):
+            sig._nextZ = _decode(sig._nextZ, data[3])
+            sig._timeStamp = data[4]
+        # an update scheduled before the checkpoint was taken
+        if data[2] and not sig._dirty:
+            sig._dirty = True
+            siglist = sig._siglist
+            if siglist is None:
+                siglist = _simulator._siglist
+            siglist.append(sig)
+    for reg, val in zip(regs, state['varregs']):
+        reg._val = val
+
+    context = sim._context
+    context._time = state['time']
+    futureEvents = context._futureEvents
+    futureEvents.clear()
+    waiters = sim._waiters
+    for event in state['events']:
+        kind, t = event[:2]
+        if kind == 'clock':
+            futureEvents.append((t, arglist[event[2]]))
+        elif kind == 'delay':
+            # the block waits on its delay: resume it at the saved time
+            # instead of starting it at the restored time
+            gen = arglist[event[2]].gen
+            for i, waiter in enumerate(waiters):
+                if _generator(waiter) is gen:
+                    del waiters[i]
+                    break
+            else:
+                raise SimulationError(_error.Design, path)
+            next(gen)
+            futureEvents.append((t, waiter))
+        else:
+            sig = sigs[event[2]]
+            futureEvents.append(
+                (t, _SignalWrap(sig, _decode(sig._next, event[3]), event[4])))
@@ -0,0 +1,94 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module that provides the Clock class """
+
+
+from ._Signal import _Signal
+from ._simulator import _simulator
+from ._util import _recordCreation
+
+
+class _error:
+    pass
+_error.SigType = "Clock signal should be a bool Signal"
+_error.Period = "Clock period should be a positive integer"
+_error.Duty = "Clock duty cycle should give a high and low time of at least 1"
+_error.Phase = "Clock phase should be a non-negative integer"
+
+
+class Clock(object):
+
+    """ Clock driven by the simulation kernel.
+
+    A Clock toggles a bool signal without a generator: the simulator
+    schedules it as a future event, updates the signal value in place and
+    resumes the edge waiters of the signal directly.
+
+    """
+
+    __slots__ = ('sig', 'period', 'duty', 'phase', '_high', '_low')
+
+    def __init__(self, sig, period, duty=0.5, phase=0):
+        """ Construct a clock.
+
+        sig -- bool signal to drive
+        period -- clock period in simulation time units
+        duty -- fraction of the period the clock is high (default: 0.5)
+        phase -- time of the first toggle (default: 0)
+
+        """
+        if not isinstance(sig, _Signal) or sig._type is not bool:
+            raise TypeError(_error.SigType)
+        if not isinstance(period, int) or period <= 0:
+            raise ValueError(_error.Period)
+        high = int(round(period * duty))
+        if not 0 < high < period:
+            raise ValueError(_error.Duty)
+        if not isinstance(phase, int) or phase < 0:
+            raise ValueError(_error.Phase)
+        self.sig = sig
+        self.period = period
+        self.duty = duty
+        self.phase = phase
+        self._high = high
+        self._low = period - high
+        _recordCreation(self)
+
+    def apply(self):
+        sig = self.sig
+        wl = sig._eventWaiters
+        waiters = wl[:]
+        if wl:
+            del wl[:]
+            wl.epoch += 1
+        if sig._val:
+            sig._val = sig._next = False
+            wl = sig._negedgeWaiters
+            t = self._low
+        else:
+            sig._val = sig._next = True
+            wl = sig._posedgeWaiters
+            t = self._high
+        if wl:
+            waiters.extend(wl)
+            del wl[:]
+            wl.epoch += 1
+        if sig._tracing:
+            sig._printVcd()
+        _simulator._futureEvents.append((_simulator._time + t, self))
+        return waiters
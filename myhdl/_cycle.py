@@ -0,0 +1,250 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Cycle-based simulation of fully synchronous designs.
+
+A design of clocks, blocks that run on a single edge of a clock and
+acyclic always_comb logic settles to the same values at the end of each
+time step whatever the order of its delta cycles. The cycle kernel skips
+the waiters and delta cycles: on each clock edge it calls the functions
+of the sequential blocks of that edge, commits their next values at once,
+and then calls the always_comb blocks whose inputs changed in topological
+order.
+
+"""
+
+from heapq import heappush, heappop
+
+from ._always import _Always
+from ._always_comb import _AlwaysComb
+from ._always_seq import _AlwaysSeq
+from ._clock import Clock
+from ._errors import SimulationError, StopSimulation, _SuspendSimulation
+from ._levelize import _combGraph, _levels, _loops, _sigs
+from ._Signal import _DelayedSignal, _PosedgeWaiterList, _NegedgeWaiterList
+from ._SignalArray import SignalArray
+from ._simulator import _simulator
+from ._Waiter import _Waiter
+
+
+class _error:
+    pass
+_error.Block = "Not a clock, always_comb block or single clock edge block"
+_error.Loop = "Combinational loop"
+_error.Delayed = "Delayed signal"
+_error.Waiter = "Not a synchronous design element"
+
+# number of time steps between checks of the progress callback, as in the
+# event-driven kernels
+_PROGRESS_INTERVAL = 1024
+
+
+def _seqFunc(block, func):
+    """ Return the function to call on the clock edge of a block """
+    if not isinstance(block, _AlwaysSeq) or block.reset is None:
+        return func
+    reset = block.reset
+    reset_sigs = block.reset_sigs
+    reset_vars = block.reset_vars
+
+    def seq():
+        if reset == reset.active:
+            reset_sigs()
+            reset_vars()
+        else:
+            func()
+    return seq
+
+
+class _CycleKernel(object):
+
+    """ Simulation kernel for fully synchronous designs.
+
+    Called like the event-driven kernels, and like them only returns by
+    raising. The blocks attribute lists the always_comb blocks followed by
+    the sequential blocks, and funcs the functions that are called for
+    them. The funcs argument maps the ids of blocks to the functions to
+    call instead of theirs.
+
+    """
+
+    def __init__(self, arglist, waiters, funcs=None):
+        if funcs is None:
+            funcs = {}
+        clocks = set(id(arg.sig) for arg in arglist if isinstance(arg, Clock))
+        combs = []
+        seqs = []
+        for arg in arglist:
+            if isinstance(arg, Clock) or arg is True:
+                continue
+            if isinstance(arg, _AlwaysComb):
+                combs.append(arg)
+            elif isinstance(arg, _Always) and len(arg.senslist) == 1 and \
+                    isinstance(arg.senslist[0], (_PosedgeWaiterList,
+                                                 _NegedgeWaiterList)) and \
+                    id(arg.senslist[0].sig) in clocks:
+                seqs.append(arg)
+            else:
+                raise SimulationError(_error.Block, _name(arg))
+        blocks = combs + seqs
+        # shadow signals and cosimulation add waiters of their own
+        gens = set(id(block.gen) for block in blocks)
+        for waiter in waiters:
+            if id(waiter.generator) not in gens:
+                raise SimulationError(_error.Waiter, _name(waiter.generator))
+        for block in blocks:
+            for n in block.outputs:
+                for s in _sigs(block.symdict[n]):
+                    if isinstance(s, _DelayedSignal):
+                        raise SimulationError(_error.Delayed, n)
+        succs, preds = _combGraph(combs)
+        looped = _loops(succs)
+        if looped:
+            raise SimulationError(_error.Loop, ", ".join(
+                sorted(_name(combs[i]) for i in looped)))
+        levels = _levels(range(len(combs)), succs, preds)
+
+        self.blocks = blocks
+        funcs = dict((id(block), funcs.get(id(block), block.func))
+                     for block in blocks)
+        self.funcs = [funcs[id(block)] for block in combs] + \
+            [_seqFunc(block, funcs[id(block)]) for block in seqs]
+        self.levels = [levels[i] for i in range(len(combs))]
+        self.readers = readers = {}
+        for i, comb in enumerate(combs):
+            for s in comb.senslist:
+                readers.setdefault(id(s), []).append(i)
+        self.edges = edges = {}
+        for k, block in enumerate(seqs, len(combs)):
+            edge = block.senslist[0]
+            key = (id(edge.sig), isinstance(edge, _PosedgeWaiterList))
+            edges.setdefault(key, []).append(k)
+        self.marked = [False] * len(combs)
+        self.pending = []
+        self.started = False
+        # the (maxTime, maxSteps) bounds of the runs of step and run_until
+        self.bounds = None
+
+    def _markBlock(self, i):
+        if not self.marked[i]:
+            self.marked[i] = True
+            heappush(self.pending, (self.levels[i], i))
+
+    def _mark(self, s):
+        """ Mark the always_comb blocks that read signal s """
+        for i in self.readers.get(id(s), ()):
+            self._markBlock(i)
+
+    def _commit(self, siglist):
+        """ Update the signals in siglist, and mark the blocks that read
+        the changed ones. Returns the number of updates.
+
+        """
+        n = len(siglist)
+        readers = self.readers
+        for s in siglist:
+            s._dirty = False
+            # the readers of a signal array are marked for any write
+            if id(s) in readers and (isinstance(s, SignalArray) or
+                                     s._next != s._val):
+                self._mark(s)
+            s._update()
+        del siglist[:]
+        return n
+
+    def _settle(self, siglist):
+        """ Call the marked always_comb blocks in topological order.
+        Returns the number of calls and updates.
+
+        """
+        pending, marked, funcs = self.pending, self.marked, self.funcs
+        calls = updates = 0
+        while pending:
+            i = heappop(pending)[1]
+            marked[i] = False
+            funcs[i]()
+            calls += 1
+            updates += self._commit(siglist)
+        return calls, updates
+
+    def __call__(self, waiters, cosim, maxTime, duration, exc, stats):
+        siglist = _simulator._siglist
+        futureEvents = _simulator._futureEvents
+        t = _simulator._time
+        tracing = _simulator._tracing
+        tracefile = _simulator._tf
+        funcs, edges, mark = self.funcs, self.edges, self._mark
+        bounds = self.bounds
+        progress = stats._callback is not None
+        steps = updates = calls = 0
+
+        try:
+            # the always_comb blocks run once at the start, and signal
+            # updates may be scheduled between runs
+            if not self.started:
+                self.started = True
+                for i in range(len(self.levels)):
+                    self._markBlock(i)
+            updates += self._commit(siglist)
+            n, m = self._settle(siglist)
+            calls += n
+            updates += m
+
+            while futureEvents:
+                if t == maxTime:
+                    raise _SuspendSimulation(
+                        "Simulated %s timesteps" % duration)
+                nextTime = futureEvents.nextTime()
+                if bounds is not None:
+                    untilTime, maxSteps = bounds
+                    if steps == maxSteps or \
+                            (untilTime is not None and nextTime > untilTime):
+                        if untilTime is not None:
+                            _simulator._time = untilTime
+                        raise _SuspendSimulation(
+                            "Simulated %s timesteps" % steps)
+                t = _simulator._time = nextTime
+                steps += 1
+                if progress and not steps % _PROGRESS_INTERVAL:
+                    stats._tick(steps, steps, 1, updates, calls)
+                if tracing:
+                    print("#%s" % t, file=tracefile)
+                triggered = []
+                for event in futureEvents.popEvents(t):
+                    if isinstance(event, _Waiter):
+                        continue
+                    event.apply()
+                    sig = event.sig
+                    mark(sig)
+                    triggered.extend(edges.get((id(sig), sig._val), ()))
+                for k in triggered:
+                    funcs[k]()
+                calls += len(triggered)
+                updates += self._commit(siglist)
+                n, m = self._settle(siglist)
+                calls += n
+                updates += m
+
+            raise StopSimulation("No more events")
+        finally:
+            stats._update(steps, steps, 1 if steps else 0, updates, calls)
+
+
+def _name(obj):
+    return getattr(obj, '__qualname__', None) or \
+        getattr(getattr(obj, 'funcobj', None), '__qualname__', None) or \
+        repr(obj)
@@ -0,0 +1,145 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" On-disk cache of the elaboration analysis of functions.
+
+Elaboration reads, dedents and analyzes the source of each function that
+defines a block. The results that don't depend on a symdict are cached in
+memory per code object, and can also be kept on disk, so that they are
+computed once for many processes. The cache has a file per source file,
+which holds the entries of its functions, keyed by qualified name and
+first line number. An entry is only valid for the source file contents
+that it was computed from, as recorded by a hash of these contents, so
+entries of a changed source file are discarded automatically.
+
+"""
+
+import atexit
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+from ._version import __version__
+
+# format of the cache files, to change along with the cached values
+_FORMAT = 2
+
+
+class _ElaborationCacheClass(object):
+
+    """ Opt-in on-disk cache of the elaboration analysis of functions.
+
+    Attributes:
+    directory -- directory of the cache files, or None to disable the cache
+                 (default: the MYHDL_CACHE_DIR environment variable)
+
+    """
+
+    __slot__ = ("directory",
+                "_files"
+                )
+
+    def __init__(self):
+        self.directory = os.environ.get("MYHDL_CACHE_DIR") or None
+        self._files = {}
+
+    def get(self, code, kind):
+        """ Return the cached value of a kind for code, or None """
+        entries = self._entries(code)
+        if entries is None:
+            return None
+        return entries[1].get(_key(code, kind))
+
+    def put(self, code, kind, value):
+        """ Cache the value of a kind for code """
+        entries = self._entries(code)
+        if entries is None:
+            return
+        entries[1][_key(code, kind)] = value
+        entries[2] = True
+
+    def flush(self):
+        """ Write the new entries to the cache files """
+        for (directory, filename), entries in self._files.items():
+            if entries is None or not entries[2]:
+                continue
+            path = _path(directory, filename)
+            try:
+                # merge the entries that other processes may have written
+                old = _load(path, entries[0])
+                old.update(entries[1])
+                entries[1] = old
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=directory)
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump((entries[0], old), f,
+                                pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+            entries[2] = False
+
+    def _entries(self, code):
+        """ Return the [stamp, entries, dirty] list of the file of code """
+        directory = self.directory
+        if directory is None:
+            return None
+        filename = code.co_filename
+        try:
+            return self._files[directory, filename]
+        except KeyError:
+            pass
+        try:
+            with open(filename, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            # no source file, as for interactively defined functions
+            entries = None
+        else:
+            stamp = (_FORMAT, __version__, sys.version_info[:2], digest)
+            entries = [stamp, _load(_path(directory, filename), stamp), False]
+        self._files[directory, filename] = entries
+        return entries
+
+
+def _key(code, kind):
+    return (getattr(code, 'co_qualname', code.co_name),
+            code.co_firstlineno, kind)
+
+
+def _path(directory, filename):
+    name = hashlib.sha256(os.path.abspath(filename).encode()).hexdigest()
+    return os.path.join(directory, name + '.pickle')
+
+
+def _load(path, stamp):
+    """ Return the entries of a cache file, if valid for stamp """
+    try:
+        with open(path, 'rb') as f:
+            fileStamp, entries = pickle.load(f)
+    except Exception:
+        # missing, or written by an incompatible version
+        return {}
+    if fileStamp != stamp:
+        return {}
+    return entries
+
+
+elaborationCache = _ElaborationCacheClass()
+atexit.register(elaborationCache.flush)
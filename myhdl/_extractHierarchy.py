@@ -26,18 +26,20 @@ import re
 import string
 import sys
 import ast
+from weakref import WeakKeyDictionary
 
 from ._errors import ExtractHierarchyError, ToVerilogError, ToVHDLError
 from ._enum import EnumItemType
 from .numeric._bitarray import bitarray
 from ._Signal import _Signal, _isListOfSigs
+from ._SignalArray import SignalArray
 from ._getcellvars import _getCellVars
+from ._instance import _Instantiator
 from ._misc import _isGenSeq, _get_instances
 from ._resolverefs import _resolveRefs
+from . import _util
 from ._util import _flatten, _genfunc, _isTupleOfInts, _isTupleOfFloats, _isTupleOfBitArray
 
-_profileFunc = None
-
 
 class _error:
     NoInstances = "No instances found"
@@ -79,21 +81,39 @@ class _Instance:
 
 _memInfoMap = {}
 
+# hierarchical names of the extracted instantiators
+_instanceNames = WeakKeyDictionary()
+
 
 class _MemInfo:
-    __slots__ = ['mem', 'name', 'elObj', 'depth', 'type', '_used', '_driven',
+    __slots__ = ['_mem', 'array', 'name', 'depth', 'type', '_used', '_driven',
                  '_read']
 
     def __init__(self, mem):
-        self.mem = mem
+        if isinstance(mem, SignalArray):
+            # the signals of an array are made when they are needed
+            self._mem = None
+            self.array = mem
+        else:
+            self._mem = mem
+            self.array = None
         self.name = None
         self.depth = len(mem)
-        self.elObj = mem[0]
         self.type = None
         self._used = False
         self._driven = None
         self._read = False
 
+    @property
+    def mem(self):
+        if self._mem is None:
+            self._mem = self.array._signals()
+        return self._mem
+
+    @property
+    def elObj(self):
+        return self.mem[0]
+
     @property
     def used(self):
         return self._used
@@ -107,7 +127,9 @@ class _MemInfo:
     def _clear(self):
         self._driven = None
         self._read = False
-        for el in self.mem:
+        if self._mem is None:
+            return
+        for el in self._mem:
             el._clear()
 
 
@@ -281,11 +303,23 @@ class _CallFuncVisitor:
         self.lineno = node.lineno
 
 
+class _Call(object):
+
+    """ A call of the elaboration that creates instances """
+
+    __slots__ = ('level', 'first', 'gens', 'calls')
+
+    def __init__(self, level, first):
+        self.level = level
+        self.first = first
+        self.gens = set()
+        self.calls = []
+
+
 class _HierExtr:
 
     def __init__(self, name, dut, *args, **kwargs):
 
-        global _profileFunc
         _memInfoMap.clear()
         self.userCodeMap = {'verilog': {},
                             'vhdl': {}
@@ -296,15 +330,18 @@ class _HierExtr:
                           'always', '_always_decorator',
                           'instances',
                           'processes', 'posedge', 'negedge')
-        self.skip = 0
         self.hierarchy = hierarchy = []
         self.absnames = absnames = {}
-        self.level = 0
 
-        _profileFunc = self.extractor
-        sys.setprofile(_profileFunc)
-        _top = dut(*args, **kwargs)
-        sys.setprofile(None)
+        # the instances record the frames of the calls that create them
+        creations = []
+        outer = _util._creations
+        _util._creations = creations
+        try:
+            _top = dut(*args, **kwargs)
+        finally:
+            _util._creations = outer
+        self._extract(sys._getframe(), _top, creations)
         if not hierarchy:
             raise ExtractHierarchyError(_error.NoInstances)
 
@@ -334,12 +371,16 @@ class _HierExtr:
             for sn, so in subs:
                 names[id(so)] = sn
                 absnames[id(so)] = "%s_%s" % (tn, sn)
+                if isinstance(so, _Instantiator):
+                    _instanceNames[so] = absnames[id(so)]
 
                 if isinstance(so, (tuple, list)):
                     for i, soi in enumerate(so):
                         sni = "%s_%s" % (sn, i)
                         names[id(soi)] = sni
                         absnames[id(soi)] = "%s_%s_%s" % (tn, sn, i)
+                        if isinstance(soi, _Instantiator):
+                            _instanceNames[soi] = absnames[id(soi)]
 
     @staticmethod
     def _check_instances(inst):
@@ -355,115 +396,146 @@ class _HierExtr:
             else:
                 raise ExtractHierarchyError(_error.MissingInstances.format(file, line, inst.name, insts))
 
-    def extractor(self, frame, event, arg):
-        if event == "call":
-
-            funcname = frame.f_code.co_name
-            # skip certain functions
-            if funcname in self.skipNames:
-                self.skip += 1
-            if not self.skip:
-                self.level += 1
-
-        elif event == "return":
-
-            funcname = frame.f_code.co_name
-            func = frame.f_globals.get(funcname)
-
-            if func is None:
-                # Didn't find a func in the global space, try the local "self"
-                # argument and see if it has a method called *funcname*
-                obj = frame.f_locals.get('self')
-                if hasattr(obj, funcname):
-                    func = getattr(obj, funcname)
-
-            if not self.skip:
-                isGenSeq = _isGenSeq(arg)
-                if isGenSeq:
-                    specs = {}
-                    for hdl in self.userCodeMap:
-                        spec = "__%s__" % hdl
-                        if spec in frame.f_locals and frame.f_locals[spec]:
-                            specs[spec] = frame.f_locals[spec]
-                        spec = "%s_code" % hdl
-                        if func and hasattr(func, spec) and \
-                                getattr(func, spec):
-                            specs[spec] = getattr(func, spec)
-                        spec = "%s_instance" % hdl
-                        if func and hasattr(func, spec) and \
-                                getattr(func, spec):
-                            specs[spec] = getattr(func, spec)
-                    if specs:
-                        self._add_user_code(specs, arg, funcname, func, frame)
-                # building hierarchy only makes sense if there are generators
-                if isGenSeq and arg:
-                    constdict = {}
-                    sigdict = {}
-                    memdict = {}
-                    romdict = {}
-                    symdict = frame.f_globals.copy()
-                    symdict.update(frame.f_locals)
-                    cellvars = []
-                    # All nested functions will be in co_consts
-                    if func:
-                        local_gens = []
-                        consts = func.__code__.co_consts
-                        for item in _flatten(arg):
-                            genfunc = _genfunc(item)
-                            if genfunc.__code__ in consts:
-                                local_gens.append(item)
-                        if local_gens:
-                            cellvarlist = _getCellVars(symdict, local_gens)
-                            cellvars.extend(cellvarlist)
-                            objlist = _resolveRefs(symdict, local_gens)
-                            cellvars.extend(objlist)
-
-                    for n, v in symdict.items():
-                        # extract signals and memories
-                        # also keep track of whether they are used in
-                        # generators only include objects that are used in
-                        # generators
-                        if isinstance(v, _Signal):
-                            sigdict[n] = v
-                            if n in cellvars:
-                                v._markUsed()
-                        elif isinstance(v, (int, float, bitarray,
-                                            EnumItemType)):
-                            constdict[n] = _Constant(n, v)
-                        elif _isListOfSigs(v):
-                            m = _makeMemInfo(v)
-                            memdict[n] = m
-                            if n in cellvars:
-                                m._used = True
-                        elif _isTupleOfInts(v):
-                            m = _makeRomInfo(n, v)
-                            romdict[n] = m
-                            if n in cellvars:
-                                m._used = True
-                        elif _isTupleOfFloats(v):
-                            m = _makeRomInfo(n, v)
-                            romdict[n] = m
-                            if n in cellvars:
-                                m._used = True
-                        elif _isTupleOfBitArray(v):
-                            m = _makeRomInfo(n, v)
-                            romdict[n] = m
-                            if n in cellvars:
-                                m._used = True
-
-                    subs = []
-                    for n, sub in frame.f_locals.items():
-                        for elt in _infer_args(arg):
-                            if elt is sub:
-                                subs.append((n, sub))
-                    inst = _Instance(self.level, arg, subs, constdict,
-                                     sigdict, memdict, romdict, func, frame)
-                    self.hierarchy.append(inst)
-
-                self.level -= 1
-
-            if funcname in self.skipNames:
-                self.skip -= 1
+    def _extract(self, root, top, creations):
+        """ Build the hierarchy from the frames of the creations.
+
+        The frames of the calls from the dut call down to the creation of an
+        instance stay linked after the calls return. The value that a call
+        returns is found among the values of its caller: the one made of the
+        instances created within the call, if any. The hierarchy lists the calls
+        that return instances in the order in which they return.
+
+        """
+        calls = {}
+        recorded = set()
+        for index, (obj, frame) in enumerate(creations):
+            path = []
+            while frame is not None and frame is not root:
+                path.append(frame)
+                frame = frame.f_back
+            if frame is None or \
+                    any(f.f_code.co_name in self.skipNames for f in path):
+                continue
+            recorded.add(id(obj))
+            caller = None
+            for level, frame in enumerate(reversed(path), 1):
+                call = calls.get(frame)
+                if call is None:
+                    call = calls[frame] = _Call(level, index)
+                    if caller is not None:
+                        caller.calls.append(frame)
+                call.gens.add(id(obj))
+                caller = call
+        tops = [f for f, call in calls.items() if call.level == 1]
+        for frame in sorted(tops, key=lambda f: calls[f].first):
+            self._extractCall(frame, top, calls, recorded)
+
+    def _extractCall(self, frame, arg, calls, recorded):
+        call = calls[frame]
+        returned = None
+        for sub in sorted(call.calls, key=lambda f: calls[f].first):
+            if returned is None:
+                returned = _returnedValues(frame, arg, recorded)
+            value = _returnedValue(returned, calls[sub].gens)
+            self._extractCall(sub, value, calls, recorded)
+        if arg is not _NOVALUE:
+            self._extractReturn(frame, arg, call.level)
+
+    def _extractReturn(self, frame, arg, level):
+
+        funcname = frame.f_code.co_name
+        func = frame.f_globals.get(funcname)
+
+        if func is None:
+            # Didn't find a func in the global space, try the local "self"
+            # argument and see if it has a method called *funcname*
+            obj = frame.f_locals.get('self')
+            if hasattr(obj, funcname):
+                func = getattr(obj, funcname)
+
+        isGenSeq = _isGenSeq(arg)
+        if isGenSeq:
+            specs = {}
+            for hdl in self.userCodeMap:
+                spec = "__%s__" % hdl
+                if spec in frame.f_locals and frame.f_locals[spec]:
+                    specs[spec] = frame.f_locals[spec]
+                spec = "%s_code" % hdl
+                if func and hasattr(func, spec) and \
+                        getattr(func, spec):
+                    specs[spec] = getattr(func, spec)
+                spec = "%s_instance" % hdl
+                if func and hasattr(func, spec) and \
+                        getattr(func, spec):
+                    specs[spec] = getattr(func, spec)
+            if specs:
+                self._add_user_code(specs, arg, funcname, func, frame)
+        # building hierarchy only makes sense if there are generators
+        if isGenSeq and arg:
+            constdict = {}
+            sigdict = {}
+            memdict = {}
+            romdict = {}
+            symdict = frame.f_globals.copy()
+            symdict.update(frame.f_locals)
+            cellvars = []
+            # All nested functions will be in co_consts
+            if func:
+                local_gens = []
+                consts = func.__code__.co_consts
+                for item in _flatten(arg):
+                    if not isinstance(item, _Instantiator):
+                        continue
+                    genfunc = _genfunc(item)
+                    if genfunc.__code__ in consts:
+                        local_gens.append(item)
+                if local_gens:
+                    cellvarlist = _getCellVars(symdict, local_gens)
+                    cellvars.extend(cellvarlist)
+                    objlist = _resolveRefs(symdict, local_gens)
+                    cellvars.extend(objlist)
+
+            for n, v in symdict.items():
+                # extract signals and memories
+                # also keep track of whether they are used in
+                # generators only include objects that are used in
+                # generators
+                if isinstance(v, _Signal):
+                    sigdict[n] = v
+                    if n in cellvars:
+                        v._markUsed()
+                elif isinstance(v, (int, float, bitarray,
+                                    EnumItemType)):
+                    constdict[n] = _Constant(n, v)
+                elif _isListOfSigs(v) or isinstance(v, SignalArray):
+                    m = _makeMemInfo(v)
+                    memdict[n] = m
+                    if n in cellvars:
+                        m._used = True
+                elif _isTupleOfInts(v):
+                    m = _makeRomInfo(n, v)
+                    romdict[n] = m
+                    if n in cellvars:
+                        m._used = True
+                elif _isTupleOfFloats(v):
+                    m = _makeRomInfo(n, v)
+                    romdict[n] = m
+                    if n in cellvars:
+                        m._used = True
+                elif _isTupleOfBitArray(v):
+                    m = _makeRomInfo(n, v)
+                    romdict[n] = m
+                    if n in cellvars:
+                        m._used = True
+
+            subs = []
+            for n, sub in frame.f_locals.items():
+                for elt in _infer_args(arg):
+                    if elt is sub:
+                        subs.append((n, sub))
+            inst = _Instance(level, arg, subs, constdict,
+                             sigdict, memdict, romdict, func, frame)
+            self.hierarchy.append(inst)
 
     def _add_user_code(self, specs, arg, funcname, func, frame):
         classMap = {
@@ -498,6 +570,64 @@ class _HierExtr:
                                                                 sourcefile, sourceline)
 
 
+# the value of a call that returns no instances
+_NOVALUE = object()
+
+
+def _returnedValues(frame, arg, recorded):
+    """ Return the values that the calls made in frame may have returned.
+
+    A call made in frame returns an instance sequence that frame holds in a
+    local, possibly within a sequence, or that frame returns, possibly as
+    an element, as the hierarchy names it otherwise. The values are these
+    sequences, nearest first, by the ids of their recorded instances, and
+    the empty sequences.
+
+    """
+    values = {}
+    empties = []
+
+    def add(level):
+        while level:
+            nested = []
+            for obj in level:
+                if not _isGenSeq(obj):
+                    continue
+                gens = frozenset(id(g) for g in _flatten(obj)
+                                 if id(g) in recorded)
+                if not gens:
+                    empties.append(obj)
+                elif gens not in values:
+                    values[gens] = obj
+                if isinstance(obj, (list, tuple, set)):
+                    nested.extend(obj)
+            level = nested
+
+    add(list(frame.f_locals.values()))
+    if arg is not _NOVALUE:
+        add([arg])
+    return values, empties
+
+
+def _returnedValue(returned, gens):
+    """ Return the value made of the instances gens, or of most of them, as
+    a call may drop some of the instances created within it, or else the
+    next empty sequence.
+
+    """
+    values, empties = returned
+    value = values.get(frozenset(gens), _NOVALUE)
+    if value is _NOVALUE:
+        most = 0
+        for valueGens, obj in values.items():
+            if len(valueGens) > most and valueGens <= gens:
+                value = obj
+                most = len(valueGens)
+    if value is _NOVALUE and empties:
+        value = empties.pop(0)
+    return value
+
+
 def _infer_args(arg):
     c = [arg]
     if isinstance(arg, (tuple, list)):
@@ -0,0 +1,558 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Specialized functions for always blocks.
+
+The functions of always, always_comb and always_seq blocks are analyzed
+with the type analysis of the converter, and translated to closures that
+compute on plain ints: signal values are read from their _val attribute,
+intbv values are masked and bound checked as the intbv methods do, and
+next values are written in place, unless the signal class has a next
+setter of its own. Blocks with constructs outside the supported subset,
+or that the analyzer rejects, keep their function.
+
+"""
+
+import ast
+import linecache
+
+from ._always import _Always
+from ._enum import EnumItemType
+from ._intbv import intbv
+from ._modbv import modbv
+from ._Signal import _Signal, _VectorSignal, _isListOfSigs
+from ._SignalArray import SignalArray
+from ._simulator import _simulator
+
+
+class _Unsupported(Exception):
+    pass
+
+
+# kinds of the translated expressions; intbv values are described by a
+# tuple ('intbv', nrbits, min)
+_BOOL = ('bool',)
+_INT = ('int',)
+_ENUM = ('enum',)
+_ROM = ('rom',)
+
+_binops = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.FloorDiv: '//',
+           ast.Mod: '%', ast.BitAnd: '&', ast.BitOr: '|', ast.BitXor: '^',
+           ast.LShift: '<<', ast.RShift: '>>'}
+
+_cmpops = {ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=',
+           ast.Gt: '>', ast.GtE: '>='}
+
+# next setters that the translated assignments write in place; signals
+# with a setter of their own, such as delayed signals and tristate
+# drivers, are assigned through it
+_inPlaceSetters = (_Signal.next, _VectorSignal.next)
+
+
+def _isIntbv(kind):
+    return kind[0] == 'intbv'
+
+
+def _inRange(code, lo, hi):
+    """ Return True when code is an int literal within the bounds """
+    if not code.lstrip('-').isdigit():
+        return False
+    v = int(code)
+    return (lo is None or lo <= v) and (hi is None or v < hi)
+
+
+def _isTupleOfInts(obj):
+    return isinstance(obj, tuple) and obj and \
+        all(isinstance(e, int) for e in obj)
+
+
+class _FastPathGenerator(object):
+
+    """ Translates an analyzed block function to the source of a closure.
+
+    The objects that the function refers to are passed as arguments to
+    the factory function of the closure.
+
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.lines = []
+        self.objs = []
+        self.names = {}
+        self.level = 2
+
+    def bind(self, obj):
+        name = self.names.get(id(obj))
+        if name is None:
+            name = self.names[id(obj)] = "_b%d" % len(self.objs)
+            self.objs.append(obj)
+        return name
+
+    def write(self, line):
+        self.lines.append("    " * self.level + line)
+
+    def source(self, name):
+        func = self.tree.body[0]
+        self.body(func.body)
+        return "def _make(%s):\n" \
+            "    def %s():\n" \
+            "%s\n" \
+            "    return %s\n" % (", ".join(self.names[id(obj)] for obj
+                                           in self.objs),
+                                 name, "\n".join(self.lines), name)
+
+    # statements
+
+    def body(self, stmts):
+        n = len(self.lines)
+        for stmt in stmts:
+            method = getattr(self, 'stmt_' + type(stmt).__name__, None)
+            if method is None:
+                raise _Unsupported(type(stmt).__name__)
+            method(stmt)
+        if len(self.lines) == n:
+            self.write("pass")
+
+    def block(self, header, stmts):
+        self.write(header)
+        self.level += 1
+        self.body(stmts)
+        self.level -= 1
+
+    def local(self, n):
+        obj = self.tree.vardict.get(n)
+        if n in self.tree.nonlocaldict or not isinstance(obj, int):
+            raise _Unsupported(n)
+        return "l_" + n
+
+    def stmt_Assign(self, node):
+        if len(node.targets) != 1:
+            raise _Unsupported("multiple targets")
+        target = node.targets[0]
+        if isinstance(target, ast.Name):
+            code, kind = self.expr(node.value)
+            self.write("%s = %s" % (self.local(target.id), code))
+        elif isinstance(target, ast.Attribute) and target.attr == 'next' \
+                and isinstance(getattr(target.value, 'obj', None), _Signal):
+            self.assignSignal(target.value.obj, node.value)
+        else:
+            raise _Unsupported("assignment target")
+
+    def assignSignal(self, sig, value):
+        code, kind = self.expr(value)
+        if kind in (_ROM,):
+            raise _Unsupported("assigned value")
+        s = self.bind(sig)
+        write = self.write
+        if type(sig).next not in _inPlaceSetters:
+            write("%s.next = %s" % (s, code))
+        elif sig._type is bool:
+            # the setter stores 0 and 1 as they are, and the update
+            # converts them to bool
+            if code in ('0', '1'):
+                code, kind = repr(code == '1'), _BOOL
+            write("_v = %s" % code)
+            if kind is not _BOOL:
+                # other values are checked by the setter
+                write("if _v.__class__ is not bool:")
+                write("    %s.next = _v" % s)
+                write("else:")
+                self.level += 1
+            write("%s._next = _v" % s)
+            self.schedule(s, "_v != %s._val" % s)
+            if kind is not _BOOL:
+                self.level -= 1
+        elif sig._type is intbv:
+            if kind is _ENUM:
+                raise _Unsupported("assigned value")
+            lo, hi = sig._min, sig._max
+            if isinstance(sig._init, modbv):
+                if lo is None:
+                    raise _Unsupported("modbv range")
+                if lo == 0:
+                    write("_v = (%s) & %d" % (code, hi - 1))
+                else:
+                    write("_v = ((%s) - %d) %% %d + %d" %
+                          (code, lo, hi - lo, lo))
+            else:
+                write("_v = %s" % code)
+                bounds = []
+                if lo is not None:
+                    bounds.append("%d <= _v" % lo)
+                if hi is not None:
+                    bounds.append("_v < %d" % hi)
+                if bounds and not _inRange(code, lo, hi):
+                    # out of bound values raise in the setter
+                    write("if not (%s):" % " and ".join(bounds))
+                    write("    %s.next = _v" % s)
+            write("%s._next._val = _v" % s)
+            self.schedule(s, "_v != %s._val._val" % s)
+        elif sig._type is int or isinstance(sig._init, EnumItemType):
+            write("%s.next = %s" % (s, code))
+        else:
+            raise _Unsupported("signal type")
+
+    def schedule(self, s, changed):
+        """ Write the scheduling of s when the condition changed holds """
+        write = self.write
+        write("if not %s._dirty and %s:" % (s, changed))
+        write("    %s._dirty = True" % s)
+        write("    _l = %s._siglist" % s)
+        write("    if _l is None:")
+        write("        _l = _simulator._siglist")
+        write("    _l.append(%s)" % s)
+
+    def stmt_AugAssign(self, node):
+        op = _binops.get(type(node.op))
+        if op is None or not isinstance(node.target, ast.Name):
+            raise _Unsupported("augmented assignment")
+        code, kind = self.expr(node.value)
+        self.write("%s %s= %s" % (self.local(node.target.id), op, code))
+
+    def stmt_If(self, node):
+        if getattr(node, 'ignore', False):
+            raise _Unsupported("__debug__")
+        code, kind = self.expr(node.test)
+        self.block("if %s:" % code, node.body)
+        if node.orelse:
+            self.block("else:", node.orelse)
+
+    def stmt_For(self, node):
+        it = node.iter
+        if node.orelse or not isinstance(node.target, ast.Name) or \
+                not isinstance(it, ast.Call) or it.keywords or \
+                getattr(it.func, 'obj', None) is not range:
+            raise _Unsupported("for loop")
+        args = ", ".join(self.expr(arg)[0] for arg in it.args)
+        self.block("for %s in range(%s):" % (self.local(node.target.id),
+                                             args), node.body)
+
+    def stmt_While(self, node):
+        if node.orelse:
+            raise _Unsupported("while-else")
+        code, kind = self.expr(node.test)
+        self.block("while %s:" % code, node.body)
+
+    def stmt_Break(self, node):
+        self.write("break")
+
+    def stmt_Continue(self, node):
+        self.write("continue")
+
+    def stmt_Pass(self, node):
+        pass
+
+    def stmt_Expr(self, node):
+        # doc strings
+        if not isinstance(node.value, ast.Constant) or \
+                not isinstance(node.value.value, str):
+            raise _Unsupported("expression statement")
+
+    def stmt_Return(self, node):
+        if node.value is not None:
+            raise _Unsupported("return value")
+        self.write("return")
+
+    # expressions
+
+    def expr(self, node):
+        method = getattr(self, 'expr_' + type(node).__name__, None)
+        if method is None:
+            raise _Unsupported(type(node).__name__)
+        return method(node)
+
+    def constant(self, node):
+        """ Return the int value of a constant expression, or None """
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, int):
+                return int(node.value)
+        elif isinstance(node, ast.Name):
+            obj = getattr(node, 'obj', None)
+            if node.id not in self.tree.vardict and \
+                    isinstance(obj, int):
+                return int(obj)
+        elif isinstance(node, ast.UnaryOp) and \
+                isinstance(node.op, ast.USub):
+            v = self.constant(node.operand)
+            if v is not None:
+                return -v
+        elif isinstance(node, ast.BinOp) and \
+                isinstance(node.op, (ast.Add, ast.Sub, ast.Mult)):
+            l, r = self.constant(node.left), self.constant(node.right)
+            if l is not None and r is not None:
+                if isinstance(node.op, ast.Add):
+                    return l + r
+                elif isinstance(node.op, ast.Sub):
+                    return l - r
+                return l * r
+        return None
+
+    def readSignal(self, sig):
+        s = self.bind(sig)
+        if sig._type is bool:
+            return "%s._val" % s, _BOOL
+        elif sig._type is intbv:
+            return "%s._val._val" % s, ('intbv', sig._nrbits, sig._min)
+        elif sig._type is int:
+            return "%s._val" % s, _INT
+        elif isinstance(sig._init, EnumItemType):
+            return "%s._val" % s, _ENUM
+        raise _Unsupported("signal type")
+
+    def expr_Constant(self, node):
+        v = node.value
+        if isinstance(v, bool):
+            return repr(v), _BOOL
+        if isinstance(v, int):
+            return repr(v), _INT
+        raise _Unsupported("constant")
+
+    def expr_Name(self, node):
+        n = node.id
+        tree = self.tree
+        if n in tree.vardict and n not in tree.nonlocaldict:
+            code = self.local(n)
+            if isinstance(tree.vardict[n], bool):
+                return code, _BOOL
+            return code, _INT
+        obj = getattr(node, 'obj', None)
+        if isinstance(obj, _Signal):
+            return self.readSignal(obj)
+        if n in tree.nonlocaldict:
+            if type(obj) not in (intbv, modbv):
+                raise _Unsupported(n)
+            return "%s._val" % self.bind(obj), ('intbv', obj._nrbits,
+                                                obj._min)
+        if isinstance(obj, bool):
+            return repr(obj), _BOOL
+        if isinstance(obj, int):
+            return repr(int(obj)), _INT
+        if isinstance(obj, EnumItemType):
+            return self.bind(obj), _ENUM
+        rom = tree.symdict.get(n)
+        if _isTupleOfInts(rom) and not isinstance(rom[0], bool):
+            return self.bind(rom), _ROM
+        raise _Unsupported(n)
+
+    def expr_Attribute(self, node):
+        obj = getattr(node.value, 'obj', None)
+        if isinstance(obj, _Signal):
+            if node.attr == 'val':
+                return self.readSignal(obj)
+            if node.attr in ('min', 'max') and obj._type is intbv and \
+                    obj._min is not None:
+                return repr(getattr(obj, node.attr)), _INT
+        if isinstance(getattr(node, 'obj', None), EnumItemType):
+            return self.bind(node.obj), _ENUM
+        raise _Unsupported("attribute %s" % node.attr)
+
+    def expr_BinOp(self, node):
+        op = _binops.get(type(node.op))
+        if op is None:
+            raise _Unsupported("operator")
+        l, lkind = self.expr(node.left)
+        r, rkind = self.expr(node.right)
+        for kind in (lkind, rkind):
+            if kind in (_ENUM, _ROM):
+                raise _Unsupported("operand")
+        kind = _INT
+        if op in '&|^' and lkind is _BOOL and rkind is _BOOL:
+            kind = _BOOL
+        return "(%s %s %s)" % (l, op, r), kind
+
+    def expr_UnaryOp(self, node):
+        code, kind = self.expr(node.operand)
+        if kind in (_ENUM, _ROM):
+            raise _Unsupported("operand")
+        if isinstance(node.op, ast.Not):
+            return "(not %s)" % code, _BOOL
+        elif isinstance(node.op, ast.USub):
+            return "(-%s)" % code, _INT
+        elif isinstance(node.op, ast.UAdd):
+            return "(+%s)" % code, _INT
+        # the inverse of an unsigned intbv keeps its width
+        if _isIntbv(kind) and kind[1] and kind[2] >= 0:
+            return "(~%s & %d)" % (code, (1 << kind[1]) - 1), _INT
+        return "(~%s)" % code, _INT
+
+    def expr_BoolOp(self, node):
+        op = ' and ' if isinstance(node.op, ast.And) else ' or '
+        codes, kinds = zip(*[self.expr(v) for v in node.values])
+        for kind in kinds:
+            if kind in (_ENUM, _ROM):
+                raise _Unsupported("operand")
+        kind = _BOOL if all(k is _BOOL for k in kinds) else _INT
+        return "(%s)" % op.join(codes), kind
+
+    def expr_Compare(self, node):
+        code, kind = self.expr(node.left)
+        codes = [code]
+        kinds = [kind]
+        for op, comparator in zip(node.ops, node.comparators):
+            op = _cmpops.get(type(op))
+            if op is None:
+                raise _Unsupported("comparison")
+            code, kind = self.expr(comparator)
+            codes.extend((op, code))
+            kinds.append(kind)
+        # enum items only compare for equality
+        if _ROM in kinds or (_ENUM in kinds and not all(
+                isinstance(op, (ast.Eq, ast.NotEq)) for op in node.ops)):
+            raise _Unsupported("comparison")
+        return "(%s)" % " ".join(codes), _BOOL
+
+    def expr_IfExp(self, node):
+        test, tkind = self.expr(node.test)
+        body, bkind = self.expr(node.body)
+        orelse, okind = self.expr(node.orelse)
+        if bkind is okind and not _isIntbv(bkind):
+            kind = bkind
+        elif bkind in (_ENUM, _ROM) or okind in (_ENUM, _ROM):
+            raise _Unsupported("conditional expression")
+        else:
+            kind = _INT
+        return "(%s if %s else %s)" % (body, test, orelse), kind
+
+    def expr_Subscript(self, node):
+        code, kind = self.expr(node.value)
+        index = node.slice
+        if kind is _ROM:
+            i, ikind = self.expr(index)
+            return "%s[%s]" % (code, i), _INT
+        if not _isIntbv(kind):
+            raise _Unsupported("subscript")
+        if isinstance(index, ast.Slice):
+            # a[i:j] has the high index i and the low index j
+            if index.step is not None:
+                raise _Unsupported("slice step")
+            j = 0
+            if index.upper is not None:
+                j = self.constant(index.upper)
+            if index.lower is None:
+                if j is None or j < 0:
+                    raise _Unsupported("slice")
+                return "(%s >> %d)" % (code, j), _INT
+            i = self.constant(index.lower)
+            if i is None or j is None or j < 0 or i <= j:
+                raise _Unsupported("slice")
+            return "(%s >> %d & %d)" % (code, j, (1 << i - j) - 1), \
+                ('intbv', i - j, 0)
+        i, ikind = self.expr(index)
+        if ikind in (_ENUM, _ROM):
+            raise _Unsupported("index")
+        return "(%s >> %s & 1 == 1)" % (code, i), _BOOL
+
+    def expr_Call(self, node):
+        f = getattr(node.func, 'obj', None)
+        if node.keywords or len(node.args) != 1:
+            raise _Unsupported("call")
+        arg = node.args[0]
+        if f is len:
+            obj = getattr(arg, 'obj', None)
+            if isinstance(obj, (_Signal, intbv)) and len(obj):
+                return repr(len(obj)), _INT
+            raise _Unsupported("len")
+        if f not in (int, bool, abs):
+            raise _Unsupported("call")
+        code, kind = self.expr(arg)
+        if kind in (_ENUM, _ROM):
+            raise _Unsupported("call")
+        return "%s(%s)" % (f.__name__, code), (_BOOL if f is bool else _INT)
+
+
+def _blockSignals(block):
+    sigs = []
+    for obj in block.symdict.values():
+        if isinstance(obj, _Signal):
+            sigs.append(obj)
+        elif _isListOfSigs(obj):
+            sigs.extend(obj)
+    return sigs
+
+
+def _analyze(block):
+    """ Return the analyzed tree of a block function """
+    from myhdl.conversion._analyze import _analyzeGens
+    # the analysis marks the signals as a conversion does
+    sigs = _blockSignals(block)
+    marks = [(s._driven, s._read) for s in sigs]
+    try:
+        return _analyzeGens([block], {})[0]
+    finally:
+        for s, (driven, read) in zip(sigs, marks):
+            s._driven, s._read = driven, read
+
+
+def _compile(block):
+    """ Return the specialized function of a block, or None when the
+    block is not supported.
+
+    """
+    func = block.func
+    for obj in block.symdict.values():
+        if isinstance(obj, SignalArray):
+            # array elements are indexed at run time
+            return None
+    try:
+        tree = _analyze(block)
+        v = _FastPathGenerator(tree)
+        src = v.source(func.__name__)
+    except _Unsupported:
+        return None
+    except Exception:
+        # rejected by the analyzer
+        return None
+    filename = "<fastpath %s>" % func.__qualname__
+    namespace = {'_simulator': _simulator}
+    exec(compile(src, filename, 'exec'), namespace)
+    linecache.cache[filename] = (len(src), None, src.splitlines(True),
+                                 filename)
+    fast = namespace['_make'](*v.objs)
+    fast.__qualname__ = func.__qualname__
+    fast.__doc__ = func.__doc__
+    return fast
+
+
+class _FastBlock(object):
+
+    """ Stands in for a block in its generator function """
+
+    def __init__(self, block, func):
+        self._block = block
+        self.func = func
+
+    def __getattr__(self, name):
+        return getattr(self._block, name)
+
+
+def _compileBlocks(arglist):
+    """ Compile the always blocks in arglist.
+
+    The generators of the compiled blocks are replaced by generators that
+    call the specialized functions. Returns a dict that maps the ids of
+    the compiled blocks to their functions.
+
+    """
+    funcs = {}
+    for arg in arglist:
+        if isinstance(arg, _Always):
+            fast = _compile(arg)
+            if fast is not None:
+                funcs[id(arg)] = fast
+                arg.gen = arg.genfunc.__func__(_FastBlock(arg, fast))
+    return funcs
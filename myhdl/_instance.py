@@ -21,13 +21,15 @@
 
 
 
+import ast
 from types import FunctionType
 
+from ._elabcache import elaborationCache
 from ._errors import InstanceError
-from ._util import _isGenFunc, _makeAST
+from ._util import _isGenFunc, _makeAST, _recordCreation
 from ._Waiter import _inferWaiter
-from ._resolverefs import _AttrRefTransformer
-from ._visitors import _SigNameVisitor
+from ._resolverefs import _AttrRefTransformer, _attrRefs, _resolvesRefs
+from ._visitors import _SigNameVisitor, _SigRefVisitor, _sigNames
 
 
 class _error:
@@ -46,18 +48,50 @@ def instance(genfunc):
     return _Instantiator(genfunc)
 
 
+# symdict independent analysis per code object
+_analysisCache = {}
+
+
+def _analyze(f):
+    """ Return the attribute, signal name and global name references of a
+    function.
+
+    """
+    code = f.__code__
+    try:
+        return _analysisCache[code]
+    except KeyError:
+        pass
+    analysis = elaborationCache.get(code, 'analysis')
+    if analysis is None:
+        tree = _makeAST(f)
+        v = _SigRefVisitor()
+        v.visit(tree)
+        names = set(code.co_names)
+        names.update(node.id for node in ast.walk(tree)
+                     if isinstance(node, ast.Name))
+        analysis = (_attrRefs(tree), tuple(v.refs), v.embedded_func,
+                    tuple(sorted(names)))
+        elaborationCache.put(code, 'analysis', analysis)
+    _analysisCache[code] = analysis
+    return analysis
+
+
 class _Instantiator(object):
 
     def __init__(self, genfunc):
         self.genfunc = genfunc
         self.gen = genfunc()
-        # infer symdict
         f = self.funcobj
+        _recordCreation(self, f.__code__)
+        attrRefs, sigRefs, embedded_func, names = _analyze(f)
+        # infer symdict, from the globals that the function refers to
         varnames = f.__code__.co_varnames
+        fglobals = f.__globals__
         symdict = {}
-        for n, v in f.__globals__.items():
-            if n not in varnames:
-                symdict[n] = v
+        for n in names:
+            if n in fglobals and n not in varnames:
+                symdict[n] = fglobals[n]
         # handle free variables
         freevars = f.__code__.co_freevars
         if freevars:
@@ -65,6 +99,14 @@ class _Instantiator(object):
             symdict.update(zip(freevars, closure))
         self.symdict = symdict
 
+        if attrRefs is not None and not _resolvesRefs(symdict, attrRefs):
+            # no attribute references to resolve: skip the tree
+            self.objlist = []
+            self.inputs, self.outputs, self.inouts = \
+                _sigNames(symdict, sigRefs)
+            self.embedded_func = embedded_func
+            return
+
         tree = self.ast
         # print ast.dump(tree)
         v = _AttrRefTransformer(self)
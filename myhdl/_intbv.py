@@ -89,19 +89,18 @@ class intbv(object):
         raise TypeError("intbv objects are unhashable")
 
     # copy methods
+    # the attributes are ints or None: copy them as they are, without
+    # the argument checks of the constructor
     def __copy__(self):
-        c = type(self)(self._val)
+        c = object.__new__(type(self))
+        c._val = self._val
         c._min = self._min
         c._max = self._max
         c._nrbits = self._nrbits
         return c
 
     def __deepcopy__(self, visit):
-        c = type(self)(self._val)
-        c._min = self._min
-        c._max = self._max
-        c._nrbits = self._nrbits
-        return c
+        return self.__copy__()
 
     # iterator method
     def __iter__(self):
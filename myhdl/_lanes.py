@@ -0,0 +1,645 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Lane-parallel cycle-based simulation.
+
+A lane simulation runs a fully synchronous design for a number of lanes
+at once. The signal values of the lanes are kept in NumPy vectors by the
+kernel, and the functions of the blocks are translated, with the type
+analysis of the converter, to functions that compute on these vectors:
+the statements of an if-else are executed for the lanes whose condition
+holds, and signal and variable assignments only change the values of the
+active lanes. Clock signals are shared by all lanes.
+
+NumPy is an optional dependency; it is only imported for lane simulation.
+
+"""
+
+import ast
+
+from ._cycle import _CycleKernel
+from ._clock import Clock
+from ._enum import EnumItemType
+from ._errors import SimulationError
+from ._fastpath import (_FastPathGenerator, _Unsupported, _analyze, _BOOL,
+                        _INT, _ENUM, _ROM, _binops, _cmpops, _isIntbv,
+                        _blockSignals)
+from ._intbv import intbv
+from ._modbv import modbv
+from ._Signal import _Signal, _isListOfSigs
+from ._SignalArray import SignalArray
+from .numeric._bitarray import bitarray
+from .numeric._sintba import sintba
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class _error:
+    pass
+_error.NumPy = "Lane simulation requires NumPy"
+_error.Lanes = "Number of lanes should be a positive integer"
+_error.Block = "Block not supported in lane simulation"
+_error.Width = "Signal too wide for lane simulation"
+_error.Signal = "Not a signal of the lane simulation"
+
+# lane values are 64 bit ints; the widths are limited such that products
+# of two values fit
+_MAXBITS = 31
+
+
+def _isBitArray(kind):
+    return kind[0] == 'ba'
+
+
+def _wrap(code, width, signed):
+    """ Return the code that wraps the value of code into a bit array """
+    mask = (1 << width) - 1
+    if signed:
+        half = 1 << (width - 1)
+        return "(((%s) + %d & %d) - %d)" % (code, half, mask, half)
+    return "(%s & %d)" % (code, mask)
+
+
+def _kindOf(obj):
+    """ Return the kind of the values of a signal or variable """
+    if isinstance(obj, bool):
+        return _BOOL
+    if isinstance(obj, intbv):
+        return ('intbv', obj._nrbits, obj._min)
+    if isinstance(obj, sintba) and obj._low == 0:
+        return ('ba', len(obj), obj.is_signed)
+    if isinstance(obj, EnumItemType):
+        return _ENUM
+    raise _Unsupported("type %s" % type(obj).__name__)
+
+
+def _laneValue(obj):
+    """ Return the int or bool lane value of a signal value """
+    if isinstance(obj, (intbv, bitarray)):
+        return int(obj._val)
+    if isinstance(obj, EnumItemType):
+        return obj._index
+    return obj
+
+
+class _LaneGenerator(_FastPathGenerator):
+
+    """ Translates an analyzed block function to the source of a function
+    on lane vectors.
+
+    The values of signal k are V[k], and its next values N[k]. The
+    written signals are appended to W. The lanes for which a statement is
+    executed are given by the current mask.
+
+    """
+
+    def __init__(self, tree, index, clocks):
+        _FastPathGenerator.__init__(self, tree)
+        self.index = index
+        self.clocks = clocks
+        self.mask = "_all"
+        self.scalars = set()
+        self.count = 0
+
+    def temp(self, prefix):
+        self.count += 1
+        return "%s%d" % (prefix, self.count)
+
+    def source(self, name, reset=None, sigregs=()):
+        func = self.tree.body[0]
+        for n, obj in sorted(self.tree.vardict.items()):
+            if n not in self.tree.nonlocaldict:
+                self.write("l_%s = %r" % (n, False if isinstance(obj, bool)
+                                          else 0))
+        if reset is None:
+            self.body(func.body)
+        else:
+            # reset the registers in the lanes where reset is active
+            code, kind = self.expr_Signal(reset)
+            r = self.temp("_r")
+            self.write("%s = _bool(%s == %s)" % (r, code, reset.active))
+            self.masked("_all & %s" % r, lambda: [
+                self.assignValue(s, repr(_laneValue(s._init)),
+                                 _kindOf(s._init)) for s in sigregs])
+            self.masked("_all & ~%s" % r, lambda: self.body(func.body))
+        return "def _make(V, N, W, _all, %s):\n" \
+            "    def %s():\n" \
+            "%s\n" \
+            "    return %s\n" % (", ".join(["_np"] + [
+                self.names[id(obj)] for obj in self.objs]),
+                name, "\n".join(self.lines), name)
+
+    def masked(self, mask, action):
+        """ Run action for the lanes of mask, when there are any """
+        m = self.temp("_m")
+        self.write("%s = %s" % (m, mask))
+        self.write("if %s.any():" % m)
+        self.level += 1
+        n = len(self.lines)
+        outer, self.mask = self.mask, m
+        action()
+        self.mask = outer
+        if len(self.lines) == n:
+            self.write("pass")
+        self.level -= 1
+
+    def select(self, code, old):
+        if self.mask == "_all":
+            return "_where(_all, %s, %s)" % (code, old)
+        return "_where(%s, %s, %s)" % (self.mask, code, old)
+
+    # statements
+
+    def local(self, n):
+        if n in self.scalars:
+            raise _Unsupported("loop variable assignment")
+        return _FastPathGenerator.local(self, n)
+
+    def stmt_Assign(self, node):
+        if len(node.targets) != 1:
+            raise _Unsupported("multiple targets")
+        target = node.targets[0]
+        if isinstance(target, ast.Name):
+            code, kind = self.expr(node.value)
+            if kind not in (_BOOL, _INT) and not _isIntbv(kind):
+                raise _Unsupported("variable type")
+            name = self.local(target.id)
+            if kind is _BOOL and not isinstance(
+                    self.tree.vardict[target.id], bool):
+                code = "_i(%s)" % code
+            self.write("%s = %s" % (name, self.select(code, name)))
+        elif isinstance(target, ast.Attribute) and target.attr == 'next' \
+                and isinstance(getattr(target.value, 'obj', None), _Signal):
+            code, kind = self.expr(node.value)
+            self.assignValue(target.value.obj, code, kind)
+        else:
+            raise _Unsupported("assignment target")
+
+    def assignValue(self, sig, code, kind):
+        k = self.index.get(id(sig))
+        if k is None:
+            raise _Unsupported("assignment to a clock")
+        target = _kindOf(sig._init)
+        write = self.write
+        write("_v = %s" % code)
+        if target is _BOOL:
+            if kind is not _BOOL:
+                write("_check((_v != 0) & (_v != 1) & %s, %r)" %
+                      (self.mask, "Expected boolean value"))
+            write("_v = _bool(_v)")
+        elif _isIntbv(target):
+            if kind is _BOOL:
+                write("_v = _i(_v)")
+            elif kind not in (_INT,) and not _isIntbv(kind):
+                raise _Unsupported("assigned value")
+            lo, hi = sig._min, sig._max
+            if isinstance(sig._init, modbv):
+                write("_v = (_v - %d) %% %d + %d" % (lo, hi - lo, lo))
+            elif lo is not None:
+                write("_check(((_v < %d) | (_v >= %d)) & %s, %r)" %
+                      (lo, hi, self.mask, "intbv value out of range"))
+        elif _isBitArray(target):
+            if kind is _BOOL:
+                write("_v = _i(_v)")
+            elif _isBitArray(kind):
+                if kind[2] != target[2]:
+                    raise _Unsupported("signedness conversion")
+            elif kind is not _INT and not _isIntbv(kind):
+                raise _Unsupported("assigned value")
+            elif not target[2]:
+                write("_check((_v < 0) & %s, %r)" %
+                      (self.mask, "Only natural values are allowed"))
+            write("_v = %s" % _wrap("_v", target[1], target[2]))
+        elif kind is not _ENUM:
+            raise _Unsupported("assigned value")
+        write("N[%d] = %s" % (k, self.select("_v", "N[%d]" % k)))
+        write("W.append(%d)" % k)
+
+    def stmt_AugAssign(self, node):
+        op = _binops.get(type(node.op))
+        if op is None or not isinstance(node.target, ast.Name):
+            raise _Unsupported("augmented assignment")
+        name = self.local(node.target.id)
+        code, kind = self.binop(op, name, _INT, *self.expr(node.value))
+        self.write("%s = %s" % (name, self.select(code, name)))
+
+    def stmt_If(self, node):
+        if getattr(node, 'ignore', False):
+            raise _Unsupported("__debug__")
+        code, kind = self.expr(node.test)
+        c = self.temp("_c")
+        self.write("%s = _bool(%s)" % (c, code))
+        self.masked("%s & %s" % (self.mask, c), lambda: self.body(node.body))
+        if node.orelse:
+            self.masked("%s & ~%s" % (self.mask, c),
+                        lambda: self.body(node.orelse))
+
+    def stmt_For(self, node):
+        it = node.iter
+        if node.orelse or not isinstance(node.target, ast.Name) or \
+                not isinstance(it, ast.Call) or it.keywords or \
+                getattr(it.func, 'obj', None) is not range:
+            raise _Unsupported("for loop")
+        # the loop variable is the same in all lanes
+        args = []
+        for arg in it.args:
+            v = self.constant(arg)
+            if v is None:
+                if isinstance(arg, ast.Name) and arg.id in self.scalars:
+                    args.append("l_" + arg.id)
+                    continue
+                raise _Unsupported("range argument")
+            args.append(repr(v))
+        n = node.target.id
+        if n in self.tree.nonlocaldict:
+            raise _Unsupported("for loop")
+        self.scalars.add(n)
+        self.block("for l_%s in range(%s):" % (n, ", ".join(args)),
+                   node.body)
+
+    def stmt_While(self, node):
+        if node.orelse:
+            raise _Unsupported("while-else")
+        m = self.temp("_w")
+        self.write("%s = %s" % (m, self.mask))
+        self.write("while True:")
+        self.level += 1
+        code, kind = self.expr(node.test)
+        self.write("%s = %s & _bool(%s)" % (m, m, code))
+        self.write("if not %s.any():" % m)
+        self.write("    break")
+        outer, self.mask = self.mask, m
+        self.body(node.body)
+        self.mask = outer
+        self.level -= 1
+
+    def stmt_Break(self, node):
+        raise _Unsupported("break")
+
+    def stmt_Continue(self, node):
+        raise _Unsupported("continue")
+
+    def stmt_Return(self, node):
+        raise _Unsupported("return")
+
+    # expressions
+
+    def expr_Signal(self, sig):
+        if id(sig) in self.clocks:
+            return "%s._val" % self.bind(sig), _BOOL
+        k = self.index.get(id(sig))
+        if k is None:
+            raise _Unsupported("signal")
+        return "V[%d]" % k, _kindOf(sig._init)
+
+    readSignal = expr_Signal
+
+    def expr_Name(self, node):
+        n = node.id
+        if n in self.scalars:
+            return "l_" + n, _INT
+        obj = getattr(node, 'obj', None)
+        if n in self.tree.nonlocaldict:
+            raise _Unsupported("nonlocal variable")
+        if isinstance(obj, EnumItemType) and \
+                not isinstance(obj, _Signal):
+            return repr(obj._index), _ENUM
+        return _FastPathGenerator.expr_Name(self, node)
+
+    def expr_Attribute(self, node):
+        obj = getattr(node, 'obj', None)
+        if isinstance(obj, EnumItemType):
+            return repr(obj._index), _ENUM
+        return _FastPathGenerator.expr_Attribute(self, node)
+
+    def binop(self, op, l, lkind, r, rkind):
+        for kind in (lkind, rkind):
+            if kind in (_ENUM, _ROM):
+                raise _Unsupported("operand")
+        if _isBitArray(lkind) or _isBitArray(rkind):
+            return self.babinop(op, l, lkind, r, rkind)
+        if op in '&|^' and lkind is _BOOL and rkind is _BOOL:
+            return "(%s %s %s)" % (l, op, r), _BOOL
+        # arithmetic on bool lanes is logic in NumPy
+        if lkind is _BOOL:
+            l = "_i(%s)" % l
+        if rkind is _BOOL:
+            r = "_i(%s)" % r
+        return "(%s %s %s)" % (l, op, r), _INT
+
+    def babinop(self, op, l, lkind, r, rkind):
+        """ Operators on bit arrays, with the sizing of sintba """
+        if not _isBitArray(lkind):
+            # the int is converted to the bit array type
+            if op not in '+-*' or lkind not in (_INT,) and \
+                    not _isIntbv(lkind):
+                raise _Unsupported("operand")
+            lkind = rkind
+            l = _wrap(l, rkind[1], rkind[2])
+        width, signed = lkind[1], lkind[2]
+        rwidth = width
+        if _isBitArray(rkind):
+            rwidth = rkind[1]
+            if signed and not rkind[2]:
+                rwidth += 1
+            elif op in '&|^' and signed != rkind[2]:
+                raise _Unsupported("operand")
+        elif rkind is _BOOL:
+            r = "_i(%s)" % r
+        elif op in '&|^':
+            raise _Unsupported("operand")
+        if op in '+-&|^':
+            width = max(width, rwidth)
+        elif op == '*':
+            width = width + rwidth
+        elif op not in ('<<', '>>'):
+            raise _Unsupported("operator")
+        if width > 2 * _MAXBITS:
+            raise _Unsupported("width")
+        return _wrap("%s %s %s" % (l, op, r), width, signed), \
+            ('ba', width, signed)
+
+    def expr_BinOp(self, node):
+        op = _binops.get(type(node.op))
+        if op is None:
+            raise _Unsupported("operator")
+        return self.binop(op, *(self.expr(node.left) +
+                                self.expr(node.right)))
+
+    def expr_UnaryOp(self, node):
+        code, kind = self.expr(node.operand)
+        if kind in (_ENUM, _ROM):
+            raise _Unsupported("operand")
+        if isinstance(node.op, ast.Not):
+            return "(~_bool(%s))" % code, _BOOL
+        if _isBitArray(kind):
+            if isinstance(node.op, ast.UAdd):
+                return code, kind
+            if isinstance(node.op, ast.USub) and not kind[2]:
+                raise _Unsupported("negative unsigned")
+            op = '-' if isinstance(node.op, ast.USub) else '~'
+            return _wrap("%s%s" % (op, code), kind[1], kind[2]), kind
+        if kind is _BOOL:
+            code = "_i(%s)" % code
+        if isinstance(node.op, ast.USub):
+            return "(-%s)" % code, _INT
+        elif isinstance(node.op, ast.UAdd):
+            return code, _INT
+        if _isIntbv(kind) and kind[1] and kind[2] >= 0:
+            return "(~%s & %d)" % (code, (1 << kind[1]) - 1), _INT
+        return "(~%s)" % code, _INT
+
+    def expr_BoolOp(self, node):
+        op = ' & ' if isinstance(node.op, ast.And) else ' | '
+        codes = []
+        for v in node.values:
+            code, kind = self.expr(v)
+            if kind in (_ENUM, _ROM):
+                raise _Unsupported("operand")
+            codes.append("_bool(%s)" % code)
+        return "(%s)" % op.join(codes), _BOOL
+
+    def expr_Compare(self, node):
+        left, lkind = self.expr(node.left)
+        terms = []
+        for op, comparator in zip(node.ops, node.comparators):
+            o = _cmpops.get(type(op))
+            if o is None:
+                raise _Unsupported("comparison")
+            right, rkind = self.expr(comparator)
+            if _ROM in (lkind, rkind) or (_ENUM in (lkind, rkind) and
+                                          o not in ('==', '!=')):
+                raise _Unsupported("comparison")
+            terms.append("(%s %s %s)" % (left, o, right))
+            left, lkind = right, rkind
+        return "(%s)" % " & ".join(terms), _BOOL
+
+    def expr_IfExp(self, node):
+        test, tkind = self.expr(node.test)
+        body, bkind = self.expr(node.body)
+        orelse, okind = self.expr(node.orelse)
+        if bkind != okind and (_ENUM in (bkind, okind) or
+                               _BOOL in (bkind, okind) or
+                               _isBitArray(bkind) or _isBitArray(okind)):
+            raise _Unsupported("conditional expression")
+        kind = bkind if bkind == okind and not _isIntbv(bkind) else _INT
+        return "_where(_bool(%s), %s, %s)" % (test, body, orelse), kind
+
+    def expr_Subscript(self, node):
+        index = node.slice
+        sigs = getattr(node.value, 'obj', None)
+        if _isListOfSigs(sigs):
+            return self.listItem(sigs, index)
+        code, kind = self.expr(node.value)
+        if kind is _ROM:
+            i, ikind = self.expr(index)
+            return "%s[_i(%s)]" % (code, i), _INT
+        if not _isBitArray(kind):
+            return _FastPathGenerator.expr_Subscript(self, node)
+        width, signed = kind[1], kind[2]
+        if isinstance(index, ast.Slice):
+            if index.step is not None:
+                raise _Unsupported("slice step")
+            i = width if index.lower is None else self.constant(index.lower)
+            j = 0 if index.upper is None else self.constant(index.upper)
+            if i is None or j is None or not 0 <= j < i <= width:
+                raise _Unsupported("slice")
+            return _wrap("%s >> %d" % (code, j), i - j, signed), \
+                ('ba', i - j, signed)
+        i, ikind = self.expr(index)
+        return "(%s >> %s & 1 == 1)" % (code, i), _BOOL
+
+    def listItem(self, sigs, index):
+        """ Read an item of a list of signals with a constant index, or
+        with the variable of a for loop.
+
+        """
+        i = self.constant(index)
+        if i is not None:
+            if not 0 <= i < len(sigs):
+                raise _Unsupported("index")
+            return self.expr_Signal(sigs[i])
+        if not isinstance(index, ast.Name) or index.id not in self.scalars:
+            raise _Unsupported("index")
+        kinds = set(_kindOf(s._init) for s in sigs)
+        if len(kinds) != 1 or not all(id(s) in self.index for s in sigs):
+            raise _Unsupported("list of signals")
+        table = self.bind(tuple(self.index[id(s)] for s in sigs))
+        return "V[%s[l_%s]]" % (table, index.id), kinds.pop()
+
+    def expr_Call(self, node):
+        f = getattr(node.func, 'obj', None)
+        if node.keywords or len(node.args) != 1:
+            raise _Unsupported("call")
+        if f is len:
+            return _FastPathGenerator.expr_Call(self, node)
+        if f not in (int, bool, abs):
+            raise _Unsupported("call")
+        code, kind = self.expr(node.args[0])
+        if kind in (_ENUM, _ROM):
+            raise _Unsupported("call")
+        if f is bool:
+            return "_bool(%s)" % code, _BOOL
+        if f is int:
+            return "_i(%s)" % code, _INT
+        if _isBitArray(kind):
+            return _wrap("abs(%s)" % code, kind[1], kind[2]), kind
+        if kind is _BOOL:
+            code = "_i(%s)" % code
+        return "abs(%s)" % code, _INT
+
+
+def _check(bad, msg):
+    if bad.any():
+        raise ValueError("%s in lane %d" % (msg, int(bad.argmax())))
+
+
+class _LaneValues(object):
+
+    """ The lane values of the signals of a lane simulation.
+
+    Indexing with a signal returns a copy of its current lane values.
+    Assigning values, a sequence with a value per lane or a single value
+    for all lanes, sets its next lane values, which are updated at the
+    start of the next run.
+
+    """
+
+    def __init__(self, kernel):
+        self._kernel = kernel
+
+    def __len__(self):
+        return self._kernel.lanes
+
+    def __getitem__(self, sig):
+        return self._kernel.values[self._kernel._index(sig)].copy()
+
+    def __setitem__(self, sig, values):
+        kernel = self._kernel
+        k = kernel._index(sig)
+        if isinstance(values, (intbv, bitarray, EnumItemType)):
+            values = _laneValue(values)
+        dtype = bool if sig._type is bool else np.int64
+        values = np.array(values, dtype=dtype)
+        kernel.nexts[k] = np.broadcast_to(values, (kernel.lanes,)).copy()
+        kernel.written.append(k)
+
+
+class _LaneKernel(_CycleKernel):
+
+    """ Cycle kernel that simulates a number of lanes at once """
+
+    def __init__(self, arglist, waiters, lanes):
+        if np is None:
+            raise SimulationError(_error.NumPy)
+        if not isinstance(lanes, int) or isinstance(lanes, bool) or \
+                lanes < 1:
+            raise SimulationError(_error.Lanes, repr(lanes))
+        _CycleKernel.__init__(self, arglist, waiters)
+        self.lanes = lanes
+        clocks = set(id(arg.sig) for arg in arglist if isinstance(arg, Clock))
+        sigs = []
+        index = {}
+        for block in self.blocks:
+            reset = getattr(block, 'reset', None)
+            for s in _blockSignals(block) + ([reset] if reset is not None else []):
+                if id(s) not in clocks and id(s) not in index:
+                    index[id(s)] = len(sigs)
+                    sigs.append(s)
+        self.sigs = sigs
+        self.index = index
+        self.values = []
+        for s in sigs:
+            try:
+                kind = _kindOf(s._init)
+            except _Unsupported:
+                raise SimulationError(_error.Block, "signal type %s" %
+                                      type(s._init).__name__)
+            if kind[0] in ('intbv', 'ba') and \
+                    not 0 < kind[1] <= _MAXBITS:
+                raise SimulationError(_error.Width, "%d bits" % kind[1])
+            dtype = bool if kind is _BOOL else np.int64
+            self.values.append(np.full(lanes, _laneValue(s._init), dtype))
+        self.nexts = list(self.values)
+        self.written = []
+        self.all = np.ones(lanes, bool)
+        self.funcs = [self._translate(block, clocks)
+                      for block in self.blocks]
+
+    def _index(self, sig):
+        k = self.index.get(id(sig))
+        if k is None:
+            raise SimulationError(_error.Signal, repr(sig))
+        return k
+
+    def _translate(self, block, clocks):
+        func = block.func
+        try:
+            for obj in block.symdict.values():
+                if isinstance(obj, SignalArray):
+                    raise _Unsupported("signal array")
+            tree = _analyze(block)
+            v = _LaneGenerator(tree, self.index, clocks)
+            if getattr(block, 'varregs', None):
+                raise _Unsupported("variables in always_seq")
+            src = v.source(func.__name__, getattr(block, 'reset', None),
+                           getattr(block, 'sigregs', ()))
+        except Exception as e:
+            # unsupported constructs, or rejected by the analyzer
+            raise SimulationError(_error.Block, "%s: %s" %
+                                  (func.__qualname__, e))
+        namespace = {'_where': np.where, '_check': _check,
+                     '_bool': lambda x: np.asarray(x, dtype=bool),
+                     '_i': lambda x: np.asarray(x, dtype=np.int64)}
+        exec(compile(src, "<lanes %s>" % func.__qualname__, 'exec'),
+             namespace)
+        objs = [np.asarray(obj) if isinstance(obj, tuple) else obj
+                for obj in v.objs]
+        lanefunc = namespace['_make'](self.values, self.nexts, self.written,
+                                      self.all, np, *objs)
+        lanefunc.__qualname__ = func.__qualname__
+        return lanefunc
+
+    def _commit(self, siglist):
+        """ Update the written signals, and mark the blocks that read the
+        changed ones. Returns the number of updates.
+
+        """
+        values, nexts, index = self.values, self.nexts, self.index
+        n = 0
+        # signal updates scheduled outside of the run apply to all lanes
+        for s in siglist:
+            s._dirty = False
+            k = index.get(id(s))
+            if k is None:
+                if s._next != s._val:
+                    self._mark(s)
+            else:
+                _LaneValues(self)[s] = s._next
+            s._update()
+        del siglist[:]
+        written = self.written
+        for k in set(written):
+            n += 1
+            if not np.array_equal(values[k], nexts[k]):
+                values[k] = nexts[k]
+                self._mark(self.sigs[k])
+        del written[:]
+        return n
@@ -0,0 +1,254 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Levelized evaluation of always_comb networks.
+
+An always_comb block that drives the inputs of other always_comb blocks
+is woken again in each delta cycle in which one of its inputs settles.
+The levelization pass orders the blocks of such networks topologically,
+and evaluates the blocks that are triggered in a delta cycle in that
+order, committing their outputs immediately. Each block then runs at most
+once per wave of input changes. The other readers of the outputs resume
+in the next delta cycle, as they would without levelization. Blocks in
+combinational loops keep their event-driven waiters.
+
+"""
+
+from heapq import heappush, heappop
+
+from ._always_comb import _AlwaysComb
+from ._Signal import _Signal, _isListOfSigs
+from ._SignalArray import SignalArray
+from ._simulator import _simulator
+from ._Waiter import _RESUMED
+
+
+class _CombNetwork(object):
+
+    """ Evaluates a levelized network of always_comb blocks.
+
+    The blocks are triggered by generators that wait on the block inputs
+    with the regular waiters. A triggered block is marked, and the network
+    is scheduled at the bottom of the waiter stack of the kernel, so that
+    it runs when the other waiters of the delta cycle have run.
+
+    The outputs are committed as soon as a block has run, for the blocks
+    of the network that read them. The network then enters the signal
+    list of the kernel itself, and hands the other waiters of the outputs
+    back to the kernel when it updates the signals at the end of the delta
+    cycle.
+
+    """
+
+    def __init__(self, blocks, levels, waiters, funcs):
+        self.blocks = blocks
+        self.funcs = funcs
+        self.levels = levels
+        self.waiters = waiters
+        self.marked = [False] * len(blocks)
+        self.pending = []
+        self.scheduled = False
+        self.running = False
+        self.triggers = set()
+        self.deferred = []
+        self._dirty = False
+
+    def trigger(self, i):
+        """ Return a waiter that marks block i when its inputs change """
+        block = self.blocks[i]
+        gen = self._genfunc(i, block.senslist)
+        self.triggers.add(id(gen))
+        return block._waiter()(gen)
+
+    def _genfunc(self, i, senslist):
+        if len(senslist) == 1:
+            senslist = senslist[0]
+        mark = self._mark
+        while 1:
+            mark(i)
+            yield senslist
+
+    def _mark(self, i):
+        if self.marked[i]:
+            return
+        self.marked[i] = True
+        heappush(self.pending, (self.levels[i], i))
+        if not self.running and not self.scheduled:
+            self.scheduled = True
+            self.waiters.insert(0, self)
+
+    def next(self, waiters, actives, exc):
+        self.scheduled = False
+        self.running = True
+        pending, marked, funcs = self.pending, self.marked, self.funcs
+        triggers, deferred = self.triggers, self.deferred
+        siglist = _simulator._siglist
+        try:
+            while pending:
+                i = heappop(pending)[1]
+                marked[i] = False
+                n = len(siglist)
+                funcs[i]()
+                # commit the outputs, and mark the blocks that read them
+                outputs = siglist[n:]
+                del siglist[n:]
+                for s in outputs:
+                    s._dirty = False
+                    for waiter in s._update():
+                        if id(waiter.generator) in triggers:
+                            waiter.next(waiters, actives, exc)
+                        else:
+                            deferred.append(waiter)
+        finally:
+            self.running = False
+            if deferred and not self._dirty:
+                self._dirty = True
+                siglist.append(self)
+        return _RESUMED
+
+    def _update(self):
+        """ Return the other waiters of the committed outputs """
+        deferred = self.deferred
+        self.deferred = []
+        return deferred
+
+
+def _sigs(obj):
+    if isinstance(obj, (_Signal, SignalArray)):
+        return [obj]
+    if _isListOfSigs(obj):
+        return obj
+    return []
+
+
+def _loops(succs):
+    """ Return the nodes that are part of a loop in the graph succs.
+
+    Iterative version of Tarjan's strongly connected components algorithm.
+
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    onstack = set()
+    looped = set()
+    counter = 0
+    for root in range(len(succs)):
+        if root in index:
+            continue
+        work = [(root, 0)]
+        while work:
+            v, pos = work.pop()
+            if pos == 0:
+                index[v] = lowlink[v] = counter
+                counter += 1
+                stack.append(v)
+                onstack.add(v)
+            for j in range(pos, len(succs[v])):
+                w = succs[v][j]
+                if w not in index:
+                    work.append((v, j + 1))
+                    work.append((w, 0))
+                    break
+                if w in onstack:
+                    lowlink[v] = min(lowlink[v], index[w])
+            else:
+                if lowlink[v] == index[v]:
+                    scc = []
+                    while True:
+                        w = stack.pop()
+                        onstack.discard(w)
+                        scc.append(w)
+                        if w == v:
+                            break
+                    if len(scc) > 1:
+                        looped.update(scc)
+                if work:
+                    u = work[-1][0]
+                    lowlink[u] = min(lowlink[u], lowlink[v])
+    return looped
+
+
+def _combGraph(combs):
+    """ Return the successors and predecessors of each always_comb block """
+    drivers = {}
+    for i, comb in enumerate(combs):
+        for n in comb.outputs:
+            for s in _sigs(comb.symdict[n]):
+                drivers.setdefault(id(s), []).append(i)
+    succs = [[] for comb in combs]
+    preds = [[] for comb in combs]
+    for j, comb in enumerate(combs):
+        for s in comb.senslist:
+            for i in drivers.get(id(s), ()):
+                if i != j and j not in succs[i]:
+                    succs[i].append(j)
+                    preds[j].append(i)
+    return succs, preds
+
+
+def _levels(nodes, succs, preds):
+    """ Return the level of each of the nodes of an acyclic graph """
+    inside = set(nodes)
+    indegree = dict((i, len([k for k in preds[i] if k in inside]))
+                    for i in nodes)
+    ready = [i for i in nodes if not indegree[i]]
+    levels = dict.fromkeys(ready, 0)
+    while ready:
+        i = ready.pop()
+        for j in succs[i]:
+            if j in inside:
+                levels[j] = max(levels.get(j, 0), levels[i] + 1)
+                indegree[j] -= 1
+                if not indegree[j]:
+                    ready.append(j)
+    return levels
+
+
+def _levelize(arglist, waiters, funcs=None):
+    """ Levelize the networks of always_comb blocks in arglist.
+
+    The waiters of the levelized blocks in waiters are replaced by the
+    waiters of their triggers. funcs maps the ids of blocks to the
+    functions to call instead of theirs. Returns the network, or None
+    when there is nothing to levelize.
+
+    """
+    if funcs is None:
+        funcs = {}
+    combs = [arg for arg in arglist if isinstance(arg, _AlwaysComb)]
+    if len(combs) < 2:
+        return None
+    succs, preds = _combGraph(combs)
+    looped = _loops(succs)
+    # levelize the blocks outside loops that are connected to another one
+    nodes = [i for i in range(len(combs)) if i not in looped and
+             [k for k in succs[i] + preds[i] if k not in looped]]
+    if not nodes:
+        return None
+    levels = _levels(nodes, succs, preds)
+
+    blocks = [combs[i] for i in nodes]
+    network = _CombNetwork(blocks, [levels[i] for i in nodes], waiters,
+                           [funcs.get(id(block), block.func)
+                            for block in blocks])
+    gens = dict((id(block.gen), k) for k, block in enumerate(blocks))
+    for n, waiter in enumerate(waiters):
+        k = gens.get(id(waiter.generator))
+        if k is not None:
+            waiters[n] = network.trigger(k)
+    return network
@@ -27,14 +27,15 @@ downrange -- function that returns a downward range
 
 
 
-import inspect
+import sys
 
 from ._Cosimulation import Cosimulation
+from ._clock import Clock
 from ._instance import _Instantiator
 
 
 def _isGenSeq(obj):
-    if isinstance(obj, (Cosimulation, _Instantiator)):
+    if isinstance(obj, (Cosimulation, _Instantiator, Clock)):
         return True
     if not isinstance(obj, (list, tuple, set)):
         return False
@@ -51,8 +52,7 @@ def _get_instances(locals):
 
 
 def instances():
-    f = inspect.currentframe()
-    d = inspect.getouterframes(f)[1][0].f_locals
+    d = sys._getframe(1).f_locals
     return list(_get_instances(d).values())
 
 
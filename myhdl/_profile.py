@@ -0,0 +1,167 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Per-instance execution profile of a simulation.
+
+In profiling mode, the generator of each instance is wrapped in an object
+that counts and times its activations. The waiters resume the wrapper as
+any other generator, so the kernel is not instrumented and profiling costs
+nothing when it is off.
+
+"""
+
+import json
+import sys
+from time import perf_counter
+from types import GeneratorType
+
+from ._extractHierarchy import _instanceNames
+from ._instance import _Instantiator
+
+
+class _error:
+    pass
+_error.SortKey = "Unknown profile sort key"
+
+
+class _ProfileEntry(object):
+
+    """ Activation count and cumulative time of an instance """
+
+    __slots__ = ('name', 'calls', 'time')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.time = 0.0
+
+
+class _ProfiledGenerator(object):
+
+    __slots__ = ('gen', 'entry')
+
+    def __init__(self, gen, entry):
+        self.gen = gen
+        self.entry = entry
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        entry = self.entry
+        entry.calls += 1
+        start = perf_counter()
+        try:
+            return next(self.gen)
+        finally:
+            entry.time += perf_counter() - start
+
+
+class _ProfiledFunction(object):
+
+    __slots__ = ('func', 'entry')
+
+    def __init__(self, func, entry):
+        self.func = func
+        self.entry = entry
+
+    def __call__(self):
+        entry = self.entry
+        entry.calls += 1
+        start = perf_counter()
+        try:
+            return self.func()
+        finally:
+            entry.time += perf_counter() - start
+
+
+def _instanceName(arg):
+    """ Return the hierarchical name of an instance when it is known """
+    if isinstance(arg, _Instantiator):
+        name = _instanceNames.get(arg)
+        if name is None:
+            name = arg.funcobj.__qualname__
+        return name
+    return arg.__qualname__
+
+
+_sortKeys = {'time': lambda e: (-e.time, e.name),
+             'calls': lambda e: (-e.calls, e.name),
+             'name': lambda e: e.name,
+             }
+
+
+class _Profile(object):
+
+    """ Execution profile of the instances of a simulation.
+
+    Methods:
+    sorted -- return the sorted entries
+    print_stats -- print a table of the entries
+    dump -- write the entries to a JSON file
+
+    """
+
+    def __init__(self, arglist, waiters, network=None):
+        gens = {}
+        for arg in arglist:
+            if isinstance(arg, _Instantiator):
+                gens[id(arg.gen)] = arg
+            elif isinstance(arg, GeneratorType):
+                gens[id(arg)] = arg
+        self.entries = []
+        for waiter in waiters:
+            arg = gens.get(id(waiter.generator))
+            if arg is not None:
+                entry = _ProfileEntry(_instanceName(arg))
+                self.entries.append(entry)
+                waiter.generator = _ProfiledGenerator(waiter.generator,
+                                                      entry)
+        # levelized always_comb blocks are called by their network
+        if network is not None:
+            funcs = network.funcs
+            for i, block in enumerate(network.blocks):
+                entry = _ProfileEntry(_instanceName(block))
+                self.entries.append(entry)
+                funcs[i] = _ProfiledFunction(funcs[i], entry)
+
+    def sorted(self, sort='time'):
+        """ Return the entries sorted on 'time', 'calls' or 'name' """
+        if sort not in _sortKeys:
+            raise ValueError("%s: %r" % (_error.SortKey, sort))
+        return sorted(self.entries, key=_sortKeys[sort])
+
+    def print_stats(self, sort='time', file=None):
+        """ Print a table of the entries, sorted on 'time' (default),
+        'calls' or 'name'.
+
+        """
+        if file is None:
+            file = sys.stdout
+        print("%10s %12s %12s  %s" % ("ncalls", "tottime", "percall",
+                                      "instance"), file=file)
+        for e in self.sorted(sort):
+            percall = e.time / e.calls if e.calls else 0.0
+            print("%10d %12.6f %12.9f  %s" % (e.calls, e.time, percall,
+                                              e.name), file=file)
+
+    def dump(self, path):
+        """ Write the entries to a JSON file """
+        data = [{'name': e.name, 'calls': e.calls, 'time': e.time}
+                for e in self.sorted()]
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=1)
@@ -24,6 +24,48 @@ def _resolveRefs(symdict, arg):
     return data.objlist
 
 
+# attributes that _AttrRefTransformer leaves alone
+_reserved = ('next',  'posedge',  'negedge',  'max',  'min',  'val', 'signed')
+
+
+def _isReserved(attr):
+    return attr in _reserved or attr in numeric_attributes_dict or \
+        attr in numeric_functions_dict.values()
+
+
+def _attrRefs(tree):
+    """ Return the attribute references that _AttrRefTransformer may resolve.
+
+    The result is a list of (name, attr) pairs, which doesn't depend on a
+    symdict, or None when a reference may resolve to a nested one.
+
+    """
+    refs = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Attribute) or _isReserved(node.attr):
+            continue
+        if isinstance(node.value, ast.Name):
+            refs.append((node.value.id, node.attr))
+        elif isinstance(node.value, ast.Attribute) and \
+                not _isReserved(node.value.attr):
+            return None
+    return refs
+
+
+def _resolvesRefs(symdict, refs):
+    """ Return True if _AttrRefTransformer resolves one of the refs """
+    for name, attr in refs:
+        if name not in symdict:
+            continue
+        obj = symdict[name]
+        if isinstance(obj, (EnumType, FunctionType)):
+            continue
+        elif isinstance(obj, SignalType) and hasattr(SignalType, attr):
+            continue
+        return True
+    return False
+
+
 # TODO: Refactor this into two separate nodetransformers, since _resolveRefs
 # needs only the names, not the objects
 
@@ -45,13 +87,7 @@ class _AttrRefTransformer(ast.NodeTransformer):
     def visit_Attribute(self, node):
         self.generic_visit(node)
 
-        reserved = ('next',  'posedge',  'negedge',  'max',  'min',  'val',
-                    'signed')
-        if node.attr in reserved:
-            return node
-        elif node.attr in numeric_attributes_dict:
-            return node
-        elif node.attr in numeric_functions_dict.values():
+        if _isReserved(node.attr):
             return node
 
         # Don't handle subscripts for now.
@@ -0,0 +1,500 @@
+/*
+ *  This file is part of the myhdl library, a Python package for using
+ *  Python as a Hardware Description Language.
+ *
+ *  The myhdl library is free software; you can redistribute it and/or
+ *  modify it under the terms of the GNU Lesser General Public License as
+ *  published by the Free Software Foundation; either version 2.1 of the
+ *  License, or (at your option) any later version.
+ *
+ *  This library is distributed in the hope that it will be useful, but
+ *  WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ *  Lesser General Public License for more details.
+ *
+ *  You should have received a copy of the GNU Lesser General Public
+ *  License along with this library; if not, write to the Free Software
+ *  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+ */
+
+/*
+ * Compiled simulation kernel used by Simulation.runc.
+ *
+ * run() is a line by line translation of myhdl._Simulation._run: it
+ * executes the delta cycle and future event loop until the simulation
+ * stops, suspends or raises. Waiters, signals and the future event queue
+ * are the Python objects of the kernel and are driven through their
+ * regular methods, so the event order is identical to Simulation.run.
+ * Setup and exception handling stay in Simulation._runKernel.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include "Python.h"
+
+/* number of time steps between purges of stale waiters,
+   same as myhdl._Simulation._PURGE_INTERVAL */
+#define PURGE_INTERVAL 32
+
+/* number of time steps, or delta cycles in a time step, between checks
+   of the progress callback, same as myhdl._Simulation._PROGRESS_INTERVAL */
+#define PROGRESS_INTERVAL 1024
+
+static PyObject *simulator;         /* myhdl._simulator._simulator */
+static PyObject *WaiterType;        /* myhdl._Waiter._Waiter */
+static PyObject *StopSimulation;
+static PyObject *SuspendSimulation;
+
+static PyObject *str_siglist;
+static PyObject *str_futureEvents;
+static PyObject *str_time;
+static PyObject *str_tracing;
+static PyObject *str_tf;
+static PyObject *str_update;
+static PyObject *str_next;
+static PyObject *str_purge;
+static PyObject *str_get;
+static PyObject *str_put;
+static PyObject *str_hasChange;
+static PyObject *str_nextTime;
+static PyObject *str_popEvents;
+static PyObject *str_apply;
+static PyObject *str_write;
+static PyObject *str_dirty;
+static PyObject *str_callback;
+
+
+/* waiters.extend(seq) */
+static int
+extend(PyObject *waiters, PyObject *seq)
+{
+    Py_ssize_t n = PyList_GET_SIZE(waiters);
+
+    if (PyList_CheckExact(seq)) {
+        return PyList_SetSlice(waiters, n, n, seq);
+    }
+    else {
+        PyObject *r = PyObject_CallMethod(waiters, "extend", "O", seq);
+        if (r == NULL) {
+            return -1;
+        }
+        Py_DECREF(r);
+        return 0;
+    }
+}
+
+
+/* Purge the waiter lists in actives */
+static int
+purge(PyObject *actives)
+{
+    PyObject *key, *value, *r;
+    Py_ssize_t pos = 0;
+
+    while (PyDict_Next(actives, &pos, &key, &value)) {
+        r = PyObject_CallMethodNoArgs(value, str_purge);
+        if (r == NULL) {
+            return -1;
+        }
+        Py_DECREF(r);
+    }
+    return 0;
+}
+
+
+/* Call cosim._put(t) */
+static int
+cosim_put(PyObject *cosim, PyObject *t)
+{
+    PyObject *r = PyObject_CallMethodOneArg(cosim, str_put, t);
+    if (r == NULL) {
+        return -1;
+    }
+    Py_DECREF(r);
+    return 0;
+}
+
+
+/* Report the activity counts of the run to stats._update or stats._tick */
+static int
+report(PyObject *stats, const char *method, long long timesteps,
+       long long deltas, long long maxdeltas, long long updates,
+       long long resumptions)
+{
+    PyObject *r = PyObject_CallMethod(stats, method, "LLLLL", timesteps,
+                                      deltas, maxdeltas, updates,
+                                      resumptions);
+    if (r == NULL) {
+        return -1;
+    }
+    Py_DECREF(r);
+    return 0;
+}
+
+
+static PyObject *
+run(PyObject *self, PyObject *args)
+{
+    PyObject *waiters, *cosim, *maxTime, *duration, *exc, *stats;
+    PyObject *exc_type, *exc_value, *exc_tb;
+    PyObject *siglist = NULL, *futureEvents = NULL, *tracefile = NULL;
+    PyObject *actives = NULL, *t = NULL;
+    PyObject *item, *r, *events;
+    Py_ssize_t i, n;
+    int tracing, has_cosim, truth, progress;
+    int steps = 0;
+    long long timesteps = 0, deltas = 0, stepdeltas = 0, maxdeltas = 0;
+    long long updates = 0, resumptions = 0;
+
+    if (!PyArg_ParseTuple(args, "O!OOOO!O:run", &PyList_Type, &waiters,
+                          &cosim, &maxTime, &duration, &PyList_Type, &exc,
+                          &stats)) {
+        return NULL;
+    }
+    has_cosim = PyObject_IsTrue(cosim);
+    if (has_cosim < 0) {
+        return NULL;
+    }
+    item = PyObject_GetAttr(stats, str_callback);
+    if (item == NULL) {
+        return NULL;
+    }
+    progress = item != Py_None;
+    Py_DECREF(item);
+
+    siglist = PyObject_GetAttr(simulator, str_siglist);
+    if (siglist == NULL) {
+        goto error;
+    }
+    if (!PyList_Check(siglist)) {
+        PyErr_SetString(PyExc_TypeError, "_simulator._siglist must be a list");
+        goto error;
+    }
+    futureEvents = PyObject_GetAttr(simulator, str_futureEvents);
+    if (futureEvents == NULL) {
+        goto error;
+    }
+    t = PyObject_GetAttr(simulator, str_time);
+    if (t == NULL) {
+        goto error;
+    }
+    item = PyObject_GetAttr(simulator, str_tracing);
+    if (item == NULL) {
+        goto error;
+    }
+    tracing = PyObject_IsTrue(item);
+    Py_DECREF(item);
+    if (tracing < 0) {
+        goto error;
+    }
+    if (tracing) {
+        tracefile = PyObject_GetAttr(simulator, str_tf);
+        if (tracefile == NULL) {
+            goto error;
+        }
+    }
+    actives = PyDict_New();
+    if (actives == NULL) {
+        goto error;
+    }
+
+    for (;;) {
+
+        stepdeltas++;
+        if (progress && stepdeltas % PROGRESS_INTERVAL == 0 &&
+            report(stats, "_tick", timesteps, deltas + stepdeltas,
+                   stepdeltas > maxdeltas ? stepdeltas : maxdeltas,
+                   updates, resumptions) < 0) {
+            goto error;
+        }
+
+        /* signal updates */
+        updates += PyList_GET_SIZE(siglist);
+        for (i = 0; i < PyList_GET_SIZE(siglist); i++) {
+            item = PyList_GET_ITEM(siglist, i);
+            Py_INCREF(item);
+            if (PyObject_SetAttr(item, str_dirty, Py_False) < 0) {
+                Py_DECREF(item);
+                goto error;
+            }
+            r = PyObject_CallMethodNoArgs(item, str_update);
+            Py_DECREF(item);
+            if (r == NULL) {
+                goto error;
+            }
+            truth = extend(waiters, r);
+            Py_DECREF(r);
+            if (truth < 0) {
+                goto error;
+            }
+        }
+        if (PyList_SetSlice(siglist, 0, PY_SSIZE_T_MAX, NULL) < 0) {
+            goto error;
+        }
+
+        /* waiters */
+        while ((n = PyList_GET_SIZE(waiters)) > 0) {
+            item = PyList_GET_ITEM(waiters, n - 1);
+            Py_INCREF(item);
+            if (PyList_SetSlice(waiters, n - 1, n, NULL) < 0) {
+                Py_DECREF(item);
+                goto error;
+            }
+            r = PyObject_CallMethodObjArgs(item, str_next,
+                                           waiters, actives, exc, NULL);
+            Py_DECREF(item);
+            if (r == NULL) {
+                goto error;
+            }
+            truth = PyObject_IsTrue(r);
+            Py_DECREF(r);
+            if (truth < 0) {
+                goto error;
+            }
+            resumptions += truth;
+        }
+
+        if (has_cosim) {
+            r = PyObject_CallMethodNoArgs(cosim, str_get);
+            if (r == NULL) {
+                goto error;
+            }
+            Py_DECREF(r);
+            if (PyList_GET_SIZE(siglist) > 0) {
+                truth = 1;
+            }
+            else {
+                item = PyObject_GetAttr(cosim, str_hasChange);
+                if (item == NULL) {
+                    goto error;
+                }
+                truth = PyObject_IsTrue(item);
+                Py_DECREF(item);
+                if (truth < 0) {
+                    goto error;
+                }
+            }
+            if (truth) {
+                if (cosim_put(cosim, t) < 0) {
+                    goto error;
+                }
+                continue;
+            }
+        }
+        else if (PyList_GET_SIZE(siglist) > 0) {
+            continue;
+        }
+
+        if (PyDict_GET_SIZE(actives) > 0 && ++steps == PURGE_INTERVAL) {
+            if (purge(actives) < 0) {
+                goto error;
+            }
+            PyDict_Clear(actives);
+            steps = 0;
+        }
+
+        /* at this point it is safe to potentially suspend a simulation */
+        if (PyList_GET_SIZE(exc) > 0) {
+            item = PyList_GET_ITEM(exc, 0);
+            PyErr_SetObject((PyObject *)Py_TYPE(item), item);
+            goto error;
+        }
+
+        /* future events */
+        truth = PyObject_IsTrue(futureEvents);
+        if (truth < 0) {
+            goto error;
+        }
+        if (!truth) {
+            PyErr_SetString(StopSimulation, "No more events");
+            goto error;
+        }
+        if (maxTime != Py_None) {
+            truth = PyObject_RichCompareBool(t, maxTime, Py_EQ);
+            if (truth < 0) {
+                goto error;
+            }
+            if (truth) {
+                if (purge(actives) < 0) {
+                    goto error;
+                }
+                PyErr_Format(SuspendSimulation, "Simulated %S timesteps",
+                             duration);
+                goto error;
+            }
+        }
+        Py_SETREF(t, PyObject_CallMethodNoArgs(futureEvents, str_nextTime));
+        if (t == NULL) {
+            goto error;
+        }
+        if (PyObject_SetAttr(simulator, str_time, t) < 0) {
+            goto error;
+        }
+        timesteps++;
+        deltas += stepdeltas;
+        if (stepdeltas > maxdeltas) {
+            maxdeltas = stepdeltas;
+        }
+        stepdeltas = 0;
+        if (progress && timesteps % PROGRESS_INTERVAL == 0 &&
+            report(stats, "_tick", timesteps, deltas, maxdeltas, updates,
+                   resumptions) < 0) {
+            goto error;
+        }
+        if (tracing) {
+            item = PyUnicode_FromFormat("#%S\n", t);
+            if (item == NULL) {
+                goto error;
+            }
+            r = PyObject_CallMethodOneArg(tracefile, str_write, item);
+            Py_DECREF(item);
+            if (r == NULL) {
+                goto error;
+            }
+            Py_DECREF(r);
+        }
+        if (has_cosim && cosim_put(cosim, t) < 0) {
+            goto error;
+        }
+        events = PyObject_CallMethodOneArg(futureEvents, str_popEvents, t);
+        if (events == NULL) {
+            goto error;
+        }
+        if (!PyList_Check(events)) {
+            Py_SETREF(events, PySequence_List(events));
+            if (events == NULL) {
+                goto error;
+            }
+        }
+        for (i = 0; i < PyList_GET_SIZE(events); i++) {
+            item = PyList_GET_ITEM(events, i);
+            truth = PyObject_IsInstance(item, WaiterType);
+            if (truth < 0) {
+                Py_DECREF(events);
+                goto error;
+            }
+            if (truth) {
+                if (PyList_Append(waiters, item) < 0) {
+                    Py_DECREF(events);
+                    goto error;
+                }
+                continue;
+            }
+            Py_INCREF(item);
+            r = PyObject_CallMethodNoArgs(item, str_apply);
+            Py_DECREF(item);
+            if (r == NULL) {
+                Py_DECREF(events);
+                goto error;
+            }
+            truth = extend(waiters, r);
+            Py_DECREF(r);
+            if (truth < 0) {
+                Py_DECREF(events);
+                goto error;
+            }
+        }
+        Py_DECREF(events);
+    }
+
+  error:
+    /* report the counts, keeping the exception that ends the run */
+    PyErr_Fetch(&exc_type, &exc_value, &exc_tb);
+    if (report(stats, "_update", timesteps, deltas + stepdeltas,
+               stepdeltas > maxdeltas ? stepdeltas : maxdeltas,
+               updates, resumptions) < 0) {
+        Py_XDECREF(exc_type);
+        Py_XDECREF(exc_value);
+        Py_XDECREF(exc_tb);
+    }
+    else {
+        PyErr_Restore(exc_type, exc_value, exc_tb);
+    }
+    Py_XDECREF(siglist);
+    Py_XDECREF(futureEvents);
+    Py_XDECREF(tracefile);
+    Py_XDECREF(actives);
+    Py_XDECREF(t);
+    return NULL;
+}
+
+
+PyDoc_STRVAR(run_doc,
+"run(waiters, cosim, maxTime, duration, exc, stats)\n\
+\n\
+Run the simulation kernel loop. Never returns normally: the loop ends\n\
+with StopSimulation, _SuspendSimulation or any exception raised by the\n\
+simulated generators. The activity counts are reported to stats.");
+
+static PyMethodDef simrunc_methods[] = {
+    {"run", run, METH_VARARGS, run_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+
+static int
+intern_strings(void)
+{
+#define INTERN(var, s) \
+    if ((var = PyUnicode_InternFromString(s)) == NULL) return -1
+    INTERN(str_siglist, "_siglist");
+    INTERN(str_futureEvents, "_futureEvents");
+    INTERN(str_time, "_time");
+    INTERN(str_tracing, "_tracing");
+    INTERN(str_tf, "_tf");
+    INTERN(str_update, "_update");
+    INTERN(str_next, "next");
+    INTERN(str_purge, "purge");
+    INTERN(str_get, "_get");
+    INTERN(str_put, "_put");
+    INTERN(str_hasChange, "_hasChange");
+    INTERN(str_nextTime, "nextTime");
+    INTERN(str_popEvents, "popEvents");
+    INTERN(str_apply, "apply");
+    INTERN(str_write, "write");
+    INTERN(str_dirty, "_dirty");
+    INTERN(str_callback, "_callback");
+#undef INTERN
+    return 0;
+}
+
+
+static PyObject *
+import_attr(const char *module, const char *name)
+{
+    PyObject *m, *attr;
+
+    m = PyImport_ImportModule(module);
+    if (m == NULL) {
+        return NULL;
+    }
+    attr = PyObject_GetAttrString(m, name);
+    Py_DECREF(m);
+    return attr;
+}
+
+
+static struct PyModuleDef simrunc_module = {
+    PyModuleDef_HEAD_INIT,
+    "_simrunc",
+    "Compiled simulation kernel for Simulation.runc.",
+    -1,
+    simrunc_methods
+};
+
+
+PyMODINIT_FUNC
+PyInit__simrunc(void)
+{
+    if (intern_strings() < 0) {
+        return NULL;
+    }
+    if ((simulator = import_attr("myhdl._simulator", "_simulator")) == NULL ||
+        (WaiterType = import_attr("myhdl._Waiter", "_Waiter")) == NULL ||
+        (StopSimulation = import_attr("myhdl._errors",
+                                      "StopSimulation")) == NULL ||
+        (SuspendSimulation = import_attr("myhdl._errors",
+                                         "_SuspendSimulation")) == NULL) {
+        return NULL;
+    }
+    return PyModule_Create(&simrunc_module);
+}
@@ -24,17 +24,191 @@ now -- function that returns the current simulation time
 
 """
 
-class __simulator:
+import threading
+from heapq import heappush, heappop
+from itertools import count
+
+
+class _FutureEvents(list):
+
+    """ Priority queue of future events.
+
+    Events are scheduled by appending (time, event) pairs. Internally
+    the list is kept as a heap of (time, seqno, event) triples; the
+    sequence number keeps events scheduled at the same time in FIFO
+    order.
+
+    """
+
+    __slots__ = ('_seqno',)
+
     def __init__(self):
+        list.__init__(self)
+        self._seqno = count()
+
+    def append(self, event):
+        t, e = event
+        heappush(self, (t, next(self._seqno), e))
+
+    def nextTime(self):
+        """ Return the time of the earliest event """
+        return self[0][0]
+
+    def popEvents(self, t):
+        """ Remove and return the events scheduled at time t """
+        events = []
+        while self and self[0][0] == t:
+            events.append(heappop(self)[2])
+        return events
+
+    def events(self):
+        """ Return the (time, event) pairs in the queue, in order """
+        return [(t, e) for t, _, e in sorted(self)]
+
+
+class _TimingWheel(object):
+
+    """ Timing wheel for future events.
+
+    Events within 'size' time units of the current time are kept in
+    a ring of slots indexed by time, which gives O(1) insertion and
+    removal. Events further in the future overflow into a heap and
+    move to the wheel as time advances. As with _FutureEvents, events
+    at the same time are returned in FIFO order.
+
+    """
+
+    __slots__ = ('_slots', '_size', '_mask', '_base', '_count', '_overflow')
+
+    def __init__(self, size=1024):
+        if size <= 0 or size & (size - 1):
+            raise ValueError("timing wheel size should be a power of 2")
+        self._slots = [[] for _ in range(size)]
+        self._size = size
+        self._mask = size - 1
+        self._base = 0
+        self._count = 0
+        self._overflow = _FutureEvents()
+
+    def __len__(self):
+        return self._count + len(self._overflow)
+
+    def append(self, event):
+        t, e = event
+        if t - self._base < self._size:
+            self._slots[t & self._mask].append(e)
+            self._count += 1
+        else:
+            self._overflow.append(event)
+
+    def clear(self):
+        for slot in self._slots:
+            del slot[:]
+        del self._overflow[:]
+        self._base = 0
+        self._count = 0
+
+    def nextTime(self):
+        """ Return the time of the earliest event """
+        if not self._count:
+            return self._overflow.nextTime()
+        slots, mask, t = self._slots, self._mask, self._base
+        while not slots[t & mask]:
+            t += 1
+        return t
+
+    def popEvents(self, t):
+        """ Remove and return the events scheduled at time t """
+        self._base = t
+        slots, mask = self._slots, self._mask
+        overflow = self._overflow
+        limit = t + self._size
+        while overflow and overflow[0][0] < limit:
+            et, _, e = heappop(overflow)
+            slots[et & mask].append(e)
+            self._count += 1
+        i = t & mask
+        events = slots[i]
+        slots[i] = []
+        self._count -= len(events)
+        return events
+
+    def events(self):
+        """ Return the (time, event) pairs in the queue, in order """
+        slots, mask = self._slots, self._mask
+        events = []
+        for t in range(self._base, self._base + self._size):
+            events.extend((t, e) for e in slots[t & mask])
+        events.extend(self._overflow.events())
+        return events
+
+
+_schedulers = {'heap': _FutureEvents,
+               'wheel': _TimingWheel,
+               }
+
+
+class _SimulatorContext(object):
+
+    """ State of the simulation kernel.
+
+    Signals, tracing and cosimulation set up during elaboration are
+    registered in the context that is active in the current thread. A
+    Simulation takes them over in a context of its own, which is active
+    while the simulation runs. A signal that a simulation owns schedules
+    its updates in the siglist of that context, other signals in the one
+    of the active context.
+
+    """
+
+    __slots__ = ('_signals', '_siglist', '_futureEvents', '_time',
+                 '_cosim', '_tracing', '_tf', '_simulation')
+
+    def __init__(self, simulation=False):
+        self._simulation = simulation
         self._signals = []
         self._siglist = []
-        self._futureEvents = []
+        self._futureEvents = _FutureEvents()
         self._time = 0
         self._cosim = 0
         self._tracing = 0
         self._tf = None
 
-_simulator = __simulator()
+
+# kernel state attributes of a context
+_state = _SimulatorContext.__slots__[:-1]
+
+
+class _Simulator(threading.local):
+
+    """ Kernel state of the context that is active in the current thread.
+
+    The attributes of the active context are loaded in this object, so
+    that the kernel accesses them directly. Each thread starts with a
+    context of its own.
+
+    """
+
+    def __init__(self):
+        self._context = context = _SimulatorContext()
+        self._load(context)
+
+    def _load(self, context):
+        for name in _state:
+            setattr(self, name, getattr(context, name))
+
+    def _activate(self, context):
+        """ Make context the active context, return the previous one. """
+        prev = self._context
+        if context is not prev:
+            for name in _state:
+                setattr(prev, name, getattr(self, name))
+            self._load(context)
+            self._context = context
+        return prev
+
+
+_simulator = _Simulator()
 
 def now():
     """ Return the current simulation time """
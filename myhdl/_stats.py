@@ -0,0 +1,108 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Activity counters of a simulation.
+
+The kernel counts in local variables and reports the counts since the
+start of a run to the stats object when the run ends, and when a progress
+callback is due.
+
+"""
+
+from time import perf_counter
+
+
+class _SimulationStats(object):
+
+    """ Activity counters of a simulation, accumulated over its runs.
+
+    Attributes:
+    time_steps -- number of time steps processed
+    delta_cycles -- number of delta cycles
+    max_delta_cycles -- largest number of delta cycles in a time step
+    signal_updates -- number of signal updates
+    resumptions -- number of generator resumptions
+    elapsed -- wall-clock time spent in runs, in seconds
+
+    """
+
+    __slots__ = ('time_steps', 'delta_cycles', 'max_delta_cycles',
+                 'signal_updates', 'resumptions', 'elapsed',
+                 '_context', '_callback', '_interval', '_base', '_start',
+                 '_last')
+
+    def __init__(self, context, callback=None, interval=1.0):
+        self.time_steps = 0
+        self.delta_cycles = 0
+        self.max_delta_cycles = 0
+        self.signal_updates = 0
+        self.resumptions = 0
+        self.elapsed = 0.0
+        self._context = context
+        self._callback = callback
+        self._interval = interval
+        self._base = None
+        self._start = self._last = 0.0
+
+    @property
+    def queue_depth(self):
+        """ Number of events in the future event queue """
+        return len(self._context._futureEvents)
+
+    @property
+    def deltas_per_step(self):
+        """ Average number of delta cycles per time step """
+        if not self.time_steps:
+            return float(self.delta_cycles)
+        return self.delta_cycles / self.time_steps
+
+    @property
+    def events_per_second(self):
+        """ Signal updates and resumptions per second of wall-clock time """
+        if not self.elapsed:
+            return 0.0
+        return (self.signal_updates + self.resumptions) / self.elapsed
+
+    def _begin(self):
+        self._base = (self.time_steps, self.delta_cycles,
+                      self.signal_updates, self.resumptions, self.elapsed)
+        self._start = self._last = perf_counter()
+
+    def _update(self, steps, deltas, maxdeltas, updates, resumptions):
+        """ Set the counters from the counts since the start of the run """
+        base = self._base
+        self.time_steps = base[0] + steps
+        self.delta_cycles = base[1] + deltas
+        if maxdeltas > self.max_delta_cycles:
+            self.max_delta_cycles = maxdeltas
+        self.signal_updates = base[2] + updates
+        self.resumptions = base[3] + resumptions
+        self.elapsed = base[4] + perf_counter() - self._start
+
+    def _tick(self, steps, deltas, maxdeltas, updates, resumptions):
+        """ Call the progress callback when the interval has elapsed """
+        t = perf_counter()
+        if t - self._last >= self._interval:
+            self._last = t
+            self._update(steps, deltas, maxdeltas, updates, resumptions)
+            self._callback(self)
+
+    def __repr__(self):
+        return "<%s: %d time steps, %d delta cycles, %d signal updates, " \
+            "%d resumptions>" % (self.__class__.__name__, self.time_steps,
+                                 self.delta_cycles, self.signal_updates,
+                                 self.resumptions)
@@ -24,7 +24,6 @@
 
 
 import time
-import sys
 import shutil
 from ._version import __version__
 from ._enum import EnumItemType
@@ -32,13 +31,13 @@ from ._simulator import _simulator
 from ._extractHierarchy import _HierExtr
 from ._errors import TraceSignalsError
 from ._ShadowSignal import _TristateSignal, _TristateDriver
+from ._SignalArray import SparseSignalArray
 import os
 
 
 path = os.path
 
 _tracing = 0
-_profileFunc = None
 
 
 class _error:
@@ -67,9 +66,6 @@ class _TraceSignalsClass(object):
         global _tracing
         if _tracing:
             return dut(*args, **kwargs)  # skip
-        else:
-            # clean start
-            sys.setprofile(None)
         from myhdl.conversion import _toVerilog
         if _toVerilog._converting:
             raise TraceSignalsError("Cannot use traceSignals while"
@@ -198,6 +194,45 @@ def _writeVcdSigs(f, hierarchy, tracelists):
         if tracelists:
             for n in memdict.keys():
                 print("$scope module {} $end" .format(n), file=f)
+                a = memdict[n].array
+                if isinstance(a, SparseSignalArray):
+                    # the address and the value of the changed elements
+                    if not a._tracing:
+                        a._tracing = 1
+                        a._codes = [next(namegen), next(namegen)]
+                        siglist.append(a)
+                    print("$var reg %s %s addr $end" %
+                          (a._addrBits(), a._codes[0]), file=f)
+                    w = a._nrbits
+                    if w and not isinstance(a._template, EnumItemType):
+                        print("$var reg %s %s data $end" %
+                              (w, a._codes[1]), file=f)
+                    else:
+                        print("$var real 1 %s data $end" % a._codes[1],
+                              file=f)
+                    print("$upscope $end", file=f)
+                    continue
+                if a is not None:
+                    # a code per element, the array prints their changes
+                    if not a._tracing:
+                        a._tracing = 1
+                        a._codes = [next(namegen) for i in range(len(a))]
+                        siglist.append(a)
+                    w = a._nrbits
+                    if isinstance(a._template, EnumItemType):
+                        w = 0
+                    for memindex, code in enumerate(a._codes):
+                        if w == 1:
+                            print("$var reg 1 %s %s(%i) $end" %
+                                  (code, n, memindex), file=f)
+                        elif w:
+                            print("$var reg %s %s %s(%i) $end" %
+                                  (w, code, n, memindex), file=f)
+                        else:
+                            print("$var real 1 %s %s(%i) $end" %
+                                  (code, n, memindex), file=f)
+                    print("$upscope $end", file=f)
+                    continue
                 memindex = 0
                 for s in memdict[n].mem:
                     sval = _getSval(s)
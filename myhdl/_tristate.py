@@ -62,7 +62,13 @@ class _TristateDriver(_Signal):
              self._next = None
          else:
              self._setNextVal(val)
-         _simulator._siglist.append(self._bus)
+         bus = self._bus
+         if not bus._dirty:
+             bus._dirty = True
+             siglist = bus._siglist
+             if siglist is None:
+                 siglist = _simulator._siglist
+             siglist.append(bus)
 
 
 class _DelayedTristate(_DelayedSignal, _Tristate):
@@ -30,6 +30,7 @@ from tokenize import generate_tokens, untokenize, INDENT
 from io import StringIO
 
 from ._compat import ast_parse
+from ._elabcache import elaborationCache
 from .numeric._bitarray import bitarray
 
 
@@ -44,6 +45,29 @@ def _printExcInfo():
 _isGenFunc = inspect.isgeneratorfunction
 
 
+# objects created during a hierarchy extraction, with the frames of the
+# calls that create them, or None when no extraction is running
+_creations = None
+
+
+def _recordCreation(obj, code=None):
+    """ Record the creation of an instance for a hierarchy extraction.
+
+    The frame of the creation is the caller of the caller, or with code,
+    the nearest frame of the function that defines code.
+
+    """
+    if _creations is None:
+        return
+    frame = sys._getframe(2)
+    if code is not None:
+        while frame is not None and code not in frame.f_code.co_consts:
+            frame = frame.f_back
+        if frame is None:
+            return
+    _creations.append((obj, frame))
+
+
 def _flatten(*args):
     arglist = []
     for arg in args:
@@ -92,12 +116,46 @@ def _dedent(s):
     return untokenize(result)
 
 
+# dedented source, source file and line offset per code object
+_sourceCache = {}
+
+
+def _getSource(code):
+    """ Return the dedented source, source file and line offset of code.
+
+    The result is cached per code object, so that the source of a function
+    that is instantiated many times is read and dedented only once, and in
+    the elaboration cache when enabled.
+
+    """
+    try:
+        return _sourceCache[code]
+    except KeyError:
+        pass
+    source = elaborationCache.get(code, 'source')
+    if source is None:
+        lines, lnum = inspect.getsourcelines(code)
+        source = (_dedent(''.join(lines)), inspect.getsourcefile(code),
+                  lnum - 1)
+        elaborationCache.put(code, 'source', source)
+    _sourceCache[code] = source
+    return source
+
+
 def _makeAST(f):
-    s = inspect.getsource(f)
-    s = _dedent(s)
+    code = getattr(f, '__code__', None)
+    if code is None:
+        s = inspect.getsource(f)
+        s = _dedent(s)
+        tree = ast_parse(s)
+        tree.sourcefile = inspect.getsourcefile(f)
+        tree.lineoffset = inspect.getsourcelines(f)[1]-1
+        return tree
+    # parse a new tree each time, as the visitors annotate and transform it
+    s, sourcefile, lineoffset = _getSource(code)
     tree = ast_parse(s)
-    tree.sourcefile = inspect.getsourcefile(f)
-    tree.lineoffset = inspect.getsourcelines(f)[1]-1
+    tree.sourcefile = sourcefile
+    tree.lineoffset = lineoffset
     return tree
 
 
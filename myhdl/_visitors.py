@@ -2,6 +2,7 @@ import ast
 
 from myhdl._intbv import intbv
 from myhdl._Signal import _Signal, _isListOfSigs
+from myhdl._SignalArray import SignalArray
 
 
 class _SigNameVisitor(ast.NodeVisitor):
@@ -38,7 +39,7 @@ class _SigNameVisitor(ast.NodeVisitor):
         if nid not in self.symdict:
             return
         s = self.symdict[nid]
-        if isinstance(s, (_Signal, intbv)) or _isListOfSigs(s):
+        if isinstance(s, (_Signal, SignalArray, intbv)) or _isListOfSigs(s):
             if self.context == 'input':
                 self.inputs.add(nid)
             elif self.context == 'output':
@@ -87,3 +88,32 @@ class _SigNameVisitor(ast.NodeVisitor):
 
     def visit_Print(self, node):
         pass  # skip
+
+
+class _SigRefVisitor(_SigNameVisitor):
+    """ Collect the names that _SigNameVisitor looks up, in their context.
+
+    The result doesn't depend on a symdict, so that the instances of a
+    function can share it.
+
+    """
+    def __init__(self):
+        super(_SigRefVisitor, self).__init__({})
+        self.refs = []
+
+    def visit_Name(self, node):
+        ref = (node.id, self.context)
+        if ref not in self.refs:
+            self.refs.append(ref)
+
+
+def _sigNames(symdict, refs):
+    """ Return the input, output and inout signal names of refs """
+    names = {'input': set(), 'output': set(), 'inout': set()}
+    for nid, context in refs:
+        if nid not in symdict:
+            continue
+        s = symdict[nid]
+        if isinstance(s, (_Signal, SignalArray, intbv)) or _isListOfSigs(s):
+            names[context].add(nid)
+    return names['input'], names['output'], names['inout']
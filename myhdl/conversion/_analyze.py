@@ -44,8 +44,9 @@ from .._always_seq import _AlwaysSeq
 from .._always import _Always
 from ..conversion._misc import _error, _access, _kind, \
     _ConversionMixin, _Label, _genUniqueSuffix, _get_argnames
-from .._extractHierarchy import _isMem, _getMemInfo, _UserCode
+from .._extractHierarchy import _isMem, _getMemInfo, _makeMemInfo, _UserCode
 from .._Signal import _Signal, _WaiterList
+from .._SignalArray import SignalArray
 from .._ShadowSignal import _ShadowSignal, _SliceSignal, _TristateDriver
 from .._util import _isTupleOfInts, _flatten, _makeAST, _isTupleOfFloats, _isTupleOfBitArray
 from .._resolverefs import _AttrRefTransformer
@@ -153,6 +154,17 @@ def _analyzeMems(memlist, hdl):
                 raise ConversionError(_error.InconsistentBitWidth, s._name)
 
 
+def _expandArrays(sigs):
+    """ Return sigs with the signal arrays replaced by their signals """
+    expanded = []
+    for s in sigs:
+        if isinstance(s, SignalArray):
+            expanded.extend(_makeMemInfo(s).mem)
+        else:
+            expanded.append(s)
+    return expanded
+
+
 def _analyzeGens(top, absnames):
     genlist = []
     for g in top:
@@ -178,13 +190,15 @@ def _analyzeGens(top, absnames):
             v.visit(tree)
             v = _FirstPassVisitor(tree)
             v.visit(tree)
+            senslist = _expandArrays(g.senslist)
             if isinstance(g, _AlwaysComb):
-                v = _AnalyzeAlwaysCombVisitor(tree, g.senslist)
+                v = _AnalyzeAlwaysCombVisitor(tree, senslist)
             elif isinstance(g, _AlwaysSeq):
-                v = _AnalyzeAlwaysSeqVisitor(tree, g.senslist, g.reset,
-                                             g.sigregs, g.varregs)
+                sigregs = g.sigregs + _expandArrays(g.arrayregs)
+                v = _AnalyzeAlwaysSeqVisitor(tree, senslist, g.reset,
+                                             sigregs, g.varregs)
             else:
-                v = _AnalyzeAlwaysDecoVisitor(tree, g.senslist)
+                v = _AnalyzeAlwaysDecoVisitor(tree, senslist)
             v.visit(tree)
         else:  # @instance
             f = g.gen.gi_frame
@@ -1256,7 +1270,7 @@ class _AnalyzeVisitor(ast.NodeVisitor, _ConversionMixin):
             else:
                 node.obj = node.value.obj.elObj
         elif _isMem(node.value.obj):
-            node.obj = node.value.obj[0]
+            node.obj = _getMemInfo(node.value.obj).elObj
         elif isinstance(node.value.obj, _Rom):
             for value in node.value.obj.rom:
                 if value < 0:
@@ -1311,7 +1325,7 @@ class _AnalyzeVisitor(ast.NodeVisitor, _ConversionMixin):
         elif isinstance(n.obj, (_Signal, _WaiterList, delay)):
             senslist = [n.obj]
         elif _isMem(n.obj):
-            senslist = n.obj
+            senslist = _getMemInfo(n.obj).mem
         else:
             self.raiseError(node, _error.UnsupportedYield)
         node.senslist = senslist
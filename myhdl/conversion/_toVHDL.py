@@ -23,7 +23,6 @@
 """ myhdl toVHDL conversion module.
 
 """
-import sys
 import math
 import os
 
@@ -60,6 +59,7 @@ from ..conversion._misc import _error, _kind, _context, \
 from ..conversion._analyze import _analyzeSigs, _analyzeMems, \
     _analyzeGens, _analyzeTopFunc, _Ram, _Rom, _enumTypeSet
 from .._Signal import _Signal, _WaiterList, _SliceSignal, _isListOfSigs
+from .._SignalArray import SignalArray
 from .._ShadowSignal import ConcatSignal
 from ..conversion._toVHDLPackage import _package
 from .._util import _flatten, _isTupleOfInts, _isTupleOfFloats, _isTupleOfBitArray
@@ -76,7 +76,6 @@ from collections.abc import Callable
 _version = __version__.replace('.', '')
 _shortversion = _version.replace('dev', '')
 _converting = 0
-_profileFunc = None
 
 
 class _CheckCorrectIdentifier:
@@ -494,14 +493,15 @@ class _GenerateHierarchy(object):
                     arg_name = old_name
                 const_dict[arg_name] = obj
                 names_list.append(arg_name)
-            elif _isListOfSigs(obj):
+            elif _isListOfSigs(obj) or isinstance(obj, SignalArray):
                 if old_name in names_list:
                     arg_name = _suffixer(old_name, names_list)
                 else:
                     arg_name = old_name
                 id_obj = id(obj)
                 for m in existing_signals:
-                    if id(getattr(m, "mem", None)) == id_obj:
+                    if getattr(m, "array", None) is obj or \
+                            id(getattr(m, "mem", None)) == id_obj:
                         break
                 else:
                     mems_dict[arg_name] = _makeMemInfo(obj)
@@ -1183,9 +1183,6 @@ class _ToVHDLConvertor(object):
         global _converting
         if _converting:
             return func(*args, **kwargs)  # skip
-        else:
-            # clean start
-            sys.setprofile(None)
         from myhdl import _traceSignals
         if _traceSignals._tracing:
             raise ToVHDLError("Cannot use toVHDL while tracing signals")
@@ -5086,6 +5083,8 @@ class _AnnotateTypesVisitor(ast.NodeVisitor, _ConversionMixin):
         if isinstance(obj, list):
             assert len(obj)
             node.vhd = inferVhdlObj(obj[0])
+        elif isinstance(obj, SignalArray):
+            node.vhd = inferVhdlObj(_getMemInfo(obj).elObj)
         elif isinstance(obj, _Ram):
             node.vhd = inferVhdlObj(obj.elObj)
         elif isinstance(obj, _Rom):
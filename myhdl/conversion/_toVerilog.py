@@ -24,7 +24,6 @@ from __future__ import absolute_import
 from __future__ import print_function
 
 
-import sys
 import math
 import os
 
@@ -60,7 +59,6 @@ from collections.abc import Callable
 from .._ShadowSignal import _TristateSignal, _TristateDriver
 
 _converting = 0
-_profileFunc = None
 
 
 def _checkArgs(arglist):
@@ -127,9 +125,6 @@ class _ToVerilogConvertor(object):
         global _converting
         if _converting:
             return func(*args, **kwargs)  # skip
-        else:
-            # clean start
-            sys.setprofile(None)
         from myhdl import _traceSignals
         if _traceSignals._tracing:
             raise ToVerilogError("Cannot use toVerilog while tracing signals")
@@ -309,13 +309,15 @@ class bitarray(object):
         warnings.warn("bitarray objects are unhashable", RuntimeWarning)
 
     # copy methods
+    # the attributes are immutable: copy them as they are, without the
+    # argument handling of the constructor
     def __copy__(self):
-        result = type(self)(self)
+        result = object.__new__(type(self))
+        result.__dict__.update(self.__dict__)
         return result
 
     def __deepcopy__(self, visit):
-        result = type(self)(self)
-        return result
+        return self.__copy__()
 
     # iterator method
     def __iter__(self):
@@ -0,0 +1,136 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run the unit tests for the Clock class """
+
+
+import pytest
+
+from myhdl import (Clock, Signal, Simulation, always, delay, instance,
+                   instances, intbv, now)
+
+
+QUIET = 1
+
+
+def bench(clock, trace):
+    clk = clock.sig
+    count = Signal(intbv(0)[8:])
+
+    @always(clk.posedge)
+    def counter():
+        count.next = count + 1
+
+    @instance
+    def monitor():
+        while 1:
+            yield clk, count
+            trace.append((now(), bool(clk), int(count)))
+
+    @instance
+    def negmon():
+        while 1:
+            yield clk.negedge
+            trace.append((now(), 'neg'))
+
+    return clock, counter, monitor, negmon
+
+
+def genclock(clk, period, high, phase):
+    yield delay(phase)
+    while 1:
+        clk.next = not clk
+        if clk:
+            yield delay(period - high)
+        else:
+            yield delay(high)
+
+
+class TestClock:
+
+    def check(self, period, duty, phase, scheduler='heap'):
+        ref = []
+        clk = Signal(bool(0))
+        clock = Clock(clk, period, duty, phase)
+        insts = bench(clock, ref)[1:]
+        gen = genclock(clk, period, clock._high, phase)
+        Simulation(gen, insts).run(200, quiet=QUIET)
+        res = []
+        clock = Clock(Signal(bool(0)), period, duty, phase)
+        Simulation(bench(clock, res), scheduler=scheduler).run(200,
+                                                               quiet=QUIET)
+        assert len(ref) > 20
+        assert res == ref
+
+    def testSymmetric(self):
+        self.check(10, 0.5, 0)
+
+    def testDutyPhase(self):
+        self.check(10, 0.3, 7)
+
+    def testWheel(self):
+        self.check(16, 0.25, 3, scheduler='wheel')
+
+    def testEdgeTimes(self):
+        clk = Signal(bool(0))
+        edges = []
+
+        @instance
+        def mon():
+            while 1:
+                yield clk
+                edges.append((now(), bool(clk)))
+
+        Simulation(Clock(clk, 10, duty=0.3, phase=5), mon).run(30,
+                                                              quiet=QUIET)
+        assert edges == [(5, True), (8, False), (15, True), (18, False),
+                         (25, True), (28, False)]
+
+    def testRunc(self):
+        def run(method):
+            trace = []
+            sim = Simulation(bench(Clock(Signal(bool(0)), 6, phase=1),
+                                   trace))
+            getattr(sim, method)(100, quiet=QUIET)
+            return trace
+        assert run('runc') == run('run')
+
+    def testInstances(self):
+        def top():
+            clk = Signal(bool(0))
+            clock = Clock(clk, 10)
+
+            @always(clk.posedge)
+            def logic():
+                pass
+
+            return instances()
+        insts = top()
+        assert len(insts) == 2
+        assert any(isinstance(i, Clock) for i in insts)
+
+    def testArgs(self):
+        with pytest.raises(TypeError):
+            Clock(Signal(0), 10)
+        with pytest.raises(TypeError):
+            Clock(False, 10)
+        with pytest.raises(ValueError):
+            Clock(Signal(bool(0)), 0)
+        with pytest.raises(ValueError):
+            Clock(Signal(bool(0)), 10, duty=0.01)
+        with pytest.raises(ValueError):
+            Clock(Signal(bool(0)), 10, phase=-1)
@@ -31,8 +31,11 @@ from random import randrange
 import pytest
 
 from myhdl._simulator import _simulator
-from myhdl import Signal, intbv
+from myhdl import (Signal, intbv, modbv, enum, ResetSignal, sintba, uintba,
+                   sfixba)
 from myhdl._simulator import _simulator
+from myhdl._Signal import (_Signal, _BoolSignal, _IntSignal, _VectorSignal,
+                           _EnumSignal)
 
 random.seed(1)  # random, but deterministic
 maxint = sys.maxsize
@@ -152,9 +155,9 @@ class TestSig:
         s1.next = 0
         s1._update()
         s1.next = 1
-        s1._eventWaiters = self.eventWaiters[:]
-        s1._posedgeWaiters = self.posedgeWaiters[:]
-        s1._negedgeWaiters = self.negedgeWaiters[:]
+        s1._eventWaiters[:] = self.eventWaiters
+        s1._posedgeWaiters[:] = self.posedgeWaiters
+        s1._negedgeWaiters[:] = self.negedgeWaiters
         waiters = s1._update()
         expected = self.eventWaiters + self.posedgeWaiters
         assert set(waiters) == set(expected)
@@ -168,9 +171,9 @@ class TestSig:
         s1.next = 1
         s1._update()
         s1.next = 0
-        s1._eventWaiters = self.eventWaiters[:]
-        s1._posedgeWaiters = self.posedgeWaiters[:]
-        s1._negedgeWaiters = self.negedgeWaiters[:]
+        s1._eventWaiters[:] = self.eventWaiters
+        s1._posedgeWaiters[:] = self.posedgeWaiters
+        s1._negedgeWaiters[:] = self.negedgeWaiters
         waiters = s1._update()
         expected = self.eventWaiters + self.negedgeWaiters
         assert set(waiters) == set(expected)
@@ -184,9 +187,9 @@ class TestSig:
         s1.next = 4
         s1._update()
         s1.next = 5
-        s1._eventWaiters = self.eventWaiters[:]
-        s1._posedgeWaiters = self.posedgeWaiters[:]
-        s1._negedgeWaiters = self.negedgeWaiters[:]
+        s1._eventWaiters[:] = self.eventWaiters
+        s1._posedgeWaiters[:] = self.posedgeWaiters
+        s1._negedgeWaiters[:] = self.negedgeWaiters
         waiters = s1._update()
         expected = self.eventWaiters
         assert set(waiters) == set(expected)
@@ -200,9 +203,9 @@ class TestSig:
         s1.next = 4
         s1._update()
         s1.next = 4
-        s1._eventWaiters = self.eventWaiters[:]
-        s1._posedgeWaiters = self.posedgeWaiters[:]
-        s1._negedgeWaiters = self.negedgeWaiters[:]
+        s1._eventWaiters[:] = self.eventWaiters
+        s1._posedgeWaiters[:] = self.posedgeWaiters
+        s1._negedgeWaiters[:] = self.negedgeWaiters
         waiters = s1._update()
         assert waiters == []
         assert s1._eventWaiters == self.eventWaiters
@@ -210,9 +213,9 @@ class TestSig:
         assert s1._negedgeWaiters == self.negedgeWaiters
 
     def testNextAccess(self):
-        """ each next attribute access puts a sig in a global siglist """
+        """ next attribute access puts a sig once in a global siglist """
         del _simulator._siglist[:]
-        s = [None] * 4
+        s = [None] * 5
         for i in range(len(s)):
             s[i] = Signal(i)
         s[1].next  # read access
@@ -221,8 +224,105 @@ class TestSig:
         s[3].next = 0
         s[3].next = 1
         s[3].next = 3
+        s[4].next = 4  # current value
         for i in range(len(s)):
-            assert _simulator._siglist.count(s[i]) == i
+            assert _simulator._siglist.count(s[i]) == (i in (1, 2, 3))
+
+
+class TestSignalClass:
+
+    def testClass(self):
+        """ the Signal factory should specialize on the value type """
+        t_State = enum('IDLE', 'RUN')
+        vals = [(bool(0), _BoolSignal), (0, _IntSignal),
+                (intbv(0)[4:], _VectorSignal), (modbv(0)[4:], _VectorSignal),
+                (uintba(0, 4), _VectorSignal), (sintba(0, 4), _VectorSignal),
+                (t_State.IDLE, _EnumSignal), ([1, 2], _Signal), (None, _Signal)]
+        for val, cls in vals:
+            assert type(Signal(val)) is cls
+        assert isinstance(ResetSignal(0, active=1, asynchronous=False),
+                          _BoolSignal)
+
+    def testUpdate(self):
+        """ specialized updates should behave as the generic update """
+        t_State = enum('IDLE', 'RUN', 'STOP')
+        seqs = [[bool(0), 1, True, False, 0, 1, bool(1), 0],
+                [0, 3, 0, 0, -1, 1, 5, 0, 2],
+                [intbv(0)[4:], 3, 3, 0, 5, 0, 0, 15, 1],
+                [modbv(0)[4:], 17, 0, 1, 18, 2, 0],
+                [sintba(0, 4), 3, -1, 0, 0, -8, 2, 0],
+                [t_State.IDLE, t_State.RUN, t_State.RUN, t_State.STOP,
+                 t_State.IDLE]]
+        for seq in seqs:
+            s, ref = Signal(seq[0]), _Signal(seq[0])
+            assert type(s) is not _Signal
+            for n in seq[1:]:
+                for sig in (s, ref):
+                    sig.next = n
+                    sig._eventWaiters[:] = self.eventWaiters
+                    sig._posedgeWaiters[:] = self.posedgeWaiters
+                    sig._negedgeWaiters[:] = self.negedgeWaiters
+                assert s._update() == ref._update()
+                assert s._val == ref._val
+                assert type(s._val) is type(ref._val)
+                for wl, ref_wl in ((s._eventWaiters, ref._eventWaiters),
+                                   (s._posedgeWaiters, ref._posedgeWaiters),
+                                   (s._negedgeWaiters, ref._negedgeWaiters)):
+                    assert wl == ref_wl
+                    assert wl.epoch == ref_wl.epoch
+
+    def testVal(self):
+        """ val should only copy mutable values """
+        t_State = enum('IDLE', 'RUN')
+        for val in (bool(1), 5, t_State.RUN):
+            assert Signal(val).val is val
+        for val in (intbv(5)[4:], modbv(5)[4:], uintba(5, 4), sintba(-5, 4)):
+            s = Signal(val)
+            v = s.val
+            assert v is not s._val
+            assert type(v) is type(val)
+            assert v == val and len(v) == len(val)
+            v[0] = 0
+            assert s._val == val
+
+    def testCompareNoCopy(self, monkeypatch):
+        """ comparisons with values should not copy the signal value """
+        def nocopy(self):
+            raise AssertionError("value copied")
+        sigs = [Signal(intbv(5)[4:]), Signal(uintba(5, 4))]
+        monkeypatch.setattr(intbv, '__copy__', nocopy)
+        monkeypatch.setattr(uintba, '__copy__', nocopy)
+        for s in sigs:
+            assert s == 5 and not s != 5
+            assert s < 6 and s <= 5 and s > 4 and s >= 5
+
+    def testNextBitArray(self):
+        """ bitarray next values should be set in place, in the signal format """
+        vals = [uintba(0, 5), sintba(0, 5), sfixba(0, 3, -2)]
+        nexts = [5, 31, 32, -1, -16, -17, 0, 1.25, uintba(3, 4),
+                 uintba(17, 6), sintba(-3, 3), sintba(9, 6), sintba(0, 8),
+                 sfixba(1.75, 2, -3), sfixba(-2.5, 4, -1), sfixba(3.5, 3, -2)]
+        for val in vals:
+            s = Signal(val)
+            buf = s._next
+            for n in nexts:
+                try:
+                    expected = type(val)(n, val)
+                except Exception:
+                    with pytest.raises(TypeError):
+                        s.next = n
+                    continue
+                s.next = n
+                assert s._next is buf
+                assert s._next._val == expected._val
+                assert s._next.high == val.high and s._next.low == val.low
+                s._update()
+                assert s._val._val == expected._val
+
+    def setup_method(self, method):
+        self.eventWaiters = [object() for i in range(3)]
+        self.posedgeWaiters = [object() for i in range(5)]
+        self.negedgeWaiters = [object() for i in range(7)]
 
 
 class TestSignalAsNum:
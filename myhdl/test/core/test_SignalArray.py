@@ -0,0 +1,488 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run the unit tests for SignalArray """
+
+
+import tracemalloc
+
+import pytest
+
+from myhdl import (Clock, ResetSignal, Signal, SignalArray, Simulation,
+                   SparseSignalArray, StopSimulation, always, always_comb,
+                   always_seq, delay, enum, instance, intbv, modbv, now,
+                   toVerilog, toVHDL, traceSignals)
+from myhdl._Waiter import _SignalWaiter, _SignalTupleWaiter
+
+
+QUIET = 1
+
+t_state = enum('IDLE', 'RUN', 'HOLD')
+
+
+class TestSignalArray:
+
+    def testStorage(self):
+        assert SignalArray(8, bool(0))._vals.typecode == 'B'
+        assert SignalArray(8, intbv(0)[8:])._vals.typecode == 'Q'
+        assert SignalArray(8, intbv(0, min=-8, max=8))._vals.typecode == 'q'
+        assert isinstance(SignalArray(8, intbv(0)[80:])._vals, list)
+        assert isinstance(SignalArray(8, 0)._vals, list)
+
+    def testMemory(self):
+        tracemalloc.start()
+        try:
+            a = SignalArray(1000000, intbv(0)[32:])
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert len(a) == 1000000
+        assert size < 16 * 1000000
+
+    def testValues(self):
+        a = SignalArray(4, [intbv(i)[8:] for i in (3, 1, 4, 1)])
+        assert len(a) == 4
+        assert a[2] == 4
+        assert a[-4] == 3
+        assert a[2].val == intbv(4)[8:]
+        assert len(a[2]) == 8
+        assert [int(s) for s in a] == [3, 1, 4, 1]
+        assert [int(s) for s in a[1:3]] == [1, 4]
+        assert a.val == [3, 1, 4, 1]
+        with pytest.raises(IndexError):
+            a[4]
+        with pytest.raises(TypeError):
+            a[0] = 1
+        b = SignalArray(3, t_state.RUN)
+        assert b.val == [t_state.RUN] * 3
+
+    def testConstruct(self):
+        with pytest.raises(ValueError):
+            SignalArray(0, bool(0))
+        with pytest.raises(ValueError):
+            SignalArray(3, [0, 1])
+        with pytest.raises(TypeError):
+            SignalArray(3, 1.5)
+        with pytest.raises(ValueError):
+            SignalArray(3, [intbv(0)[2:], intbv(0)[2:], 5])
+
+    def testNext(self):
+        a = SignalArray(4, intbv(0)[8:])
+        m = SignalArray(4, modbv(0)[4:])
+        b = SignalArray(4, bool(0))
+        e = SignalArray(2, t_state.IDLE)
+
+        @instance
+        def stimulus():
+            a[1].next = 5
+            a[2].next = 1
+            a[2].next[7] = 1
+            m[0].next = 17
+            b[3].next = 1
+            e[1].next = t_state.HOLD
+            assert a[1] == 0
+            yield delay(1)
+            assert a.val == [0, 5, 129, 0]
+            assert m.val == [1, 0, 0, 0]
+            assert b.val == [False, False, False, True]
+            assert e.val == [t_state.IDLE, t_state.HOLD]
+            with pytest.raises(ValueError):
+                a[0].next = 256
+            with pytest.raises(ValueError):
+                b[0].next = 2
+            with pytest.raises(TypeError):
+                e[0].next = 1
+
+        Simulation(stimulus).run(quiet=QUIET)
+
+    def testWaiters(self):
+        a = SignalArray(4, bool(0))
+        events = []
+
+        @instance
+        def anyElement():
+            while 1:
+                yield a
+                events.append((now(), 'any'))
+
+        @instance
+        def element():
+            while 1:
+                yield a[2]
+                events.append((now(), 'element'))
+
+        @instance
+        def edges():
+            while 1:
+                yield a[2].posedge, a[3].negedge
+                events.append((now(), 'edge'))
+
+        @instance
+        def stimulus():
+            for i, v in ((1, 1), (2, 1), (2, 0), (3, 1), (3, 0), (3, 0)):
+                yield delay(10)
+                a[i].next = v
+
+        Simulation(anyElement, element, edges, stimulus).run(quiet=QUIET)
+        assert sorted(events) == [(10, 'any'),
+                                  (20, 'any'), (20, 'edge'), (20, 'element'),
+                                  (30, 'any'), (30, 'element'),
+                                  (40, 'any'),
+                                  (50, 'any'), (50, 'edge')]
+
+    def testAlways(self):
+        a = SignalArray(4, intbv(0)[8:])
+        b = Signal(bool(0))
+        count = []
+
+        @always(a)
+        def single():
+            count.append(now())
+
+        @always(a, b)
+        def pair():
+            pass
+
+        @always_comb
+        def comb():
+            b.next = a[0] == 1
+
+        assert type(single.waiter) is _SignalWaiter
+        assert type(pair.waiter) is _SignalTupleWaiter
+        assert comb.senslist == (a,)
+
+        @instance
+        def stimulus():
+            a[0].next = 1
+            yield delay(10)
+            assert b == 1
+            a[0].next = 1
+            yield delay(10)
+
+        Simulation(single, pair, comb, stimulus).run(quiet=QUIET)
+        assert count == [0]
+
+    def testReset(self):
+        clk = Signal(bool(0))
+        rst = ResetSignal(1, active=1, asynchronous=False)
+        a = SignalArray(4, [intbv(i)[8:] for i in (3, 1, 4, 1)])
+        addr = Signal(intbv(0)[2:])
+
+        @always_seq(clk.posedge, reset=rst)
+        def write():
+            a[addr].next = 9
+
+        assert write.arrayregs == [a]
+
+        @instance
+        def stimulus():
+            rst.next = 0
+            for i in range(4):
+                addr.next = i
+                yield delay(10)
+                clk.next = 1
+                yield delay(10)
+                clk.next = 0
+            assert a.val == [9, 9, 9, 9]
+            rst.next = 1
+            yield delay(10)
+            clk.next = 1
+            yield delay(10)
+            assert a.val == [3, 1, 4, 1]
+
+        Simulation(write, stimulus).run(quiet=QUIET)
+
+
+class TestSparseSignalArray:
+
+    def testStorage(self):
+        m = SparseSignalArray(1 << 40, intbv(0)[32:])
+        assert len(m) == 1 << 40
+        assert m[1 << 39] == 0
+        assert m.val == {}
+        with pytest.raises(TypeError):
+            SparseSignalArray(4, [0, 0, 0, 0])
+
+    def testMemory(self):
+        m = SparseSignalArray(1 << 32, intbv(0)[32:])
+
+        @instance
+        def stimulus():
+            tracemalloc.start()
+            try:
+                for i in range(1000):
+                    m[i * 4000000].next = i + 1
+                yield delay(1)
+                size, _ = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            assert len(m.val) == 1000
+            assert size < 1000000
+
+        Simulation(stimulus).run(quiet=QUIET)
+
+    def testDefault(self):
+        m = SparseSignalArray(1 << 20, t_state.IDLE)
+        events = []
+
+        @instance
+        def element():
+            while 1:
+                yield m[7]
+                events.append(now())
+
+        @instance
+        def stimulus():
+            m[7].next = t_state.IDLE
+            m[8].next = t_state.RUN
+            yield delay(10)
+            assert m.val == {8: t_state.RUN}
+            m[7].next = t_state.HOLD
+            yield delay(10)
+            assert m[7] == t_state.HOLD
+            assert m[6] == t_state.IDLE
+
+        Simulation(element, stimulus).run(quiet=QUIET)
+        assert events == [10]
+
+    def testReset(self):
+        clk = Signal(bool(0))
+        rst = ResetSignal(0, active=1, asynchronous=True)
+        m = SparseSignalArray(1 << 24, intbv(5)[8:])
+        addr = Signal(intbv(0)[24:])
+
+        @always_seq(clk.posedge, reset=rst)
+        def write():
+            m[addr].next = addr[8:]
+
+        @instance
+        def stimulus():
+            for i in (3, 1 << 20, 9):
+                addr.next = i
+                yield delay(10)
+                clk.next = 1
+                yield delay(10)
+                clk.next = 0
+            assert m.val == {3: 3, 1 << 20: 0, 9: 9}
+            rst.next = 1
+            yield delay(10)
+            assert m.val == {3: 5, 1 << 20: 5, 9: 5}
+
+        Simulation(write, stimulus).run(quiet=QUIET)
+
+    def testCheckpoint(self, tmp_path):
+        path = str(tmp_path / 'sim.ckp')
+
+        def design(trace):
+            m = SparseSignalArray(1 << 30, t_state.IDLE)
+            count = Signal(intbv(0)[30:])
+
+            @always(delay(10))
+            def write():
+                count.next = (count + 12345) % (1 << 30)
+                m[count].next = t_state.RUN if count % 3 else t_state.HOLD
+
+            @always(m)
+            def watch():
+                trace.append((now(), len(m.val)))
+
+            return write, watch
+
+        ref = []
+        sim = Simulation(design(ref))
+        sim.run(95, quiet=QUIET)
+        sim.checkpoint(path)
+        mark = len(ref)
+        sim.run(100, quiet=QUIET)
+        res = []
+        sim = Simulation(design(res))
+        sim.restore(path)
+        sim.run(100, quiet=QUIET)
+        assert len(res) > 5
+        assert res == ref[mark:]
+
+    def testTrace(self, tmpdir):
+        def sparse():
+            mem = SparseSignalArray(1 << 10, intbv(0)[4:])
+
+            @instance
+            def stimulus():
+                yield delay(10)
+                mem[1000].next = 5
+                yield delay(10)
+                raise StopSimulation
+
+            return stimulus
+
+        with tmpdir.as_cwd():
+            dut = traceSignals(sparse)
+            Simulation(dut).run(quiet=QUIET)
+            with open('sparse.vcd') as f:
+                vcd = f.read()
+        assert "$var reg 10 ! addr $end" in vcd
+        assert "$var reg 4 \" data $end" in vcd
+        assert "$dumpvars\nbx !\nb0000 \"\n$end" in vcd
+        assert "#10\nb1111101000 !\nb0101 \"\n" in vcd
+
+
+def ram(dout, din, addr, we, clk, rst, mem, flags):
+
+    @always(clk.posedge)
+    def write():
+        if we:
+            mem[addr].next = din
+
+    @always_seq(clk.posedge, reset=rst)
+    def flag():
+        flags[addr[2:]].next = we
+
+    @always_comb
+    def read():
+        dout.next = mem[addr] + flags[addr[2:]]
+
+    return write, flag, read
+
+
+def ports():
+    return (Signal(intbv(0)[9:]), Signal(modbv(0)[8:]), Signal(modbv(0)[4:]),
+            Signal(bool(0)), Signal(bool(0)),
+            ResetSignal(0, active=1, asynchronous=False))
+
+
+def memories(kind):
+    if kind == 'list':
+        return ([Signal(intbv(0)[8:]) for i in range(16)],
+                [Signal(bool(0)) for i in range(4)])
+    if kind == 'sparse':
+        return SparseSignalArray(16, intbv(0)[8:]), \
+            SparseSignalArray(4, bool(0))
+    return SignalArray(16, intbv(0)[8:]), SignalArray(4, bool(0))
+
+
+def bench(trace, kind='array'):
+    dout, din, addr, we, clk, rst = sigs = ports()
+    dut = ram(*(sigs + memories(kind)))
+    clock = Clock(clk, 10)
+
+    @always(clk.negedge)
+    def stimulus():
+        trace.append((now(), int(dout)))
+        addr.next = addr + 3
+        din.next = din + 5
+        we.next = not we
+
+    return clock, dut, stimulus
+
+
+class TestSimulation:
+
+    def run(self, kind='array', **kwargs):
+        trace = []
+        Simulation(bench(trace, kind), **kwargs).run(500, quiet=QUIET)
+        return trace
+
+    def testList(self):
+        ref = []
+        Simulation(bench(ref, 'list')).run(500, quiet=QUIET)
+        assert len(ref) > 40
+        assert self.run() == ref
+
+    def testSparse(self):
+        trace = []
+        Simulation(bench(trace, 'sparse')).run(500, quiet=QUIET)
+        assert trace == self.run()
+
+    @pytest.mark.parametrize('kind', ['array', 'sparse'])
+    @pytest.mark.parametrize('kwargs', [dict(mode='cycle'),
+                                        dict(fastpath=True)])
+    def testKernels(self, kind, kwargs):
+        assert self.run(kind, **kwargs) == self.run()
+
+    def testRunc(self):
+        trace = []
+        Simulation(bench(trace)).runc(500, quiet=QUIET)
+        assert trace == self.run()
+
+    def testCheckpoint(self, tmp_path):
+        path = str(tmp_path / 'sim.ckp')
+        ref = []
+        sim = Simulation(bench(ref))
+        sim.run(243, quiet=QUIET)
+        sim.checkpoint(path)
+        mark = len(ref)
+        sim.run(200, quiet=QUIET)
+        res = []
+        sim = Simulation(bench(res))
+        sim.restore(path)
+        sim.run(200, quiet=QUIET)
+        assert len(res) > 15
+        assert res == ref[mark:]
+
+    def testTrace(self, tmpdir):
+        def top():
+            mem = SignalArray(3, intbv(0)[4:])
+
+            @instance
+            def stimulus():
+                yield delay(10)
+                mem[1].next = 5
+                yield delay(10)
+                raise StopSimulation
+
+            return stimulus
+
+        with tmpdir.as_cwd():
+            dut = traceSignals(top)
+            Simulation(dut).run(quiet=QUIET)
+            with open('top.vcd') as f:
+                vcd = f.read()
+        assert "$var reg 4 ! mem(0) $end" in vcd
+        assert "$var reg 4 \" mem(1) $end" in vcd
+        assert "#10\nb0101 \"\n" in vcd
+
+
+def ramList(dout, din, addr, we, clk, rst):
+    return ram(dout, din, addr, we, clk, rst, *memories('list'))
+
+
+def ramArray(dout, din, addr, we, clk, rst):
+    return ram(dout, din, addr, we, clk, rst, *memories('array'))
+
+
+def ramSparse(dout, din, addr, we, clk, rst):
+    return ram(dout, din, addr, we, clk, rst, *memories('sparse'))
+
+
+class TestConversion:
+
+    @pytest.mark.parametrize('convert', [toVerilog, toVHDL])
+    def testList(self, convert, tmpdir):
+        """ Signal arrays convert as the equivalent list of signals """
+        code = {}
+        for top in (ramList, ramArray, ramSparse):
+            convert.directory = str(tmpdir)
+            convert.name = 'ram'
+            try:
+                convert(top, *ports())
+            finally:
+                convert.directory = convert.name = None
+            ext = '.v' if convert is toVerilog else '.vhd'
+            with open(str(tmpdir.join('ram' + ext))) as f:
+                # the order of the processes may differ between conversions
+                code[top] = sorted(line for line in f if 'Date' not in line)
+        assert code[ramArray] == code[ramList]
+        assert code[ramSparse] == code[ramList]
@@ -20,13 +20,23 @@
 """ Run unit tests for Simulation """
 
 
+import io
+import json
+import os
 import random
+import tempfile
 from random import randrange
 from unittest import TestCase
 
-from myhdl import (Signal, Simulation, SimulationError, StopSimulation, delay,
-                   intbv, join, now)
-from myhdl._Simulation import _error
+import pytest
+
+from myhdl import (Clock, Signal, Simulation, SimulationError, StopSimulation,
+                   always, always_comb, delay, intbv, join, now, run_many)
+from myhdl._Simulation import _error, _PURGE_INTERVAL
+from myhdl._extractHierarchy import _HierExtr
+from myhdl._profile import _ProfiledGenerator
+from myhdl._Waiter import _EdgeTupleWaiter, _SignalTupleWaiter, _Waiter
+from myhdl._simulator import _FutureEvents, _TimingWheel
 from myhdl.test.helpers import raises_kind
 
 random.seed(1)  # random, but deterministic
@@ -52,6 +62,12 @@ class SimArgs(TestCase):
         with raises_kind(SimulationError, _error.DuplicatedArg):
             Simulation(i, i)
 
+    def test3(self):
+        def g():
+            yield delay(10)
+        with raises_kind(SimulationError, _error.Scheduler):
+            Simulation(g(), scheduler='calendar')
+
 
 class YieldNone(TestCase):
     """ Basic test of yield None behavior """
@@ -422,6 +438,160 @@ class YieldGen(TestCase):
         Simulation(self.bench()).run(quiet=QUIET)
 
 
+class FutureEventOrder(TestCase):
+
+    """ Check that events at equal times are handled in FIFO order """
+
+    def bench(self, order):
+        n = 100
+        delays = [randrange(1, 10) for _ in range(n)]
+
+        def gen(i):
+            yield delay(delays[i])
+            order.append(i)
+
+        def check():
+            yield delay(20)
+            assert order == sorted(range(n), key=lambda i: delays[i])
+
+        return [gen(i) for i in range(n)], check()
+
+    def testFifo(self):
+        order = []
+        Simulation(self.bench(order)).run(quiet=QUIET)
+        assert len(order) == 100
+
+    def testFifoWheel(self):
+        order = []
+        Simulation(self.bench(order), scheduler='wheel').run(quiet=QUIET)
+        assert len(order) == 100
+
+
+class TimingWheel(TestCase):
+
+    """ Check the timing wheel against the default event queue """
+
+    def testQueue(self):
+        heap = _FutureEvents()
+        wheel = _TimingWheel(size=16)
+        t = 0
+        for i in range(2000):
+            # mix near and far future events
+            if randrange(4):
+                dt = randrange(0, 20)
+            else:
+                dt = randrange(20, 200)
+            heap.append((t + dt, i))
+            wheel.append((t + dt, i))
+            if randrange(3) == 0:
+                assert len(heap) == len(wheel)
+                t = heap.nextTime()
+                assert wheel.nextTime() == t
+                assert wheel.popEvents(t) == heap.popEvents(t)
+        while heap:
+            t = heap.nextTime()
+            assert wheel.nextTime() == t
+            assert wheel.popEvents(t) == heap.popEvents(t)
+        assert not wheel
+
+    def testSize(self):
+        with pytest.raises(ValueError):
+            _TimingWheel(size=100)
+
+    def testRunMethod(self):
+        def bench(trace):
+            def gen(n, period):
+                for _ in range(n):
+                    yield delay(period)
+                    trace.append((now(), period))
+            return [gen(50, p) for p in (1, 3, 7, 10, 2000, 5000)]
+        ref = []
+        Simulation(bench(ref)).run(quiet=QUIET)
+        res = []
+        sim = Simulation(bench(res), scheduler='wheel')
+        while sim.run(randrange(1, 3000), quiet=QUIET):
+            pass
+        assert res == ref
+
+
+class TupleWaiterReuse(TestCase):
+
+    """ Check that tuple waiters stay registered across triggers """
+
+    def testSignalTuple(self):
+        a, b = Signal(0), Signal(0)
+        trace = []
+
+        def stim():
+            for i in range(1, 10):
+                yield delay(10)
+                a.next = i
+                if i % 2:
+                    b.next = i
+
+        def resp():
+            while 1:
+                yield a, b
+                trace.append(now())
+
+        w = _SignalTupleWaiter(resp())
+        Simulation(stim(), w).run(95, quiet=QUIET)
+        # resumed once per time step, even when both signals change
+        assert trace == list(range(10, 100, 10))
+        assert a._eventWaiters == [w]
+        assert b._eventWaiters == [w]
+
+    def testEdgeTuple(self):
+        clk, rst = Signal(bool(0)), Signal(bool(1))
+        trace = []
+
+        def stim():
+            for i in range(10):
+                yield delay(5)
+                clk.next = not clk
+                rst.next = bool(i % 3)
+
+        def resp():
+            while 1:
+                yield clk.posedge, rst.negedge
+                trace.append(now())
+
+        w = _EdgeTupleWaiter(resp())
+        Simulation(stim(), w).run(48, quiet=QUIET)
+        # resumed once when both edges occur in the same delta cycle
+        assert trace == [5, 15, 20, 25, 35, 45]
+        assert clk.posedge == [w]
+        assert rst.negedge == [w]
+
+    def testChangingClauses(self):
+        a, b, c = Signal(0), Signal(0), Signal(0)
+
+        def stim():
+            while 1:
+                yield delay(1)
+                a.next = a + 1
+
+        def resp():
+            while 1:
+                yield a, b
+                yield a, c
+
+        Simulation(stim(), _SignalTupleWaiter(resp())).run(1000, quiet=QUIET)
+        assert len(a._eventWaiters) == 1
+        assert len(b._eventWaiters) <= _PURGE_INTERVAL
+        assert len(c._eventWaiters) <= _PURGE_INTERVAL
+
+    def testTimeout(self):
+        a = Signal(0)
+
+        def resp():
+            while 1:
+                yield a, delay(3)
+
+        Simulation(_Waiter(resp())).run(1000, quiet=QUIET)
+        assert len(a._eventWaiters) <= _PURGE_INTERVAL
+
+
 class DeltaCycleOrder(TestCase):
 
     """ Check that delta cycle order does not matter """
@@ -833,6 +1003,15 @@ class WaveformInertialDelayStress(Waveform):
         duration += interval
 
 
+class WaveformInertialDelayIntbv(WaveformInertialDelayStress):
+
+    """ Repeat inertial delay tests with a signal of a mutable type """
+
+    def setUp(self):
+        interval, val, sigdelay = self.waveform[0]
+        self.sig = Signal(intbv(val)[2:], delay=sigdelay)
+
+
 class SimulationRunMethod(Waveform):
 
     """ Basic test of run method of Simulation object """
@@ -843,6 +1022,83 @@ class SimulationRunMethod(Waveform):
             duration = randrange(1, 300)
 
 
+class SimulationRuncMethod(Waveform):
+
+    """ Basic test of runc method of Simulation object """
+
+    def runSim(self, sim):
+        duration = randrange(1, 300)
+        while sim.runc(duration, quiet=QUIET):
+            duration = randrange(1, 300)
+
+
+class RuncEventOrder(TestCase):
+
+    """ Check that runc processes events in the same order as run """
+
+    def bench(self, trace):
+        clk = Signal(bool(0))
+        a, b = Signal(0), Signal(0)
+        d = Signal(0, delay=3)
+
+        def clkgen():
+            while 1:
+                yield delay(5)
+                clk.next = not clk
+
+        def stim():
+            for i in range(100):
+                yield clk.posedge
+                a.next = randrange(8)
+                d.next = i
+
+        def comb():
+            while 1:
+                yield a, d
+                b.next = a + d
+                trace.append(('comb', now(), int(a), int(d)))
+
+        def mon(name, clause):
+            while 1:
+                yield clause
+                trace.append((name, now(), int(a), int(b), int(d)))
+
+        return (clkgen(), stim(), comb(), mon('b', b),
+                mon('neg', clk.negedge), mon('to', (b, delay(7))))
+
+    def testOrder(self):
+        random.seed(7)
+        ref = []
+        Simulation(self.bench(ref)).run(1000, quiet=QUIET)
+        random.seed(7)
+        res = []
+        sim = Simulation(self.bench(res))
+        durations = random.Random(3)
+        while sim.runc(durations.randrange(1, 100), quiet=QUIET) \
+                and now() < 1000:
+            pass
+        assert len(ref) > 100
+        assert res[:len(ref)] == ref
+
+    def testStop(self):
+        def gen():
+            yield delay(10)
+            raise StopSimulation("done")
+        sim = Simulation(gen())
+        assert sim.runc(quiet=QUIET) == 0
+        assert now() == 10
+        with pytest.raises(StopSimulation):
+            sim.runc(quiet=QUIET)
+
+    def testException(self):
+        def gen():
+            yield delay(10)
+            raise ValueError("boom")
+        sim = Simulation(gen())
+        with pytest.raises(ValueError):
+            sim.runc(quiet=QUIET)
+
+
 class TimeZeroEvents(TestCase):
 
     """ Check events at time 0 """
@@ -877,3 +1133,359 @@ class TimeZeroEvents(TestCase):
         s = Signal(1)
         testBench = self.bench(sig=s, next=0, clause=s.negedge)
         Simulation(testBench).run(quiet=QUIET)
+
+
+def countEdges(period):
+    """ Count the posedges of a clock with period 2 * period """
+    clk = Signal(bool(0))
+    edges = []
+
+    def clkgen():
+        while 1:
+            yield delay(period)
+            clk.next = not clk
+
+    def monitor():
+        while 1:
+            yield clk.posedge
+            edges.append(now())
+
+    Simulation(clkgen(), monitor()).run(2000, quiet=QUIET)
+    return now(), edges
+
+
+class SimulationContext(TestCase):
+
+    """ Check that simulations have a kernel context of their own """
+
+    def testInterleaved(self):
+        ref = []
+        for period in (3, 5):
+            ref.append(countEdges(period)[1])
+        sims = []
+        res = []
+        for period in (3, 5):
+            clk = Signal(bool(0))
+            edges = []
+
+            def clkgen(clk=clk, period=period):
+                while 1:
+                    yield delay(period)
+                    clk.next = not clk
+
+            def monitor(clk=clk, edges=edges):
+                while 1:
+                    yield clk.posedge
+                    edges.append(now())
+
+            sims.append(Simulation(clkgen(), monitor()))
+            res.append(edges)
+        for i in range(20):
+            for sim in sims:
+                sim.run(100, quiet=QUIET)
+                assert now() == 100 * (i + 1)
+        assert res == ref
+
+    def testNextBetweenRuns(self):
+        sig = Signal(0)
+        trace = []
+
+        def monitor():
+            while 1:
+                yield sig
+                trace.append((now(), int(sig)))
+
+        def ticker():
+            while 1:
+                yield delay(3)
+
+        sim = Simulation(monitor(), ticker())
+        sim.run(10, quiet=QUIET)
+        sig.next = 5
+        sim.run(10, quiet=QUIET)
+        assert trace == [(10, 5)]
+
+    def design(self, name, trace):
+        sig = Signal(0)
+
+        def monitor():
+            while 1:
+                yield sig
+                trace.append((name, now(), int(sig)))
+
+        def ticker():
+            while 1:
+                yield delay(3)
+
+        return sig, Simulation(monitor(), ticker())
+
+    def testNextOtherSimulation(self):
+        trace = []
+        s1, sim1 = self.design('A', trace)
+        s2, sim2 = self.design('B', trace)
+        sim1.run(5, quiet=QUIET)
+        sim2.run(100, quiet=QUIET)
+        # the update belongs to the simulation of the signal
+        s1.next = 7
+        sim2.run(1, quiet=QUIET)
+        assert trace == []
+        # and survives the construction of another simulation
+        s3, sim3 = self.design('C', trace)
+        sim1.run(1, quiet=QUIET)
+        assert trace == [('A', 5, 7)]
+
+    def counter(self, period):
+        clk = Signal(bool(0))
+        count = Signal(0)
+
+        @always(clk.posedge)
+        def inc():
+            count.next = count + 1
+
+        return (Clock(clk, period), inc), count
+
+    def testOwner(self):
+        # both designs are elaborated before their simulations
+        insts1, count1 = self.counter(10)
+        free = Signal(0)
+        insts2, count2 = self.counter(20)
+        sim1 = Simulation(insts1)
+        sim2 = Simulation(insts2)
+        assert count1._siglist is sim1._context._siglist
+        assert count2._siglist is sim2._context._siglist
+        # a signal that no block refers to has no owner
+        assert free._siglist is None
+        for i in range(10):
+            sim1.run(100, quiet=QUIET)
+            sim2.run(100, quiet=QUIET)
+        # the clocks start with a rising edge
+        assert (count1, count2) == (101, 51)
+
+    def testRunManyThreads(self):
+        periods = [1, 2, 3, 5, 7, 11]
+        ref = [countEdges(period) for period in periods]
+        assert run_many(countEdges, periods, max_workers=3) == ref
+
+    def testRunManyProcesses(self):
+        periods = [2, 3]
+        ref = [countEdges(period) for period in periods]
+        assert run_many(countEdges, periods, processes=True,
+                        max_workers=2) == ref
+
+
+def profiled(period):
+    clk = Signal(bool(0))
+    count = Signal(intbv(0)[16:])
+
+    def clkgen():
+        while 1:
+            yield delay(period)
+            clk.next = not clk
+
+    @always(clk.posedge)
+    def counter():
+        count.next = count + 1
+
+    gen = clkgen()
+    return gen, counter
+
+
+def profiledTop(period):
+    clk = Signal(bool(0))
+    count = Signal(intbv(0)[16:])
+
+    @always(delay(period))
+    def clkgen():
+        clk.next = not clk
+
+    @always(clk.posedge)
+    def counter():
+        count.next = count + 1
+
+    return clkgen, counter
+
+
+class SimulationProfile(TestCase):
+
+    """ Check the per-instance execution profile """
+
+    def entries(self, sim):
+        return dict((e.name, e.calls) for e in sim.profile.entries)
+
+    def testCalls(self):
+        sim = Simulation(profiled(5), profile=True)
+        sim.run(100, quiet=QUIET)
+        # the initial dispatch resumes each generator once
+        assert self.entries(sim) == {'profiled.<locals>.clkgen': 21,
+                                     'profiled.<locals>.counter': 11}
+        assert all(e.time > 0 for e in sim.profile.entries)
+
+    def testHierarchicalNames(self):
+        h = _HierExtr('top', profiledTop, 5)
+        sim = Simulation(h.top, profile=True)
+        sim.run(100, quiet=QUIET)
+        assert self.entries(sim) == {'top_clkgen': 21, 'top_counter': 11}
+
+    def testRunc(self):
+        res = []
+        for method in ('run', 'runc'):
+            sim = Simulation(profiled(3), profile=True)
+            getattr(sim, method)(200, quiet=QUIET)
+            res.append(self.entries(sim))
+        assert res[0] == res[1]
+
+    def testOutput(self):
+        sim = Simulation(profiled(5), profile=True)
+        sim.run(100, quiet=QUIET)
+        f = io.StringIO()
+        sim.profile.print_stats(sort='calls', file=f)
+        lines = f.getvalue().splitlines()
+        assert lines[0].split() == ['ncalls', 'tottime', 'percall',
+                                    'instance']
+        assert lines[1].split()[-1] == 'profiled.<locals>.clkgen'
+        with pytest.raises(ValueError):
+            sim.profile.sorted('size')
+
+    def testDump(self):
+        sim = Simulation(profiled(5), profile=True)
+        sim.run(100, quiet=QUIET)
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            sim.profile.dump(path)
+            with open(path) as f:
+                data = json.load(f)
+        finally:
+            os.remove(path)
+        assert sorted((d['name'], d['calls']) for d in data) == \
+            sorted(self.entries(sim).items())
+
+    def testLevelized(self):
+        a, b, c = [Signal(intbv(0)[8:]) for i in range(3)]
+
+        def stim():
+            for i in range(10):
+                yield delay(1)
+                a.next = i
+
+        @always_comb
+        def inc():
+            b.next = (a + 1) % 256
+
+        @always_comb
+        def dbl():
+            c.next = (b * 2) % 256
+
+        sim = Simulation(stim(), inc, dbl, profile=True)
+        sim.run(quiet=QUIET)
+        entries = self.entries(sim)
+        assert entries['SimulationProfile.testLevelized.<locals>.inc'] == 10
+        assert entries['SimulationProfile.testLevelized.<locals>.dbl'] == 10
+
+    def testDisabled(self):
+        sim = Simulation(profiled(5))
+        assert sim.profile is None
+        assert not any(isinstance(w.generator, _ProfiledGenerator)
+                       for w in sim._waiters)
+
+
+def counted():
+    clk = Signal(bool(0))
+    count = Signal(intbv(0)[16:])
+    a, b, c = [Signal(intbv(0)[16:]) for i in range(3)]
+
+    def clkgen():
+        while 1:
+            yield delay(5)
+            clk.next = not clk
+
+    @always(clk.posedge)
+    def counter():
+        count.next = count + 1
+
+    @always(count)
+    def chain0():
+        a.next = count
+
+    @always(a)
+    def chain1():
+        b.next = a
+
+    @always(b)
+    def chain2():
+        c.next = b
+
+    return clkgen(), counter, chain0, chain1, chain2
+
+
+class SimulationStats(TestCase):
+
+    """ Check the activity counters and the progress callback """
+
+    def counters(self, stats):
+        return (stats.time_steps, stats.delta_cycles, stats.max_delta_cycles,
+                stats.signal_updates, stats.resumptions)
+
+    def testCounters(self):
+        sim = Simulation(counted())
+        sim.run(100, quiet=QUIET)
+        stats = sim.stats
+        # 20 clock edges, 10 of them rising and followed by the chain
+        assert stats.time_steps == 20
+        assert stats.max_delta_cycles == 6
+        assert stats.delta_cycles == 1 + 10 * 2 + 10 * 6
+        assert stats.signal_updates == 20 + 10 * 4
+        assert stats.resumptions == 5 + 20 + 10 * 4
+        assert stats.queue_depth == 1
+        assert stats.deltas_per_step == stats.delta_cycles / 20
+        assert stats.elapsed > 0
+        assert stats.events_per_second > 0
+
+    def testAccumulate(self):
+        sim = Simulation(counted())
+        sim.run(50, quiet=QUIET)
+        sim.run(50, quiet=QUIET)
+        ref = Simulation(counted())
+        ref.run(100, quiet=QUIET)
+        # a run starts with a delta cycle at the current time
+        ref.stats.delta_cycles += 1
+        assert self.counters(sim.stats) == self.counters(ref.stats)
+
+    def testRunc(self):
+        res = []
+        for method in ('run', 'runc'):
+            sim = Simulation(counted())
+            getattr(sim, method)(1000, quiet=QUIET)
+            res.append(self.counters(sim.stats))
+        assert res[0] == res[1]
+
+    def testProgress(self):
+        for method in ('run', 'runc'):
+            calls = []
+            sim = Simulation(counted(), progress=calls.append,
+                             progress_interval=0)
+            getattr(sim, method)(20000, quiet=QUIET)
+            assert len(calls) == 3
+            assert all(stats is sim.stats for stats in calls)
+
+    def testDeltaStorm(self):
+        for method in ('run', 'runc'):
+            a = Signal(bool(0))
+
+            @always(a)
+            def loop():
+                a.next = not a
+
+            def stop(stats):
+                if stats.max_delta_cycles > 5000:
+                    raise StopSimulation("delta cycle storm")
+
+            def kick():
+                yield delay(1)
+                a.next = 1
+
+            sim = Simulation(loop, kick(), progress=stop,
+                             progress_interval=0)
+            getattr(sim, method)(quiet=QUIET)
+            assert sim.stats.time_steps == 1
+            assert sim.stats.max_delta_cycles > 5000
@@ -23,8 +23,8 @@
 import random
 from random import randrange
 
-from myhdl import (AlwaysCombError, Signal, Simulation, StopSimulation, delay,
-                   instances, intbv)
+from myhdl import (AlwaysCombError, Signal, Simulation, StopSimulation, always,
+                   delay, instance, instances, intbv, now)
 from myhdl._always_comb import _error, always_comb
 from myhdl._Waiter import _SignalTupleWaiter, _SignalWaiter, _Waiter
 from myhdl.test.helpers import raises_kind
@@ -396,3 +396,134 @@ class TestInferWaiter:
     def testSignalTuple1(self):
         sim = Simulation(self.bench(SignalTupleGen1, _SignalTupleWaiter))
         sim.run()
+
+
+def diamond(a, d, counts):
+    b, c = [Signal(intbv(0)[8:]) for i in range(2)]
+
+    @always_comb
+    def inc():
+        counts[0] += 1
+        b.next = (a + 1) % 256
+
+    @always_comb
+    def dbl():
+        counts[1] += 1
+        c.next = (a * 2) % 256
+
+    @always_comb
+    def add():
+        counts[2] += 1
+        d.next = b + c
+
+    return inc, dbl, add
+
+
+def latch(s, r, q, qn):
+
+    @always_comb
+    def nor1():
+        q.next = not (r or qn)
+
+    @always_comb
+    def nor2():
+        qn.next = not (s or q)
+
+    return nor1, nor2
+
+
+class TestAlwaysCombLevelize:
+
+    def bench(self, levelize):
+        a = Signal(intbv(0)[8:])
+        d = Signal(intbv(0)[9:])
+        counts = [0, 0, 0]
+        trace = []
+
+        @instance
+        def stimulus():
+            for i in range(1, 101):
+                a.next = (i * 37) % 256
+                yield delay(10)
+                assert d == (a + 1) % 256 + (a * 2) % 256
+                trace.append((now(), int(d)))
+            raise StopSimulation
+
+        sim = Simulation(diamond(a, d, counts), stimulus, levelize=levelize)
+        sim.run(quiet=QUIET)
+        return sim, counts, trace
+
+    def testDiamond(self):
+        sim, counts, trace = self.bench(levelize=True)
+        assert len(sim._network.blocks) == 3
+        # each block runs once initially and once per change of a
+        assert counts == [101, 101, 101]
+        ref, refcounts, reftrace = self.bench(levelize=False)
+        assert ref._network is None
+        assert refcounts[2] > 101
+        assert trace == reftrace
+
+    def testLoop(self):
+        s, r, q, qn, o, p = [Signal(bool(0)) for i in range(6)]
+
+        @always_comb
+        def out():
+            o.next = q
+
+        @always_comb
+        def inv():
+            p.next = not o
+
+        @instance
+        def stimulus():
+            for vs, vr, vq in ((1, 0, 1), (0, 0, 1), (0, 1, 0), (0, 0, 0),
+                               (1, 0, 1)):
+                s.next, r.next = vs, vr
+                yield delay(10)
+                assert q == vq and qn == (not vq) and o == vq and p != vq
+            raise StopSimulation
+
+        sim = Simulation(latch(s, r, q, qn), out, inv, stimulus)
+        # the loop stays event-driven, the blocks it drives are levelized
+        assert [b.func.__name__ for b in sim._network.blocks] == ['out',
+                                                                  'inv']
+        sim.run(quiet=QUIET)
+
+    def chain(self, levelize):
+        a, b, c, y = [Signal(0) for i in range(4)]
+        trace = []
+
+        @instance
+        def stimulus():
+            for i in range(1, 4):
+                yield delay(10)
+                a.next = i
+
+        @always(a)
+        def follow():
+            y.next = a
+
+        @always_comb
+        def first():
+            b.next = a
+
+        @always_comb
+        def second():
+            c.next = b
+
+        @always(c)
+        def reader():
+            trace.append((now(), int(c), int(y)))
+
+        sim = Simulation(stimulus, follow, first, second, reader,
+                         levelize=levelize)
+        sim.run(quiet=QUIET)
+        return sim, trace
+
+    def testOutsideReader(self):
+        # readers outside the network resume in the next delta cycle, and
+        # see the signals updated in the same delta cycle as the outputs
+        sim, trace = self.chain(levelize=True)
+        assert len(sim._network.blocks) == 2
+        assert trace == [(10, 1, 1), (20, 2, 2), (30, 3, 3)]
+        assert self.chain(levelize=False)[1] == trace
@@ -0,0 +1,155 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run the unit tests for the asyncio simulation driver """
+
+
+import asyncio
+
+import pytest
+
+from myhdl import (Clock, Signal, Simulation, SimulationError, always,
+                   delay, instance, intbv, modbv, now)
+
+
+def counter(period=10):
+    clk = Signal(bool(0))
+    count = Signal(modbv(0)[16:])
+
+    @always(clk.posedge)
+    def inc():
+        count.next = count + 1
+
+    return (Clock(clk, period), inc), count
+
+
+class TestAdvance:
+
+    def testRun(self):
+        insts, count = counter()
+        sim = Simulation(insts)
+        assert asyncio.run(sim.advance(1005, timeslice=100)) == 1
+        assert now() == 1005
+        # the clock starts with a rising edge at time 0
+        assert count == 101
+
+    def testDeltas(self):
+        insts, count = counter()
+        sim = Simulation(insts)
+        assert asyncio.run(sim.advance(2000, deltas=50)) == 1
+        assert now() == 2000
+        assert count == 201
+
+    def testEnd(self):
+        a = Signal(intbv(0)[8:])
+
+        @instance
+        def stimulus():
+            for i in range(10):
+                a.next = i
+                yield delay(10)
+
+        sim = Simulation(stimulus)
+        assert asyncio.run(sim.advance(timeslice=30)) == 0
+        assert now() >= 100
+        assert a == 9
+
+    def testInterleave(self):
+        insts1, count1 = counter(10)
+        insts2, count2 = counter(20)
+        sim1 = Simulation(insts1)
+        sim2 = Simulation(insts2)
+        ticks = []
+
+        async def io():
+            while len(ticks) < 5:
+                ticks.append(int(count1))
+                await asyncio.sleep(0)
+
+        async def main():
+            await asyncio.gather(sim1.advance(1000, timeslice=100),
+                                 sim2.advance(1000, timeslice=100), io())
+
+        asyncio.run(main())
+        assert count1 == 101
+        assert count2 == 51
+        # the I/O coroutine ran between slices
+        assert 0 < ticks[-1] < 101
+
+    def testSlice(self):
+        insts, count = counter()
+        sim = Simulation(insts)
+        for n in (0, -10, 1.5):
+            with pytest.raises(SimulationError):
+                asyncio.run(sim.advance(100, timeslice=n))
+            with pytest.raises(SimulationError):
+                asyncio.run(sim.advance(100, deltas=n))
+
+
+class TestUntil:
+
+    def testCondition(self):
+        insts, count = counter()
+        sim = Simulation(insts)
+        assert asyncio.run(sim.until(count, lambda: count == 42,
+                                     timeslice=1000))
+        assert now() == 410
+        assert count == 42
+        # the simulation continues where it stopped
+        asyncio.run(sim.advance(100))
+        assert count == 52
+
+    def testTrigger(self):
+        insts, count = counter()
+        sim = Simulation(insts)
+        asyncio.run(sim.advance(100))
+        assert asyncio.run(sim.until(count))
+        assert now() == 110
+
+    def testTimeout(self):
+        insts, count = counter()
+        sim = Simulation(insts)
+        assert not asyncio.run(sim.until(count, lambda: count == 42,
+                                         timeout=200))
+        assert now() == 200
+        # the watch of the timed out call is gone
+        assert asyncio.run(sim.until(count, lambda: count == 30))
+        assert now() == 290
+
+    def testHolds(self):
+        insts, count = counter()
+        sim = Simulation(insts)
+        assert asyncio.run(sim.until(count, lambda: count == 0))
+        assert now() == 0
+
+    def testEnd(self):
+        a = Signal(intbv(0)[8:])
+
+        @instance
+        def stimulus():
+            for i in range(10):
+                a.next = i
+                yield delay(10)
+
+        sim = Simulation(stimulus)
+        assert not asyncio.run(sim.until(a, lambda: a == 20))
+
+    def testCycle(self):
+        insts, count = counter()
+        sim = Simulation(insts, mode='cycle')
+        with pytest.raises(SimulationError):
+            asyncio.run(sim.until(count))
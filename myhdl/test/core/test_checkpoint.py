@@ -0,0 +1,162 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run the unit tests for Simulation checkpoint and restore """
+
+
+import pickle
+
+import pytest
+
+from myhdl import (Clock, ResetSignal, Signal, Simulation, SimulationError,
+                   always, always_comb, always_seq, delay, enum, instance,
+                   intbv, modbv, now)
+from myhdl._checkpoint import _MAGIC
+
+
+QUIET = 1
+
+t_state = enum('IDLE', 'RUN', 'HOLD')
+
+
+def design(trace):
+    clk = Signal(bool(0))
+    rst = ResetSignal(0, active=1, asynchronous=False)
+    count = Signal(intbv(0)[8:])
+    acc = Signal(intbv(0)[12:])
+    state = Signal(t_state.IDLE)
+    tick = Signal(bool(0))
+    late = Signal(intbv(0)[8:], delay=3)
+    total = Signal(intbv(0)[13:])
+
+    step = modbv(0)[4:]
+    clock = Clock(clk, 10, duty=0.3, phase=2)
+
+    @always_seq(clk.posedge, reset=rst)
+    def counter():
+        step[:] = step + 1
+        count.next = count + step
+        acc.next = (acc + count) % 4096
+
+    @always(clk.negedge)
+    def fsm():
+        if state == t_state.IDLE:
+            state.next = t_state.RUN
+        elif state == t_state.RUN:
+            state.next = t_state.HOLD if tick else t_state.RUN
+        else:
+            state.next = t_state.IDLE
+        late.next = count
+
+    @always(delay(7))
+    def ticker():
+        tick.next = not tick
+
+    @always_comb
+    def comb():
+        total.next = acc + late
+
+    @always(clk.posedge)
+    def monitor():
+        trace.append((now(), int(count), int(acc), int(late), int(total),
+                      str(state), bool(tick)))
+
+    @always(late)
+    def watch():
+        trace.append((now(), 'late', int(late)))
+
+    return clock, counter, fsm, ticker, comb, monitor, watch
+
+
+class TestCheckpoint:
+
+    def check(self, tmp_path, scheduler='heap'):
+        path = str(tmp_path / 'sim.ckp')
+        ref = []
+        sim = Simulation(design(ref), scheduler=scheduler)
+        sim.run(97, quiet=QUIET)
+        sim.checkpoint(path)
+        mark = len(ref)
+        sim.run(200, quiet=QUIET)
+        res = []
+        sim = Simulation(design(res), scheduler=scheduler)
+        sim.restore(path)
+        sim.run(200, quiet=QUIET)
+        assert len(res) == len(ref) - mark > 15
+        assert res == ref[mark:]
+
+    def testRestore(self, tmp_path):
+        self.check(tmp_path)
+
+    def testWheel(self, tmp_path):
+        self.check(tmp_path, scheduler='wheel')
+
+    def testInitial(self, tmp_path):
+        path = str(tmp_path / 'sim.ckp')
+        ref = []
+        Simulation(design(ref)).run(100, quiet=QUIET)
+        Simulation(design([])).checkpoint(path)
+        res = []
+        sim = Simulation(design(res))
+        sim.restore(path)
+        sim.run(100, quiet=QUIET)
+        assert res == ref
+
+    def testInstance(self, tmp_path):
+        @instance
+        def gen():
+            while 1:
+                yield delay(10)
+        sim = Simulation(design([]), gen)
+        sim.run(20, quiet=QUIET)
+        with pytest.raises(SimulationError):
+            sim.checkpoint(str(tmp_path / 'sim.ckp'))
+
+    def testMismatch(self, tmp_path):
+        path = str(tmp_path / 'sim.ckp')
+        sim = Simulation(design([]))
+        sim.run(20, quiet=QUIET)
+        sim.checkpoint(path)
+        sim = Simulation(design([])[1:])
+        with pytest.raises(SimulationError):
+            sim.restore(path)
+
+    def testDelayMismatch(self, tmp_path):
+        path = str(tmp_path / 'sim.ckp')
+        sim = Simulation(design([]))
+        sim.run(20, quiet=QUIET)
+        sim.checkpoint(path)
+        # a second delay event for the same block has no waiter to resume
+        with open(path, 'rb') as f:
+            data = f.read()
+        state = pickle.loads(data[len(_MAGIC):])
+        delays = [e for e in state['events'] if e[0] == 'delay']
+        state['events'].append(delays[0])
+        with open(path, 'wb') as f:
+            f.write(_MAGIC)
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+        sim = Simulation(design([]))
+        with pytest.raises(SimulationError):
+            sim.restore(path)
+
+    def testStarted(self, tmp_path):
+        path = str(tmp_path / 'sim.ckp')
+        sim = Simulation(design([]))
+        sim.run(20, quiet=QUIET)
+        sim.checkpoint(path)
+        with pytest.raises(SimulationError):
+            sim.restore(path)
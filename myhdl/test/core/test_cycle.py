@@ -0,0 +1,181 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run the unit tests for cycle-based simulation """
+
+
+import pytest
+
+from myhdl import (Clock, ResetSignal, Signal, Simulation, SimulationError,
+                   always, always_comb, always_seq, delay, enum, instance,
+                   intbv, modbv, now)
+
+
+QUIET = 1
+
+t_state = enum('IDLE', 'RUN', 'HOLD')
+
+
+def design(trace, inp=None):
+    clk = Signal(bool(0))
+    rst = ResetSignal(1, active=1, asynchronous=False)
+    ticks = Signal(intbv(0)[8:])
+    count = Signal(modbv(0)[8:])
+    state = Signal(t_state.IDLE)
+    low = Signal(intbv(0)[8:])
+    a = Signal(intbv(0)[9:])
+    b = Signal(intbv(0)[10:])
+    if inp is None:
+        inp = Signal(intbv(0)[4:])
+
+    clock = Clock(clk, 10)
+
+    @always(clk.posedge)
+    def release():
+        ticks.next = ticks + 1
+        if ticks == 3:
+            rst.next = 0
+
+    @always_seq(clk.posedge, reset=rst)
+    def counter():
+        step = intbv(1)[4:]
+        if state == t_state.RUN:
+            count.next = count + step + inp
+
+    @always_seq(clk.posedge, reset=rst)
+    def fsm():
+        if state == t_state.IDLE:
+            state.next = t_state.RUN
+        elif state == t_state.RUN:
+            if count[3:] == 0:
+                state.next = t_state.HOLD
+        else:
+            state.next = t_state.RUN
+
+    @always(clk.negedge)
+    def sample():
+        low.next = b[8:]
+
+    # declared in reverse order of evaluation
+    @always_comb
+    def add():
+        b.next = a + count
+
+    @always_comb
+    def double():
+        a.next = count * 2
+
+    @always(clk.posedge)
+    def monitor():
+        trace.append((now(), int(ticks), int(count), str(state), int(low),
+                      int(a), int(b), bool(rst)))
+
+    return clock, release, counter, fsm, sample, add, double, monitor
+
+
+class TestCycle:
+
+    def check(self, scheduler='heap'):
+        traces = []
+        for mode in ('event', 'cycle'):
+            trace = []
+            sim = Simulation(design(trace), scheduler=scheduler, mode=mode)
+            sim.run(333, quiet=QUIET)
+            sim.run(667, quiet=QUIET)
+            traces.append(trace)
+        assert len(traces[0]) == 101
+        assert traces[0] == traces[1]
+
+    def testMatch(self):
+        self.check()
+
+    def testWheel(self):
+        self.check(scheduler='wheel')
+
+    def testInput(self):
+        traces = []
+        for mode in ('event', 'cycle'):
+            trace = []
+            inp = Signal(intbv(0)[4:])
+            sim = Simulation(design(trace, inp), mode=mode)
+            sim.run(100, quiet=QUIET)
+            inp.next = 5
+            sim.run(100, quiet=QUIET)
+            traces.append(trace)
+        assert traces[0] == traces[1]
+
+    def testStats(self):
+        sim = Simulation(design([]), mode='cycle')
+        sim.run(100, quiet=QUIET)
+        assert sim.stats.time_steps == 21
+        assert sim.stats.delta_cycles == 21
+
+    def testProfile(self):
+        sim = Simulation(design([]), mode='cycle', profile=True)
+        sim.run(100, quiet=QUIET)
+        calls = dict((e.name.split('.')[-1], e.calls)
+                     for e in sim.profile.entries)
+        assert calls['monitor'] == calls['counter'] == 11
+        assert calls['sample'] == 10
+        # add reads both count and the output of double, but runs once
+        assert calls['add'] == calls['double']
+
+    def testMode(self):
+        with pytest.raises(SimulationError):
+            Simulation(design([]), mode='delta')
+
+    def testInstance(self):
+        @instance
+        def gen():
+            while 1:
+                yield delay(10)
+        with pytest.raises(SimulationError):
+            Simulation(design([]), gen, mode='cycle')
+
+    def testAsyncReset(self):
+        clk = Signal(bool(0))
+        rst = ResetSignal(0, active=1, asynchronous=True)
+        q = Signal(bool(0))
+
+        @always_seq(clk.posedge, reset=rst)
+        def logic():
+            q.next = not q
+        with pytest.raises(SimulationError):
+            Simulation(Clock(clk, 10), logic, mode='cycle')
+
+    def testDelayed(self):
+        clk = Signal(bool(0))
+        q = Signal(bool(0), delay=3)
+
+        @always(clk.posedge)
+        def logic():
+            q.next = not q
+        with pytest.raises(SimulationError):
+            Simulation(Clock(clk, 10), logic, mode='cycle')
+
+    def testLoop(self):
+        a, b = Signal(bool(0)), Signal(bool(0))
+
+        @always_comb
+        def inv():
+            b.next = not a
+
+        @always_comb
+        def buf():
+            a.next = b
+        with pytest.raises(SimulationError):
+            Simulation(inv, buf, mode='cycle')
@@ -0,0 +1,135 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run the unit tests for the elaboration cache """
+
+
+import importlib.util
+import inspect
+import os
+
+import pytest
+
+from myhdl import Simulation, elaborationCache
+from myhdl import _instance, _util, _Waiter
+from myhdl._Waiter import _EdgeWaiter, _SignalTupleWaiter
+
+
+SOURCE = '''
+from myhdl import Signal, always, instance, delay
+
+
+def design():
+    a = Signal(0)
+    b = Signal(0)
+    c = Signal(0)
+
+    @always(delay(10))
+    def stimulus():
+        a.next = a + %d
+
+    @instance
+    def logic():
+        while 1:
+            yield a, c
+            b.next = a + c
+
+    return stimulus, logic, b
+'''
+
+
+def load(path, name, inc):
+    with open(path, 'w') as f:
+        f.write(SOURCE % inc)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def newProcess():
+    """ Forget the analysis cached in memory, as a new process would """
+    elaborationCache.flush()
+    elaborationCache._files.clear()
+    _util._sourceCache.clear()
+    _instance._analysisCache.clear()
+    _Waiter._yieldCache.clear()
+
+
+@pytest.fixture
+def cache(tmpdir, monkeypatch):
+    monkeypatch.setattr(elaborationCache, 'directory',
+                        str(tmpdir.join('cache')))
+    yield elaborationCache
+    newProcess()
+
+
+def check(module):
+    stimulus, logic, b = module.design()
+    assert logic.inputs == {'a', 'c'}
+    assert logic.outputs == {'b'}
+    assert type(logic.waiter) is _SignalTupleWaiter
+    sim = Simulation(stimulus, logic)
+    sim.run(35, quiet=1)
+    return b.val
+
+
+class TestElaborationCache:
+
+    def testReuse(self, cache, tmpdir, monkeypatch):
+        path = str(tmpdir.join('elab_reuse.py'))
+        module = load(path, 'elab_reuse', 1)
+        assert check(module) == 3
+        newProcess()
+        assert len(os.listdir(cache.directory)) == 1
+
+        def getsourcelines(obj):
+            raise AssertionError("source read despite the cache")
+
+        monkeypatch.setattr(inspect, 'getsourcelines', getsourcelines)
+        module = load(path, 'elab_reuse', 1)
+        assert check(module) == 3
+
+    def testStale(self, cache, tmpdir):
+        path = str(tmpdir.join('elab_stale.py'))
+        module = load(path, 'elab_stale', 1)
+        assert check(module) == 3
+        newProcess()
+        module = load(path, 'elab_stale', 2)
+        code = module.design.__code__
+        assert cache.get(code, 'source') is None
+        assert check(module) == 6
+
+    def testDisabled(self, tmpdir, monkeypatch):
+        monkeypatch.setattr(elaborationCache, 'directory', None)
+        path = str(tmpdir.join('elab_disabled.py'))
+        module = load(path, 'elab_disabled', 1)
+        assert check(module) == 3
+        elaborationCache.flush()
+        assert os.listdir(str(tmpdir)) == ['elab_disabled.py']
+
+    def testWaiter(self, cache, tmpdir):
+        from myhdl import Signal, instance
+
+        clk = Signal(bool(0))
+
+        @instance
+        def edge():
+            while 1:
+                yield clk.posedge
+
+        assert type(edge.waiter) is _EdgeWaiter
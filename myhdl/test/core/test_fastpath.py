@@ -0,0 +1,241 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run the unit tests for the specialized always block functions """
+
+
+import random
+
+import pytest
+
+from myhdl import (Clock, Signal, Simulation, TristateSignal, always,
+                   always_comb, always_seq, delay, instance, intbv, modbv,
+                   now)
+from myhdl._fastpath import _compile
+
+from myhdl.test.core.test_cycle import design
+
+QUIET = 1
+
+ROM = (3, 1, 4, 1, 5, 9, 2, 6)
+
+
+def logic(a, b, sel, z):
+    x = Signal(intbv(0)[8:])
+    y = Signal(intbv(0, min=-128, max=128))
+    c = Signal(bool(0))
+    n = Signal(intbv(0)[4:])
+    r = Signal(intbv(0)[4:])
+    w = Signal(modbv(0)[6:])
+
+    @always_comb
+    def ops():
+        x.next = ~a
+        if sel:
+            y.next = a[7:] - b[4:1]
+        else:
+            y.next = -(a[4:] * 2) if b[0] else b[8:4]
+        c.next = a[7] and not b[2] or a == b
+
+    @always_comb
+    def loops():
+        count = 0
+        for i in range(len(a)):
+            if a[i]:
+                count += 1
+        k = 0
+        while k < 3 and b[k]:
+            k += 1
+        n.next = count
+        r.next = ROM[k] + k
+
+    @always_comb
+    def wrap():
+        w.next = a + b + 50
+
+    @always_comb
+    def out():
+        z.next = (x ^ y[8:] ^ n ^ r << 4 ^ w) & 0xff | c
+
+    return ops, loops, wrap, out
+
+
+def bench(trace):
+    a = Signal(intbv(0)[8:])
+    b = Signal(intbv(0)[8:])
+    sel = Signal(bool(0))
+    z = Signal(intbv(0)[8:])
+    rnd = random.Random(3)
+
+    @instance
+    def stimulus():
+        for i in range(200):
+            a.next = rnd.randrange(256)
+            b.next = rnd.randrange(256)
+            sel.next = rnd.randrange(2)
+            yield delay(10)
+            trace.append(int(z))
+
+    return logic(a, b, sel, z), stimulus
+
+
+class TestFastPath:
+
+    def testCompiled(self):
+        sim = Simulation(bench([]), fastpath=True)
+        # only the stimulus generator is interpreted
+        assert len(sim._fastpath) == 4
+
+    def testLogic(self):
+        ref, res = [], []
+        Simulation(bench(ref)).run(quiet=QUIET)
+        Simulation(bench(res), fastpath=True).run(quiet=QUIET)
+        assert len(ref) == 200
+        assert res == ref
+
+    @pytest.mark.parametrize('mode', ['event', 'cycle'])
+    def testDesign(self, mode):
+        ref, res = [], []
+        Simulation(design(ref), mode=mode).run(1000, quiet=QUIET)
+        sim = Simulation(design(res), mode=mode, fastpath=True)
+        sim.run(1000, quiet=QUIET)
+        # the counter with a local intbv is interpreted
+        assert len(sim._fastpath) == 5
+        assert res == ref
+
+    def testFallback(self):
+        q = Signal(intbv(0)[4:])
+
+        @always(delay(10))
+        def local():
+            v = intbv(0)[4:]
+            v[:] = q + 1
+            q.next = v
+        assert _compile(local) is None
+        sim = Simulation(local, fastpath=True)
+        sim.run(35, quiet=QUIET)
+        assert not sim._fastpath
+        assert q == 3
+
+    def testBounds(self):
+        q = Signal(intbv(0)[4:])
+
+        @always(delay(10))
+        def inc():
+            q.next = q + 1
+        assert _compile(inc) is not None
+        sim = Simulation(inc, fastpath=True)
+        with pytest.raises(ValueError):
+            sim.run(200, quiet=QUIET)
+        assert now() == 160
+
+    def testBool(self):
+        q = Signal(bool(0))
+        n = Signal(intbv(0)[4:])
+
+        @always(delay(10))
+        def inc():
+            n.next = n + 1
+            q.next = n
+        sim = Simulation(inc, fastpath=True)
+        with pytest.raises(ValueError):
+            sim.run(50, quiet=QUIET)
+        assert now() == 30
+
+    def testSignalMarks(self):
+        clk = Signal(bool(0))
+        q = Signal(intbv(0)[4:])
+
+        @always_seq(clk.posedge, reset=None)
+        def inc():
+            q.next = q + 1
+        marks = [(s._driven, s._read) for s in (clk, q)]
+        sim = Simulation(Clock(clk, 10), inc, fastpath=True)
+        assert sim._fastpath
+        assert [(s._driven, s._read) for s in (clk, q)] == marks
+
+    def testProfile(self):
+        sim = Simulation(bench([]), fastpath=True, profile=True)
+        sim.run(quiet=QUIET)
+        names = sorted(e.name.split('.')[-1] for e in sim.profile.entries)
+        assert names == ['loops', 'ops', 'out', 'stimulus', 'wrap']
+
+    def delayed(self, fastpath):
+        x = Signal(bool(0))
+        # the changes of x are too short to pass the inertial delay of d
+        d = Signal(bool(0), delay=15)
+        e = Signal(bool(0), delay=5)
+        trace = []
+
+        @always(delay(10))
+        def toggle():
+            x.next = not x
+
+        @always_comb
+        def follow():
+            d.next = x
+            e.next = x
+
+        @always(d, e)
+        def monitor():
+            trace.append((now(), bool(d), bool(e)))
+
+        sim = Simulation(toggle, follow, monitor, fastpath=fastpath)
+        sim.run(100, quiet=QUIET)
+        return sim, trace
+
+    def testDelayed(self):
+        ref = self.delayed(False)[1]
+        sim, res = self.delayed(True)
+        assert len(sim._fastpath) == 2
+        assert ref and not [v for v in ref if v[1]]
+        assert res == ref
+
+    def tristate(self, fastpath):
+        bus = TristateSignal(intbv(0)[4:])
+        drv = bus.driver()
+        n = Signal(intbv(0)[4:])
+        trace = []
+
+        @always(delay(10))
+        def count():
+            n.next = n + 1
+
+        @always(n)
+        def drive():
+            drv.next = n
+
+        @instance
+        def release():
+            while 1:
+                yield delay(15)
+                drv.next = None
+
+        @always(bus)
+        def monitor():
+            trace.append((now(), None if bus.val is None else int(bus)))
+
+        sim = Simulation(count, drive, release, monitor, fastpath=fastpath)
+        sim.run(100, quiet=QUIET)
+        return sim, trace
+
+    def testTristate(self):
+        ref = self.tristate(False)[1]
+        sim, res = self.tristate(True)
+        assert len(sim._fastpath) == 2
+        assert (15, None) in ref
+        assert res == ref
@@ -20,8 +20,9 @@
 """ Run the unit tests for instance """
 
 
-from myhdl import (InstanceError, Signal)
-from myhdl._instance import _error, instance
+from myhdl import (InstanceError, Signal, always, delay, intbv)
+from myhdl._instance import _analysisCache, _error, instance
+from myhdl._util import _sourceCache
 from myhdl.test.helpers import raises_kind
 
 # random.seed(3) # random, but deterministic
@@ -54,3 +55,59 @@ class TestInstanceCompilation:
             @instance
             def h(n):
                 yield n
+
+
+class Port(object):
+
+    def __init__(self):
+        self.data = Signal(intbv(0)[8:])
+
+
+def timer(a, b, c):
+
+    @always(delay(10))
+    def logic():
+        b.next = a + c
+        c.next += 1
+
+    return logic
+
+
+def unit(port, b):
+
+    @instance
+    def logic():
+        while 1:
+            yield delay(10)
+            b.next = port.data
+
+    return logic
+
+
+class TestInstanceCache:
+
+    def testSharedAnalysis(self):
+        insts = [timer(Signal(0), Signal(0), Signal(0)) for i in range(8)]
+        code = insts[0].func.__code__
+        assert code in _analysisCache
+        assert code in _sourceCache
+        for inst in insts:
+            assert inst.inputs == {'a', 'c'}
+            assert inst.outputs == {'b'}
+            assert inst.inouts == {'c'}
+
+    def testAttributeRefs(self):
+        for i in range(2):
+            inst = unit(Port(), Signal(intbv(0)[8:]))
+            assert inst.inputs == {'port_data'}
+            assert inst.outputs == {'b'}
+            assert inst.symdict['port_data'] is not None
+
+    def testFreshTree(self):
+        inst = unit(Port(), Signal(intbv(0)[8:]))
+        assert inst.ast is not inst.ast
+
+    def testLeanSymdict(self):
+        inst = timer(Signal(0), Signal(0), Signal(0))
+        assert set(inst.symdict) == {'a', 'b', 'c', 'always', 'delay'}
+        assert 'g' not in inst.symdict
@@ -0,0 +1,300 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run the unit tests for lane-parallel simulation """
+
+
+import random
+
+import pytest
+
+from myhdl import (Clock, ResetSignal, Signal, Simulation, SimulationError,
+                   always, always_comb, always_seq, enum, instance, intbv,
+                   modbv)
+from myhdl.numeric._sintba import sintba
+from myhdl.numeric._uintba import uintba
+
+np = pytest.importorskip('numpy')
+
+
+QUIET = 1
+LANES = 8
+
+t_state = enum('IDLE', 'RUN', 'HOLD')
+
+TABLE = (3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, 8, 9, 7, 9, 3)
+
+
+def design(x, sx):
+    clk = Signal(bool(0))
+    rst = ResetSignal(1, active=1, asynchronous=False)
+    ticks = Signal(intbv(0)[4:])
+    acc = Signal(modbv(0)[8:])
+    sacc = Signal(sintba(0, 10))
+    u = Signal(uintba(0, 8))
+    state = Signal(t_state.IDLE)
+    flag = Signal(bool(0))
+    ones = Signal(intbv(0)[3:])
+    parity = Signal(bool(0))
+    rom = Signal(intbv(0)[4:])
+    big = Signal(bool(0))
+    mid = Signal(sintba(0, 6))
+
+    clock = Clock(clk, 10)
+
+    @always(clk.posedge)
+    def release():
+        if ticks < 3:
+            ticks.next = ticks + 1
+        else:
+            rst.next = 0
+
+    @always_seq(clk.posedge, reset=rst)
+    def accumulate():
+        if state == t_state.RUN:
+            acc.next = acc + x
+            sacc.next = sacc + sx
+            u.next = u + 3
+        elif state == t_state.HOLD and sx < 0:
+            sacc.next = -sacc
+
+    @always_seq(clk.posedge, reset=rst)
+    def fsm():
+        if state == t_state.IDLE:
+            state.next = t_state.RUN
+        elif state == t_state.RUN:
+            if acc[3:] == 0:
+                state.next = t_state.HOLD
+        else:
+            state.next = t_state.RUN
+        if sx < 0 or parity:
+            flag.next = True
+        else:
+            flag.next = not flag
+
+    @always_comb
+    def count():
+        n = 0
+        v = int(x)
+        while v > 0:
+            n += v & 1
+            v = v >> 1
+        ones.next = n
+
+    @always_comb
+    def check():
+        p = False
+        for i in range(4):
+            p = p ^ x[i]
+        parity.next = p
+        rom.next = TABLE[x]
+        big.next = 1 if acc > 100 else 0
+        mid.next = sacc[8:2]
+
+    sigs = dict(acc=acc, sacc=sacc, u=u, state=state, flag=flag, ones=ones,
+                parity=parity, rom=rom, big=big, mid=mid)
+    return (clock, release, accumulate, fsm, count, check), sigs
+
+
+def laneValue(sig):
+    val = sig.val
+    if isinstance(val, bool):
+        return val
+    if isinstance(val, (intbv, sintba)):
+        return int(val._val)
+    return val._index
+
+
+class TestLanes:
+
+    def setup_method(self, method):
+        rnd = random.Random(method.__name__)
+        self.xs = [[rnd.randrange(16) for i in range(LANES)]
+                   for k in range(3)]
+        self.sxs = [[rnd.randrange(-32, 32) for i in range(LANES)]
+                    for k in range(3)]
+
+    def lanes(self):
+        x = Signal(intbv(0)[4:])
+        sx = Signal(sintba(0, 6))
+        insts, sigs = design(x, sx)
+        sim = Simulation(insts, mode='cycle', lanes=LANES)
+        results = []
+        for xs, sxs in zip(self.xs, self.sxs):
+            sim.lanes[x] = xs
+            sim.lanes[sx] = sxs
+            sim.run(170, quiet=QUIET)
+            results.append(dict((n, list(sim.lanes[s]))
+                                for n, s in sigs.items()))
+        return results
+
+    def scalar(self, lane):
+        x = Signal(intbv(0)[4:])
+        sx = Signal(sintba(0, 6))
+        insts, sigs = design(x, sx)
+        sim = Simulation(insts, mode='cycle')
+        results = []
+        for xs, sxs in zip(self.xs, self.sxs):
+            x.next = xs[lane]
+            sx.next = sintba(sxs[lane], 6)
+            sim.run(170, quiet=QUIET)
+            results.append(dict((n, laneValue(s)) for n, s in sigs.items()))
+        return results
+
+    def testMatch(self):
+        results = self.lanes()
+        for lane in range(LANES):
+            for k, values in enumerate(self.scalar(lane)):
+                for n, v in values.items():
+                    assert results[k][n][lane] == v, (n, k, lane)
+
+    def testLen(self):
+        x = Signal(intbv(0)[4:])
+        insts, sigs = design(x, Signal(sintba(0, 6)))
+        sim = Simulation(insts, mode='cycle', lanes=LANES)
+        assert len(sim.lanes) == LANES
+        assert Simulation(design(x, Signal(sintba(0, 6)))[0],
+                          mode='cycle').lanes is None
+
+    def testBroadcast(self):
+        """ Signal updates outside a run apply to all lanes """
+        x = Signal(intbv(0)[4:])
+        insts, sigs = design(x, Signal(sintba(0, 6)))
+        sim = Simulation(insts, mode='cycle', lanes=LANES)
+        x.next = 5
+        sim.run(10, quiet=QUIET)
+        assert list(sim.lanes[sigs['ones']]) == [2] * LANES
+        sim.lanes[x] = 7
+        sim.run(10, quiet=QUIET)
+        assert list(sim.lanes[sigs['ones']]) == [3] * LANES
+
+    def testCopy(self):
+        x = Signal(intbv(0)[4:])
+        insts, sigs = design(x, Signal(sintba(0, 6)))
+        sim = Simulation(insts, mode='cycle', lanes=LANES)
+        sim.lanes[x] = range(LANES)
+        sim.run(10, quiet=QUIET)
+        ones = sim.lanes[sigs['ones']]
+        ones[:] = 0
+        assert list(sim.lanes[sigs['ones']]) == [0, 1, 1, 2, 1, 2, 2, 3]
+
+    def testBounds(self):
+        clk = Signal(bool(0))
+        count = Signal(intbv(0, min=0, max=4))
+        step = Signal(intbv(1)[2:])
+
+        @always(clk.posedge)
+        def inc():
+            count.next = count + step
+
+        sim = Simulation(Clock(clk, 10), inc, mode='cycle', lanes=4)
+        sim.lanes[step] = [0, 0, 3, 0]
+        with pytest.raises(ValueError) as e:
+            sim.run(100, quiet=QUIET)
+        assert "lane 2" in str(e.value)
+
+    def testBool(self):
+        clk = Signal(bool(0))
+        flag = Signal(bool(0))
+        v = Signal(intbv(0)[2:])
+
+        @always(clk.posedge)
+        def copy():
+            flag.next = v
+
+        sim = Simulation(Clock(clk, 10), copy, mode='cycle', lanes=3)
+        sim.lanes[v] = [0, 1, 1]
+        sim.run(20, quiet=QUIET)
+        assert list(sim.lanes[flag]) == [False, True, True]
+        sim.lanes[v] = [0, 2, 1]
+        with pytest.raises(ValueError) as e:
+            sim.run(20, quiet=QUIET)
+        assert "lane 1" in str(e.value)
+
+    def testList(self):
+        clk = Signal(bool(0))
+        flags = [Signal(bool(0)) for i in range(4)]
+        n = Signal(intbv(0)[3:])
+        first = Signal(bool(0))
+
+        @always(clk.posedge)
+        def count():
+            c = 0
+            for i in range(4):
+                c += flags[i]
+            n.next = c
+            first.next = flags[0]
+
+        sim = Simulation(Clock(clk, 10), count, mode='cycle', lanes=3)
+        sim.lanes[flags[0]] = [1, 0, 1]
+        sim.lanes[flags[2]] = [1, 0, 0]
+        sim.lanes[flags[3]] = [1, 1, 0]
+        sim.run(20, quiet=QUIET)
+        assert list(sim.lanes[n]) == [3, 1, 1]
+        assert list(sim.lanes[first]) == [True, False, True]
+
+    def testMode(self):
+        x = Signal(intbv(0)[4:])
+        insts, sigs = design(x, Signal(sintba(0, 6)))
+        with pytest.raises(SimulationError):
+            Simulation(insts, lanes=LANES)
+
+    def testNumber(self):
+        x = Signal(intbv(0)[4:])
+        insts, sigs = design(x, Signal(sintba(0, 6)))
+        for lanes in (0, -1, 2.0, True):
+            with pytest.raises(SimulationError):
+                Simulation(insts, mode='cycle', lanes=lanes)
+
+    def testUnsupported(self):
+        clk = Signal(bool(0))
+        a = Signal(intbv(0)[8:])
+        b = Signal(intbv(0)[8:])
+
+        @always(clk.posedge)
+        def logic():
+            for i in range(8):
+                if a[i]:
+                    break
+            b.next = a
+
+        with pytest.raises(SimulationError):
+            Simulation(Clock(clk, 10), logic, mode='cycle', lanes=2)
+
+    def testInstance(self):
+        clk = Signal(bool(0))
+
+        @instance
+        def stimulus():
+            yield clk.posedge
+
+        with pytest.raises(SimulationError):
+            Simulation(Clock(clk, 10), stimulus, mode='cycle', lanes=2)
+
+    def testSignal(self):
+        x = Signal(intbv(0)[4:])
+        insts, sigs = design(x, Signal(sintba(0, 6)))
+        sim = Simulation(insts, mode='cycle', lanes=LANES)
+        with pytest.raises(SimulationError):
+            sim.lanes[Signal(bool(0))]
+
+    def testCheckpoint(self, tmpdir):
+        x = Signal(intbv(0)[4:])
+        insts, sigs = design(x, Signal(sintba(0, 6)))
+        sim = Simulation(insts, mode='cycle', lanes=LANES)
+        with pytest.raises(SimulationError):
+            sim.checkpoint(str(tmpdir.join('lanes.ckpt')))
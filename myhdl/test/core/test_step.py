@@ -0,0 +1,150 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run the unit tests for the step and run_until methods """
+
+
+import pytest
+
+from myhdl import (Clock, Signal, Simulation, SimulationError,
+                   StopSimulation, always, always_comb, delay, instance,
+                   intbv, modbv, now)
+
+
+QUIET = 1
+
+
+def design(mode='event'):
+    clk = Signal(bool(0))
+    inp = Signal(intbv(0)[4:])
+    count = Signal(modbv(0)[8:])
+    total = Signal(intbv(0)[10:])
+
+    @always(clk.posedge)
+    def inc():
+        count.next = count + inp
+
+    @always_comb
+    def add():
+        total.next = count + inp
+
+    sim = Simulation(Clock(clk, 10), inc, add, mode=mode)
+    return sim, clk, inp, count, total
+
+
+class TestStep:
+
+    def testStep(self):
+        sim, clk, inp, count, total = design()
+        inp.next = 1
+        assert sim.step(signals=(clk, count)) == [True, 1]
+        assert now() == 0
+        assert sim.step(signals=(clk, count)) == [False, 1]
+        assert now() == 5
+        assert sim.step(4, signals=(clk, count)) == [False, 3]
+        assert now() == 25
+
+    def testRunUntil(self):
+        sim, clk, inp, count, total = design()
+        ref, rclk, rinp, rcount, rtotal = design()
+        for t in (7, 30, 100, 155):
+            inp.next = t % 16
+            values = sim.run_until(t, signals=[count, total])
+            assert now() == t
+            # updates outside a run go to the next simulation that runs
+            rinp.next = t % 16
+            ref.run(t - ref._context._time, quiet=QUIET)
+            assert values == [rcount.val, rtotal.val]
+            assert sim.run_until(t, signals=[count, total]) == values
+
+    def testResident(self):
+        sim, clk, inp, count, total = design()
+        sim.step()
+        stepper = sim._stepper
+        sim.step(10)
+        sim.run_until(200)
+        assert sim._stepper is stepper
+
+    def testCopy(self):
+        sim, clk, inp, count, total = design()
+        inp.next = 3
+        values = sim.step(signals=[count])
+        sim.step(2)
+        assert values == [3]
+        assert count == 6
+
+    def testStats(self):
+        sim, clk, inp, count, total = design()
+        sim.step(10)
+        assert sim.stats.time_steps == 10
+        sim.step(5)
+        assert sim.stats.time_steps == 15
+        sim.run(20, quiet=QUIET)
+        sim.step(2)
+        assert sim.stats.time_steps == 21
+
+    def testRun(self):
+        sim, clk, inp, count, total = design()
+        inp.next = 1
+        sim.step(3)
+        sim.run(100, quiet=QUIET)
+        assert now() == 110
+        assert count == 12
+        sim.run_until(200)
+        assert now() == 200
+        assert count == 21
+
+    def testEnd(self):
+        a = Signal(intbv(0)[8:])
+
+        @instance
+        def stimulus():
+            for i in range(5):
+                a.next = i
+                yield delay(10)
+
+        sim = Simulation(stimulus)
+        sim.run_until(30)
+        with pytest.raises(StopSimulation):
+            sim.step(10)
+        assert a == 4
+        with pytest.raises(StopSimulation):
+            sim.step()
+
+    def testCycle(self):
+        sim, clk, inp, count, total = design('cycle')
+        ref, rclk, rinp, rcount, rtotal = design()
+        for n in (1, 1, 4, 7):
+            inp.next = n
+            values = sim.step(n, signals=(count, total))
+            t = now()
+            rinp.next = n
+            assert ref.step(n, signals=(rcount, rtotal)) == values
+            assert now() == t
+        for t in (60, 60, 95, 200):
+            values = sim.run_until(t, signals=(count, total))
+            assert ref.run_until(t, signals=(rcount, rtotal)) == values
+            assert now() == t
+
+    def testErrors(self):
+        sim, clk, inp, count, total = design()
+        sim.run_until(50)
+        with pytest.raises(SimulationError):
+            sim.run_until(40)
+        for n in (-1, 1.0):
+            with pytest.raises(SimulationError):
+                sim.step(n)
@@ -22,11 +22,13 @@
 
 import os
 import random
+import sys
 
 import pytest
 
 from myhdl import Signal, Simulation, _simulator, delay, instance, intbv
 from myhdl._traceSignals import TraceSignalsError, _error, traceSignals
+from myhdl._extractHierarchy import _HierExtr
 from myhdl._simulator import _simulator
 from myhdl.test.helpers import raises_kind
 
@@ -76,6 +78,14 @@ def top3():
     return inst_1, inst_2
 
 
+def bank():
+    insts = []
+    for i in range(3):
+        insts.append(gen(Signal(bool(0))))
+    sub = fun()
+    return insts, sub
+
+
 def genTristate(clk, x, y, z):
     xd = x.driver()
     yd = y.driver()
@@ -161,9 +171,11 @@ class TestTraceSigs:
     def testBackupOutputFile(self, vcd_dir):
         p = "%s.vcd" % fun.__name__
         dut = traceSignals(fun)
-        Simulation(dut).run(1000, quiet=QUIET)
-        _simulator._tf.close()
-        _simulator._tracing = 0
+        sim = Simulation(dut)
+        sim.run(1000, quiet=QUIET)
+        # the suspended simulation owns the trace file
+        sim._context._tf.close()
+        sim._context._tracing = 0
         size = path.getsize(p)
         pbak = p + '.' + str(path.getmtime(p))
         assert not path.exists(pbak)
@@ -187,3 +199,24 @@ class TestTraceSigs:
         assert not path.exists(psub)
         assert path.exists(pdutd)
         assert not path.exists(psubd)
+
+    def testHierarchy(self):
+        h = _HierExtr('bank', bank)
+        assert [(inst.level, inst.name) for inst in h.hierarchy] == \
+            [(1, 'bank'), (2, 'sub'), (3, 'inst'), (2, 'insts_2'),
+             (2, 'insts_1'), (2, 'insts_0')]
+
+    def testProfiler(self, vcd_dir, monkeypatch):
+        monkeypatch.setattr(traceSignals, 'directory', None)
+        calls = []
+
+        def profiler(frame, event, arg):
+            if event == 'call':
+                calls.append(frame.f_code.co_name)
+
+        sys.setprofile(profiler)
+        try:
+            traceSignals(fun)
+        finally:
+            sys.setprofile(None)
+        assert 'gen' in calls
@@ -0,0 +1,67 @@
+""" Compare a generator driven clock with the kernel Clock.
+
+Runs the timer array benchmark for a fixed number of time units with
+each kind of clock and reports the wall clock time.
+
+usage: python bench_clock.py [duration]
+"""
+import sys
+import time
+
+from myhdl import Clock, Signal, Simulation, delay, instance
+
+from timer import timer_sig, timer_var
+
+
+def timer_array(timer, native):
+
+    MAXVAL = 1234
+
+    clock = Signal(bool())
+    reset = Signal(bool())
+    flags = [Signal(bool()) for i in range(8)]
+
+    dut = [timer(flag, clock, reset, MAXVAL) for flag in flags]
+
+    @instance
+    def rstgen():
+        yield delay(10)
+        reset.next = 1
+        yield delay(10)
+        reset.next = 0
+
+    if native:
+        clkgen = Clock(clock, period=20, phase=30)
+    else:
+        @instance
+        def clkgen():
+            yield delay(30)
+            while 1:
+                clock.next = not clock
+                yield delay(10)
+
+    return dut, rstgen, clkgen
+
+
+def bench(timer, native, duration):
+    sim = Simulation(timer_array(timer, native))
+    start = time.perf_counter()
+    sim.run(duration, quiet=1)
+    return time.perf_counter() - start
+
+
+def main(duration):
+    print("%-10s %-10s %10s" % ("timer", "clock", "time (s)"))
+    for timer in (timer_sig, timer_var):
+        for native in (False, True):
+            t = bench(timer, native, duration)
+            print("%-10s %-10s %10.2f" % (timer.__name__,
+                                         "Clock" if native else "generator",
+                                         t))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(400000)
@@ -0,0 +1,77 @@
+""" Compare event-driven and cycle-based simulation.
+
+The timer and long divider benchmarks use generators and asynchronous
+resets, so they cannot run in cycle mode. This benchmark runs a
+synchronous version of the timer array, with always_seq timers, an
+always_comb flag counter and a kernel Clock, for a fixed number of time
+units in each mode, and reports the wall clock time.
+
+usage: python bench_cycle.py [duration]
+"""
+import sys
+import time
+
+from myhdl import Clock, ResetSignal, Signal, Simulation, always_comb, \
+    always_seq, intbv
+
+MAXVAL = 1234
+NTIMERS = 8
+
+
+def timer_seq(flag, clock, reset, maxval):
+
+    count = Signal(intbv(0, min=0, max=maxval + 1))
+
+    @always_seq(clock.posedge, reset=reset)
+    def logic():
+        flag.next = 0
+        if count == maxval:
+            flag.next = 1
+            count.next = 0
+        else:
+            count.next = count + 1
+
+    return logic
+
+
+def timer_array():
+
+    clock = Signal(bool())
+    reset = ResetSignal(1, active=1, asynchronous=False)
+    flags = [Signal(bool()) for i in range(NTIMERS)]
+    nflags = Signal(intbv(0, min=0, max=NTIMERS + 1))
+
+    timers = [timer_seq(flag, clock, reset, MAXVAL - i)
+              for i, flag in enumerate(flags)]
+
+    @always_seq(clock.posedge, reset=None)
+    def release():
+        reset.next = 0
+
+    @always_comb
+    def count():
+        n = 0
+        for flag in flags:
+            n += flag
+        nflags.next = n
+
+    clkgen = Clock(clock, period=20, phase=30)
+
+    return clkgen, timers, release, count
+
+
+def main(duration):
+    print("%-8s %10s" % ("mode", "time (s)"))
+    for mode in ('event', 'cycle'):
+        sim = Simulation(timer_array(), mode=mode)
+        start = time.perf_counter()
+        sim.run(duration, quiet=1)
+        t = time.perf_counter() - start
+        print("%-8s %10.2f" % (mode, t))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(1000000)
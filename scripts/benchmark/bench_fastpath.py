@@ -0,0 +1,32 @@
+""" Compare interpreted and specialized always blocks.
+
+Runs the synchronous timer array of bench_cycle.py for a fixed number of
+time units in each simulation mode, with and without the fast path, and
+reports the wall clock time.
+
+usage: python bench_fastpath.py [duration]
+"""
+import sys
+import time
+
+from myhdl import Simulation
+
+from bench_cycle import timer_array
+
+
+def main(duration):
+    print("%-8s %-10s %10s" % ("mode", "fastpath", "time (s)"))
+    for mode in ('event', 'cycle'):
+        for fastpath in (False, True):
+            sim = Simulation(timer_array(), mode=mode, fastpath=fastpath)
+            start = time.perf_counter()
+            sim.run(duration, quiet=1)
+            t = time.perf_counter() - start
+            print("%-8s %-10s %10.2f" % (mode, fastpath, t))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(1000000)
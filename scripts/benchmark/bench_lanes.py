@@ -0,0 +1,99 @@
+""" Compare scalar and lane-parallel cycle-based simulation.
+
+Runs a timer array whose timer limits are inputs, for a number of lanes
+with different limits: once per lane with the cycle kernel and the
+fastpath, and once for all lanes with a lane simulation. Reports the wall
+clock time of both, and checks that the flag counts match. Requires NumPy.
+
+usage: python bench_lanes.py [lanes] [duration]
+"""
+import random
+import sys
+import time
+
+from myhdl import Clock, ResetSignal, Signal, Simulation, always_comb, \
+    always_seq, intbv
+
+NTIMERS = 8
+MAXVAL = 1234
+
+
+def timer_seq(flag, clock, reset, maxval):
+
+    count = Signal(intbv(0, min=0, max=MAXVAL + 1))
+
+    @always_seq(clock.posedge, reset=reset)
+    def logic():
+        flag.next = 0
+        if count >= maxval:
+            flag.next = 1
+            count.next = 0
+        else:
+            count.next = count + 1
+
+    return logic
+
+
+def timer_array(limits, total):
+
+    clock = Signal(bool())
+    reset = ResetSignal(1, active=1, asynchronous=False)
+    flags = [Signal(bool()) for i in range(NTIMERS)]
+    nflags = Signal(intbv(0, min=0, max=NTIMERS + 1))
+
+    timers = [timer_seq(flags[i], clock, reset, limits[i])
+              for i in range(NTIMERS)]
+
+    @always_seq(clock.posedge, reset=None)
+    def release():
+        reset.next = 0
+
+    @always_comb
+    def count():
+        n = 0
+        for i in range(NTIMERS):
+            n += flags[i]
+        nflags.next = n
+
+    @always_seq(clock.posedge, reset=reset)
+    def accumulate():
+        total.next = total + nflags
+
+    clkgen = Clock(clock, period=20, phase=30)
+
+    return clkgen, timers, release, count, accumulate
+
+
+def main(lanes, duration):
+    rnd = random.Random(1)
+    values = [[rnd.randrange(MAXVAL // 2, MAXVAL) for i in range(NTIMERS)]
+              for lane in range(lanes)]
+    print("%-10s %10s" % ("mode", "time (s)"))
+
+    start = time.perf_counter()
+    totals = []
+    for lane in range(lanes):
+        limits = [Signal(intbv(v, min=0, max=MAXVAL + 1))
+                  for v in values[lane]]
+        total = Signal(intbv(0)[32:])
+        sim = Simulation(timer_array(limits, total), mode='cycle',
+                         fastpath=True)
+        sim.run(duration, quiet=1)
+        totals.append(int(total))
+    print("%-10s %10.2f" % ("scalar", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    limits = [Signal(intbv(0, min=0, max=MAXVAL + 1))
+              for i in range(NTIMERS)]
+    total = Signal(intbv(0)[20:])
+    sim = Simulation(timer_array(limits, total), mode='cycle', lanes=lanes)
+    for i, limit in enumerate(limits):
+        sim.lanes[limit] = [values[lane][i] for lane in range(lanes)]
+    sim.run(duration, quiet=1)
+    print("%-10s %10.2f" % ("lanes", time.perf_counter() - start))
+    assert list(sim.lanes[total]) == totals
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [64, 100000][len(args):]))
@@ -0,0 +1,68 @@
+""" Compare event-driven and levelized evaluation of always_comb networks.
+
+Runs a ripple carry adder of always_comb full adders with random operands
+for a fixed number of time units, with and without levelization, and
+reports the number of block evaluations and the wall clock time.
+
+usage: python bench_levelize.py [duration]
+"""
+import random
+import sys
+import time
+
+from myhdl import Signal, Simulation, always_comb, delay, instance
+
+WIDTH = 32
+
+
+def fulladder(a, b, cin, s, cout, counts, k):
+
+    @always_comb
+    def logic():
+        counts[k] += 1
+        s.next = a ^ b ^ cin
+        cout.next = (a & b) | (cin & (a ^ b))
+
+    return logic
+
+
+def adder(counts):
+    a = [Signal(bool(0)) for i in range(WIDTH)]
+    b = [Signal(bool(0)) for i in range(WIDTH)]
+    s = [Signal(bool(0)) for i in range(WIDTH)]
+    c = [Signal(bool(0)) for i in range(WIDTH + 1)]
+    adders = [fulladder(a[i], b[i], c[i], s[i], c[i + 1], counts, i)
+              for i in range(WIDTH)]
+    rnd = random.Random(1)
+
+    @instance
+    def stimulus():
+        while 1:
+            x, y = rnd.getrandbits(WIDTH), rnd.getrandbits(WIDTH)
+            for i in range(WIDTH):
+                a[i].next = bool(x >> i & 1)
+                b[i].next = bool(y >> i & 1)
+            yield delay(10)
+            z = sum(int(s[i]) << i for i in range(WIDTH))
+            z += int(c[WIDTH]) << WIDTH
+            assert z == x + y
+
+    return adders, stimulus
+
+
+def main(duration):
+    print("%-10s %12s %10s" % ("levelize", "evaluations", "time (s)"))
+    for levelize in (False, True):
+        counts = [0] * WIDTH
+        sim = Simulation(adder(counts), levelize=levelize)
+        start = time.perf_counter()
+        sim.run(duration, quiet=1)
+        t = time.perf_counter() - start
+        print("%-10s %12d %10.2f" % (levelize, sum(counts), t))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(100000)
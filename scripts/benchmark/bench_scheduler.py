@@ -0,0 +1,40 @@
+""" Compare the future event queue implementations of Simulation.
+
+Runs the timer benchmarks for a fixed number of time units with each
+scheduler and reports the wall clock time.
+
+usage: python bench_scheduler.py [duration]
+"""
+import sys
+import time
+
+from myhdl import Simulation
+
+from timer import timer_sig, timer_var
+from test_timer import test_timer
+from test_timer_array import test_timer_array
+
+
+def bench(bench_func, timer, scheduler, duration):
+    sim = Simulation(bench_func(timer), scheduler=scheduler)
+    start = time.perf_counter()
+    sim.run(duration, quiet=1)
+    return time.perf_counter() - start
+
+
+def main(duration):
+    print("%-18s %-10s %-8s %10s" % ("bench", "timer", "queue", "time (s)"))
+    for bench_func in (test_timer, test_timer_array):
+        for timer in (timer_sig, timer_var):
+            for scheduler in ('heap', 'wheel'):
+                t = bench(bench_func, timer, scheduler, duration)
+                print("%-18s %-10s %-8s %10.2f" % (bench_func.__name__,
+                                                  timer.__name__,
+                                                  scheduler, t))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(200000)
@@ -14,9 +14,9 @@ if (3, 0) <= sys.version_info < (3, 10):
 
 # Prefer setuptools over distutils
 try:
-    from setuptools import setup
+    from setuptools import setup, Extension
 except ImportError:
-    from distutils.core import setup
+    from distutils.core import setup, Extension
 
 
 _version_re = re.compile(r'__version__\s+=\s+(.*)')
@@ -43,6 +43,9 @@ setup(
     url="https://github.com/jmgc/myhdl-numeric",
       packages=['myhdl', 'myhdl.conversion', 'myhdl.numeric'],
     data_files=[(os.path.join(data_root, k), v) for k, v in cosim_data.items()],
+    # compiled kernel for Simulation.runc; runc falls back to run without it
+    ext_modules=[Extension('myhdl._simrunc', ['myhdl/_simrunc.c'],
+                           optional=True)],
     license="LGPL",
     platforms='any',
     keywords="HDL ASIC FPGA hardware design",